@@ -0,0 +1,109 @@
+""" Benchmark of the parser on adversarial messages (crafted to make the patterns backtrack).
+
+    Parses every attack at increasing sizes, reporting the cost per byte: it should stay flat as
+    the messages grow (no pattern backtracks catastrophically, and no stage is quadratic). The run
+    fails (exit code 1) if the cost per byte of the largest size exceeds MAX_COST_GROWTH times that
+    of the smallest one. Then does the same with hardened parsing (see parse_limits), where the
+    oversized messages get rejected early.
+
+    Run from the project root: `python benchmarks/adversarial_bench.py`
+"""
+from typing import Dict, List
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from sip_parser.sip_message import SipMessage  # noqa: E402
+from sip_parser.parse_limits import (  # noqa: E402
+    ParseLimits,
+    enable_hardened_parsing,
+    disable_hardened_parsing,
+)
+from sip_parser.exceptions import SipParseError  # noqa: E402
+
+START = "INVITE sip:bob@biloxi.com SIP/2.0\r\n"
+
+# Attack name: function building a message of (roughly) the given size
+ATTACKS = {
+    "leading_whitespace": lambda size: " " * size + "INVITE",
+    "unclosed_name_addr": lambda size: START + "To: <" + " " * size + "\r\n\r\n",
+    "unclosed_uri": lambda size: START + "Route: <sip:p1.example.com" + " " * size + "\r\n\r\n",
+    "display_name_words": lambda size: START + "To: " + "a " * (size // 2) + "\r\n\r\n",
+    "unclosed_quoted_param": lambda size: (
+        START + 'Contact: <sip:a@b>;x="' + "\\a" * (size // 2) + "\r\n\r\n"
+    ),
+    "unclosed_auth_quote": lambda size: (
+        START + 'Authorization: Digest nonce="' + "\\a" * (size // 2) + "\r\n\r\n"
+    ),
+    "uri_params": lambda size: START + "Route: <sip:a@b" + ";a=b" * (size // 4) + "?x>\r\n\r\n",
+    "uri_headers": lambda size: START + "Route: <sip:a@b?" + "a=b&" * (size // 4) + ">\r\n\r\n",
+    "header_params": lambda size: START + "To: <sip:a@b>" + ";a=b" * (size // 4) + "\r\n\r\n",
+    "many_headers": lambda size: START + "X-A: a\r\n" * (size // 8) + "\r\n",
+}
+
+SIZES = (4096, 16384, 65536, 262144, 1048576)
+# Accepted growth of the cost per byte, from the smallest size to the largest one. Linear parsing
+# still grows a few times, as the messages outgrow the CPU caches, while quadratic parsing grows
+# 256x over these sizes
+MAX_COST_GROWTH = 8
+
+
+def parse_time(raw: str, repeat: int = 3) -> float:
+    """ Best time to parse (or reject) a message, in seconds """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            SipMessage.from_string(raw)
+        except (SipParseError, RuntimeError, ValueError):
+            pass
+
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def run(title: str) -> Dict[str, List[float]]:
+    """ Prints the cost per byte (ns) of every attack at every size, and returns them """
+    print(title)
+    print(f"{'attack':<24}" + "".join(f"{f'{size} B ns/B':>16}" for size in SIZES))
+    results = {}
+    for name, build in ATTACKS.items():
+        costs = results[name] = []
+        for size in SIZES:
+            raw = build(size)
+            costs.append(parse_time(raw) * 1e9 / len(raw))
+
+        print(f"{name:<24}" + "".join(f"{cost:>16.1f}" for cost in costs))
+
+    print()
+    return results
+
+
+def main():
+    results = run("Default parsing")
+    enable_hardened_parsing(ParseLimits())
+    try:
+        run("Hardened parsing (default ParseLimits)")
+    finally:
+        disable_hardened_parsing()
+
+    unbounded = [
+        f"{name}: {costs[-1]:.1f} ns/B at {SIZES[-1]} B > {MAX_COST_GROWTH} x {costs[0]:.1f} ns/B "
+        f"at {SIZES[0]} B"
+        for name, costs in results.items()
+        if costs[-1] > costs[0] * MAX_COST_GROWTH
+    ]
+    if unbounded:
+        print("UNBOUNDED COST PER BYTE:")
+        for line in unbounded:
+            print(f"  {line}")
+
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
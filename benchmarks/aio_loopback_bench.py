@@ -0,0 +1,76 @@
+""" Loopback load test for the asyncio TCP adapter.
+
+    Starts a server replying 200 OK to every request, then opens many concurrent TCP clients
+    (each one pipelining a number of OPTIONS requests) and reports the throughput.
+    Raise the open files limit (ulimit -n) before trying tens of thousands of clients.
+
+    Run from the project root: `python benchmarks/aio_loopback_bench.py --clients 10000`
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from sip_parser.aio import serve_tcp  # noqa: E402
+from sip_parser.sip_message import SipMessage  # noqa: E402
+from sip_parser.stream_parser import SipStreamParser  # noqa: E402
+
+REQUEST = (
+    "OPTIONS sip:bob@example.com SIP/2.0\r\n"
+    "Via: SIP/2.0/TCP 127.0.0.1;branch=z9hG4bK{seq}\r\n"
+    "CSeq: {seq} OPTIONS\r\n"
+    "Content-Length: 0\r\n\r\n"
+)
+
+
+async def reply_ok(message: SipMessage, peer):
+    response = SipMessage.from_dict(
+        {"status": 200, "reason": "OK", "headers": {"cseq": message.headers["cseq"]}}
+    )
+    peer.send(response)
+
+
+async def client(port: int, num_requests: int):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write("".join(REQUEST.format(seq=seq) for seq in range(num_requests)).encode())
+
+    parser = SipStreamParser()
+    received = 0
+    while received < num_requests:
+        data = await reader.read(65536)
+        if not data:
+            break
+
+        received += len(parser.feed(data))
+
+    writer.close()
+    return received
+
+
+async def run(num_clients: int, num_requests: int):
+    server = await serve_tcp(reply_ok, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+
+    start = time.perf_counter()
+    received = await asyncio.gather(*(client(port, num_requests) for _ in range(num_clients)))
+    elapsed = time.perf_counter() - start
+
+    server.close()
+    total = sum(received)
+    print(f"{num_clients} clients, {total} transactions in {elapsed:.2f}s: {total / elapsed:.0f}/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=10, help="Requests per client")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.clients, args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+""" Benchmark for the parameter scanner on 3GPP-like Contact headers with lots of feature tags.
+
+    Compares the position-based scanner against the old approach (re-slicing the leftover data
+    after every match), for an increasing number of parameters. The time per parameter should
+    stay flat with the scanner, while it grows with the old approach.
+
+    Run from the project root: `python benchmarks/contact_params_bench.py`
+"""
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from sip_parser.helpers.sip_parsers import parse_aor, parse_params  # noqa: E402
+
+FEATURE_TAGS = (
+    ("+g.3gpp.icsi-ref", '="urn%3Aurn-7%3A3gpp-service.ims.icsi.mmtel"'),
+    ("+g.3gpp.iari-ref", '="urn%3Aurn-7%3A3gpp-application.ims.iari.rcse.im"'),
+    ("+g.3gpp.cs-voice", ""),
+    ("+g.oma.sip-im", ""),
+    ("video", ""),
+    ("+sip.instance", '="<urn:gsma:imei:12345678-023451-0>"'),
+    ("expires", "=600000"),
+)
+
+
+def legacy_parse_params(data):
+    """ The previous implementation: slices the leftover data after every match """
+    params = {}
+    while True:
+        m = re.match(
+            r'\s*;\s*([\w\-.!%*_+`\'~]+)(?:\s*=\s*([\w\-.!%*_+`\'~]+|"[^"\\]*(\\.[^"\\]*)*"))?',
+            data,
+        )
+        if not m:
+            break
+
+        params[m.group(1).lower()] = m.group(2)
+        data = data[m.end() :]
+
+    return params, data
+
+
+def build_contact(num_params: int) -> str:
+    tags = []
+    for i in range(num_params):
+        name, value = FEATURE_TAGS[i % len(FEATURE_TAGS)]
+        tags.append(f"{name}{i}{value}")
+
+    return "<sip:97321761314732@127.0.0.1:51372;transport=tcp>;" + ";".join(tags)
+
+
+def main():
+    print(
+        f"{'params':>8} {'scanner us':>12} {'per param ns':>14} {'legacy us':>12} {'per param ns':>14}"
+    )
+    for num_params in (10, 50, 100, 500, 1000, 5000):
+        contact = build_contact(num_params)
+        params_str = contact[contact.index(">") + 1 :]
+        assert parse_params(params_str) == legacy_parse_params(params_str)
+        assert len(parse_aor(contact)[0]["params"]) == num_params
+
+        number = max(1, 20000 // num_params)
+        scanner = min(timeit.repeat(lambda: parse_params(params_str), number=number, repeat=3))
+        legacy = min(
+            timeit.repeat(lambda: legacy_parse_params(params_str), number=number, repeat=3)
+        )
+        scanner_us, legacy_us = scanner / number * 1e6, legacy / number * 1e6
+        print(
+            f"{num_params:>8} {scanner_us:>12.1f} {scanner_us * 1000 / num_params:>14.0f} "
+            f"{legacy_us:>12.1f} {legacy_us * 1000 / num_params:>14.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+""" Corpus of realistic messages used by the benchmarks """
+import textwrap
+
+
+def prepare_msg(msg: str):
+    # Message lines must be CRLF-terminated and not indented
+    return textwrap.dedent(msg).replace("\n", "\r\n")
+
+
+def prepare_sdp(msg: str):
+    return textwrap.dedent(msg).strip()
+
+
+REGISTER_3GPP = prepare_msg(
+    """\
+    REGISTER sip:ims.mnc123.mcc123.3gppnetwork.org SIP/2.0
+    Via: SIP/2.0/TCP 127.0.0.1:51372;branch=z9hG4bK4y479aZgQ6b15d63F;rport
+    Route: <sip:127.0.0.1:5060;lr>
+    From: <sip:97321761314732@ims.mnc123.mcc123.3gppnetwork.org>;tag=14028fvx4vg
+    To: <sip:97321761314732@ims.mnc123.mcc123.3gppnetwork.org>
+    Call-ID: 1111aa63F@127.0.0.1
+    CSeq: 1 REGISTER
+    Contact: <sip:97321761314732@127.0.0.1:51372;transport=tcp>;expires=600000;+g.3gpp.icsi-ref="urn%3Aurn-7%3A3gpp-service.ims.icsi.mmtel,urn%3Aurn-7%3A3gpp-service.ims.icsi.gsma.callcomposer";+g.3gpp.iari-ref="urn%3Aurn-7%3A3gpp-application.ims.iari.rcse.im,urn%3Aurn-7%3A3gpp-application.ims.iari.rcs.fthttp,urn%3Aurn-7%3A3gpp-application.ims.iari.rcs.geopush,urn%3Aurn-7%3A3gpp-application.ims.iari.rcs.chatbot";+g.3gpp.cs-voice;+g.oma.sip-im;+g.3gpp.smsip;video;+g.3gpp.mid-call;+g.3gpp.srvcc-alerting;+g.3gpp.ps2cs-srvcc-orig-pre-alerting;+g.gsma.rcs.botversion="#=1,#=2";+g.3gpp.icsi-ref="urn%3Aurn-7%3A3gpp-service.ims.icsi.oma.cpm.msg";+sip.instance="<urn:gsma:imei:12345678-023451-0>"
+    Authorization: Digest username="97321761314732@ims.mnc123.mcc123.3gppnetwork.org", realm="ims.mnc123.mcc123.3gppnetwork.org", nonce="", uri="sip:ims.mnc021.mcc658.3gppnetwork.org", response=""
+    Max-Forwards: 70
+    User-Agent: iPhone 9.0
+    Supported: gruu,path,sec-agree,timer
+    P-Access-Network-Info: IEEE-802.11;i-wlan-node-id=34a84edc9615
+    Expires: 600000
+    Content-Length: 0
+
+    """
+)
+
+SDP_OFFER = prepare_sdp(
+    """\
+    v=0
+    o=alice 2890844526 2890844526 IN IP4 198.51.100.1
+    s=-
+    c=IN IP4 198.51.100.1
+    t=0 0
+    m=audio 49170 RTP/AVP 0 8 97 101
+    a=rtpmap:0 PCMU/8000
+    a=rtpmap:8 PCMA/8000
+    a=rtpmap:97 iLBC/8000
+    a=rtpmap:101 telephone-event/8000
+    a=fmtp:101 0-15
+    a=ptime:20
+    a=sendrecv
+    m=video 51372 RTP/AVP 31 32
+    a=rtpmap:31 H261/90000
+    a=rtpmap:32 MPV/90000
+    """
+)
+
+INVITE_SDP = (
+    prepare_msg(
+        f"""\
+    INVITE sip:bob@biloxi.example.com SIP/2.0
+    Via: SIP/2.0/UDP pc33.atlanta.example.com;branch=z9hG4bK776asdhds
+    Max-Forwards: 70
+    To: Bob <sip:bob@biloxi.example.com>
+    From: Alice <sip:alice@atlanta.example.com>;tag=1928301774
+    Call-ID: a84b4c76e66710@pc33.atlanta.example.com
+    CSeq: 314159 INVITE
+    Contact: <sip:alice@pc33.atlanta.example.com>
+    Allow: INVITE, ACK, CANCEL, OPTIONS, BYE, REFER, NOTIFY, MESSAGE, SUBSCRIBE, INFO
+    Supported: replaces, timer, 100rel
+    Content-Type: application/sdp
+    Content-Length: {len(SDP_OFFER)}
+
+    """
+    )
+    + SDP_OFFER
+)
+
+OK_RECORD_ROUTES = "".join(
+    line + "\r\n"
+    for line in [
+        "SIP/2.0 200 OK",
+        "Via: SIP/2.0/UDP proxy1.example.com;branch=z9hG4bK2d4790.1;received=192.0.2.3",
+        "Via: SIP/2.0/UDP pc33.atlanta.example.com;branch=z9hG4bK776asdhds;received=192.0.2.1",
+    ]
+    + [
+        f"Record-Route: <sip:proxy{i}.example.com:5060;transport=udp;lr;ftag=1928301774>"
+        for i in range(12)
+    ]
+    + [
+        "To: Bob <sip:bob@biloxi.example.com>;tag=a6c85cf",
+        "From: Alice <sip:alice@atlanta.example.com>;tag=1928301774",
+        "Call-ID: a84b4c76e66710@pc33.atlanta.example.com",
+        "CSeq: 314159 INVITE",
+        "Contact: <sip:bob@192.0.2.4>",
+        "Content-Length: 0",
+        "",
+    ]
+)
+
+UNAUTHORIZED_401 = prepare_msg(
+    """\
+    SIP/2.0 401 Unauthorized
+    Via: SIP/2.0/UDP bobspc.biloxi.example.com:5060;branch=z9hG4bKnashds7;received=192.0.2.4
+    To: Bob <sip:bob@biloxi.example.com>;tag=2493k59kd
+    From: Bob <sip:bob@biloxi.example.com>;tag=456248
+    Call-ID: 843817637684230@998sdasdh09
+    CSeq: 1826 REGISTER
+    WWW-Authenticate: Digest realm="atlanta.example.com", qop="auth", nonce="ea9c8e88df84f1cec4341ae6cbe5a359", opaque="", stale=FALSE, algorithm=MD5
+    Content-Length: 0
+
+    """
+)
+
+# RFC 4475 (SIP Torture Test Messages), the ones the parser is expected to handle
+
+# 3.1.1.1. A Short Tortuous INVITE
+TORTURE_WSINV = prepare_msg(
+    """\
+    INVITE sip:vivekg@chair-dnrc.example.com;unknownparam SIP/2.0
+    TO :
+     sip:vivekg@chair-dnrc.example.com ;   tag    = 1918181833n
+    from   : "J Rosenberg \\\\\\""         <sip:jdrosen@example.com>
+      ;
+      tag = 98asjd8
+    MaX-fOrWaRdS: 0068
+    Call-ID: wsinv.ndaksdj@192.0.2.1
+    Content-Length   : 150
+    cseq: 0009
+      INVITE
+    Via  : SIP  /   2.0
+     /UDP
+        192.0.2.2;branch=390skdjuw
+    s :
+    NewFangledHeader:   newfangled value
+     continued newfangled value
+    UnknownHeaderWithUnusualValue: ;;,,;;,;
+    Content-Type: application/sdp
+    Route:
+     <sip:services.example.com;lr;unknownwith=value;unknown-no-value>
+    v:  SIP  / 2.0  / TCP     spindle.example.com   ;
+      branch  =   z9hG4bK9ikj8  ,
+     SIP  /    2.0   / UDP  192.168.255.111   ; branch=
+     z9hG4bK30239
+    m:"Quoted string \\"\\"" <sip:jdrosen@example.com> ; newparam =
+          newvalue ;
+      secondparam ; q = 0.33
+
+    v=0
+    o=mhandley 29739 7272939 IN IP4 192.0.2.3
+    s=-
+    c=IN IP4 192.0.2.4
+    t=0 0
+    m=audio 49217 RTP/AVP 0 12
+    m=video 3227 RTP/AVP 31
+    a=rtpmap:31 LPC
+    """
+)
+
+# 3.1.1.4. Use of % When It Is Not an Escape
+TORTURE_ESC02 = prepare_msg(
+    """\
+    RE%47IST%45R sip:registrar.example.com SIP/2.0
+    To: "%Z%45" <sip:resource@example.com>
+    From: "%Z%45" <sip:resource@example.com>;tag=f232jadfj23
+    Call-ID: esc02.asdfnqwo34rq23i34jrjasdcnl23nrlknsdf
+    Via: SIP/2.0/TCP host.example.com;branch=z9hG4bK209%fzsnel234
+    CSeq: 29344 RE%47IST%45R
+    Max-Forwards: 70
+    Contact: <sip:alias1@host1.example.com>
+    C%6Fntact: <sip:alias2@host2.example.com>
+    Contact: <sip:alias3@host3.example.com>
+    l: 0
+
+    """
+)
+
+# 3.1.1.6. Message with No LWS between Display Name and <
+TORTURE_LWSDISP = prepare_msg(
+    """\
+    OPTIONS sip:user@example.com SIP/2.0
+    To: sip:user@example.com
+    From: caller<sip:caller@example.com>;tag=323
+    Max-Forwards: 70
+    Call-ID: lwsdisp.1234abcd@funky.example.com
+    CSeq: 60 OPTIONS
+    Via: SIP/2.0/UDP funky.example.com;branch=z9hG4bKkdjuw
+    l: 0
+
+    """
+)
+
+# 3.1.1.7. Long Values in Header Fields
+TORTURE_LONGREQ = prepare_msg(
+    """\
+    INVITE sip:user@example.com SIP/2.0
+    To: "I have a user name of {long_name} proportion"<sip:user@example.com:6000;unknownparam1=verylonguselessvalue{long_value};longparam{long_value}=shortvalue>
+    From: sip:amazinglylongcallername{long_value}@example.net;tag=12{long_value}982424;unknownheaderparam{long_value}=unknowheaderparamvalue{long_value}
+    Call-ID: longreq.onereallyreallyreallyreallyreallyreallyreallyreallyreallyreallyreallyreallyreallyreallylongcallid
+    CSeq: 3882340 INVITE
+    Max-Forwards: 70
+    Via: SIP/2.0/TCP sip33.example.com
+    v: SIP/2.0/TCP sip32.example.com
+    V: SIP/2.0/TCP sip31.example.com
+    Via: SIP/2.0/TCP sip30.example.com
+    ViA: SIP/2.0/TCP sip29.example.com
+    VIa: SIP/2.0/TCP sip28.example.com
+    VIA: SIP/2.0/TCP sip27.example.com
+    via: SIP/2.0/TCP sip26.example.com
+    viA: SIP/2.0/TCP sip25.example.com
+    vIa: SIP/2.0/TCP sip24.example.com
+    vIA: SIP/2.0/TCP sip23.example.com
+    Via: SIP/2.0/TCP 192.0.2.1;branch=z9hG4bK{long_value}
+    Contact: <sip:amazinglylongcallername{long_value}@host5.example.net>
+    Content-Type: application/sdp
+    l: 0
+
+    """
+).format(long_name=" ".join(["really"] * 40) + " large", long_value="longlonglong" * 10)
+
+SDP_WEBRTC = prepare_sdp(
+    """\
+    v=0
+    o=- 4611731400430051336 2 IN IP4 127.0.0.1
+    s=-
+    t=0 0
+    a=group:BUNDLE 0 1
+    a=msid-semantic: WMS stream
+    m=audio 9 UDP/TLS/RTP/SAVPF 111 63 9 0 8 13 110 126
+    c=IN IP4 0.0.0.0
+    a=rtcp:9 IN IP4 0.0.0.0
+    a=ice-ufrag:ZZ9f
+    a=ice-pwd:1m4L2k0C5o8p2S3b7x1QnS6a
+    a=ice-options:trickle
+    a=fingerprint:sha-256 19:E2:1C:3B:4B:9F:81:E6:B8:5C:F4:A5:A8:D8:73:04:BB:05:2F:70:9F:04:A9:0E:05:E9:26:33:E8:70:88:A2
+    a=setup:actpass
+    a=mid:0
+    a=extmap:1 urn:ietf:params:rtp-hdrext:ssrc-audio-level
+    a=extmap:2 http://www.webrtc.org/experiments/rtp-hdrext/abs-send-time
+    a=sendrecv
+    a=rtcp-mux
+    a=rtpmap:111 opus/48000/2
+    a=rtcp-fb:111 transport-cc
+    a=fmtp:111 minptime=10;useinbandfec=1
+    a=rtpmap:63 red/48000/2
+    a=fmtp:63 111/111
+    a=rtpmap:9 G722/8000
+    a=rtpmap:0 PCMU/8000
+    a=rtpmap:8 PCMA/8000
+    a=rtpmap:13 CN/8000
+    a=rtpmap:110 telephone-event/48000
+    a=rtpmap:126 telephone-event/8000
+    a=ssrc:3570614608 cname:4TOk42mSjXCkVIa6
+    a=candidate:1 1 udp 2122260223 192.168.1.10 54321 typ host generation 0
+    a=candidate:2 1 udp 1686052607 203.0.113.10 54321 typ srflx raddr 192.168.1.10 rport 54321 generation 0
+    a=candidate:3 1 tcp 1518280447 192.168.1.10 9 typ host tcptype active generation 0
+    m=video 9 UDP/TLS/RTP/SAVPF 96 97 98 99 100 101
+    c=IN IP4 0.0.0.0
+    a=rtcp:9 IN IP4 0.0.0.0
+    a=ice-ufrag:ZZ9f
+    a=ice-pwd:1m4L2k0C5o8p2S3b7x1QnS6a
+    a=mid:1
+    a=sendrecv
+    a=rtcp-mux
+    a=rtcp-rsize
+    a=rtpmap:96 VP8/90000
+    a=rtcp-fb:96 goog-remb
+    a=rtcp-fb:96 transport-cc
+    a=rtcp-fb:96 ccm fir
+    a=rtcp-fb:96 nack
+    a=rtcp-fb:96 nack pli
+    a=rtpmap:97 rtx/90000
+    a=fmtp:97 apt=96
+    a=rtpmap:98 VP9/90000
+    a=fmtp:98 profile-id=0
+    a=rtpmap:99 rtx/90000
+    a=fmtp:99 apt=98
+    a=rtpmap:100 H264/90000
+    a=fmtp:100 level-asymmetry-allowed=1;packetization-mode=1;profile-level-id=42001f
+    a=rtpmap:101 rtx/90000
+    a=fmtp:101 apt=100
+    a=ssrc-group:FID 2231627014 632943048
+    a=ssrc:2231627014 cname:4TOk42mSjXCkVIa6
+    a=ssrc:632943048 cname:4TOk42mSjXCkVIa6
+    """
+)
+
+SIP_CORPUS = {
+    "register_3gpp": REGISTER_3GPP,
+    "invite_sdp": INVITE_SDP,
+    "200_record_routes": OK_RECORD_ROUTES,
+    "401_challenge": UNAUTHORIZED_401,
+    "torture_wsinv": TORTURE_WSINV,
+    "torture_esc02": TORTURE_ESC02,
+    "torture_lwsdisp": TORTURE_LWSDISP,
+    "torture_longreq": TORTURE_LONGREQ,
+}
+
+SDP_CORPUS = {"sdp_offer": SDP_OFFER, "sdp_webrtc": SDP_WEBRTC}
@@ -0,0 +1,237 @@
+""" Benchmark harness for the SIP & SDP parsers.
+
+    Measures parse, stringify (to str and to bytes), round-trip (parse + stringify) and proxy hop
+    (lazy parse, update a couple of headers and serialize) of every message of the corpus (see
+    corpus.py), reporting throughput (msgs/sec), p50/p99 latency, memory blocks allocated (and still
+    alive) per resulting message and peak memory per operation.
+
+    Results are compared against a stored baseline (benchmarks/baseline.json by default), and the
+    run fails (exit code 1) if throughput drops or allocations grow beyond the given tolerances.
+    Cases missing from the baseline are reported as such. Throughput depends on the machine, so
+    refresh the baseline (--save-baseline) when switching. Saving merges the results of the cases
+    run (see --filter) into the existing baseline.
+
+    Run from the project root: `python benchmarks/run.py`
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from sip_parser.sip_message import SipMessage  # noqa: E402
+from sip_parser.sdp_message import SdpMessage  # noqa: E402
+from sip_parser.raw_ops import RawSipMessage  # noqa: E402
+from sip_parser.transaction_keys import extract_keys  # noqa: E402
+from corpus import SIP_CORPUS, SDP_CORPUS  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+PROXY_VIA = {
+    "version": "2.0",
+    "protocol": "UDP",
+    "host": "proxy.example.com",
+    "port": None,
+    "params": {"branch": "z9hG4bK4b43c2ff8.1"},
+}
+PROXY_VIA_STR = "SIP/2.0/UDP proxy.example.com;branch=z9hG4bK4b43c2ff8.1"
+
+
+def proxy_hop(raw: str) -> bytes:
+    """ What a proxy does to forward a message: parse, update a couple of headers and serialize """
+    message = SipMessage.from_string(raw, lazy=True)
+    if "max-forwards" in message.headers:
+        message.headers["max-forwards"] -= 1
+
+    if "via" in message.headers:
+        message.headers["via"].insert(0, PROXY_VIA)
+
+    return message.to_bytes()
+
+
+def raw_proxy_hop(raw: bytes) -> bytes:
+    """ Same as proxy_hop, with the raw fast-path operations """
+    message = RawSipMessage(raw)
+    message.decrement_max_forwards()
+    message.insert_via(PROXY_VIA_STR)
+    return message.to_bytes()
+
+
+def build_cases():
+    """ Returns a {case name: function to benchmark} dict """
+    cases = {}
+    for name, raw in SIP_CORPUS.items():
+        parsed = SipMessage.from_string(raw)
+        cases[f"parse/{name}"] = lambda raw=raw: SipMessage.from_string(raw)
+        cases[f"stringify/{name}"] = lambda parsed=parsed: parsed.stringify()
+        cases[f"to_bytes/{name}"] = lambda parsed=parsed: parsed.to_bytes()
+        cases[f"round_trip/{name}"] = lambda raw=raw: SipMessage.from_string(raw).stringify()
+        cases[f"proxy_hop/{name}"] = lambda raw=raw: proxy_hop(raw)
+        cases[f"raw_proxy_hop/{name}"] = lambda raw=raw.encode(): raw_proxy_hop(raw)
+        cases[f"extract_keys/{name}"] = lambda raw=raw.encode(): extract_keys(raw)
+
+    for name, raw in SDP_CORPUS.items():
+        cases[f"parse/{name}"] = lambda raw=raw: SdpMessage.from_string(raw)
+
+    return cases
+
+
+def measure(fn, iterations: int):
+    for _ in range(min(iterations, 100)):  # Warm up
+        fn()
+
+    # Throughput (best of several rounds, to filter out the noise of other processes)
+    rounds = 5
+    round_iterations = max(1, iterations // rounds)
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(round_iterations):
+            fn()
+        best = min(best, time.perf_counter() - start)
+    msgs_per_sec = round_iterations / best
+
+    # Latency distribution
+    timings = []
+    for _ in range(iterations):
+        op_start = time.perf_counter_ns()
+        fn()
+        timings.append(time.perf_counter_ns() - op_start)
+    timings.sort()
+
+    # Allocations: blocks still alive in the results, and peak memory of a single operation
+    samples = 50
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    results = [fn() for _ in range(samples)]
+    after = tracemalloc.take_snapshot()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    del results
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1] - current
+    tracemalloc.stop()
+
+    return {
+        "msgs_per_sec": round(msgs_per_sec, 1),
+        "p50_us": round(timings[len(timings) // 2] / 1000, 2),
+        "p99_us": round(timings[int(len(timings) * 0.99)] / 1000, 2),
+        "blocks_per_msg": round(blocks / samples, 1),
+        "peak_kib": round(peak / 1024, 2),
+    }
+
+
+def compare(results, baseline, tolerance: float, alloc_tolerance: float):
+    """ Returns the list of regressions found (as messages). Cases missing from the baseline
+        are skipped (see missing_from_baseline)
+    """
+    regressions = []
+    for case, result in results.items():
+        base = baseline.get(case)
+        if not base:
+            continue
+
+        if result["msgs_per_sec"] < base["msgs_per_sec"] * (1 - tolerance):
+            regressions.append(
+                f"{case}: throughput {result['msgs_per_sec']:.0f}/s "
+                f"< baseline {base['msgs_per_sec']:.0f}/s"
+            )
+
+        if result["blocks_per_msg"] > base["blocks_per_msg"] * (1 + alloc_tolerance) + 1:
+            regressions.append(
+                f"{case}: allocations {result['blocks_per_msg']} blocks/msg "
+                f"> baseline {base['blocks_per_msg']} blocks/msg"
+            )
+
+    return regressions
+
+
+def missing_from_baseline(results, baseline):
+    """ Cases that were run, but can't be compared for lack of a baseline """
+    return [case for case in results if not baseline.get(case)]
+
+
+def save_baseline(path: str, results):
+    """ Stores the results in the baseline file, keeping the cases that weren't run """
+    stored = {}
+    if os.path.exists(path):
+        with open(path) as baseline_file:
+            stored = json.load(baseline_file)["results"]
+
+    stored.update(results)
+    with open(path, "w") as baseline_file:
+        json.dump(
+            {"python": platform.python_version(), "machine": platform.machine(), "results": stored},
+            baseline_file,
+            indent=2,
+            sort_keys=True,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--filter", default="", help="Only run the cases containing this string")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Store results as baseline")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.3, help="Accepted throughput drop (fraction)"
+    )
+    parser.add_argument(
+        "--alloc-tolerance", type=float, default=0.1, help="Accepted allocations growth (fraction)"
+    )
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+
+    results = {}
+    print(
+        f"{'case':<32} {'msgs/sec':>10} {'p50 us':>8} {'p99 us':>8} "
+        f"{'blocks':>7} {'peak KiB':>9} {'vs base':>8}"
+    )
+    for case, fn in build_cases().items():
+        if args.filter not in case:
+            continue
+
+        result = results[case] = measure(fn, args.iterations)
+        base = baseline.get(case)
+        change = f"{result['msgs_per_sec'] / base['msgs_per_sec'] - 1:+.0%}" if base else "no base"
+        print(
+            f"{case:<32} {result['msgs_per_sec']:>10.0f} {result['p50_us']:>8.1f} "
+            f"{result['p99_us']:>8.1f} {result['blocks_per_msg']:>7.1f} "
+            f"{result['peak_kib']:>9.1f} {change:>8}"
+        )
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    missing = missing_from_baseline(results, baseline)
+    if missing:
+        print("\nNO BASELINE (add it with --save-baseline):")
+        for case in missing:
+            print(f"  {case}")
+
+    regressions = compare(results, baseline, args.tolerance, args.alloc_tolerance)
+    if regressions:
+        print("\nREGRESSIONS FOUND:")
+        for regression in regressions:
+            print(f"  {regression}")
+
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
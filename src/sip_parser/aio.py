@@ -0,0 +1,219 @@
+""" asyncio adapters to receive SIP messages over UDP and TCP/TLS, and to send them back """
+from typing import Awaitable, Callable, Optional, Tuple, Any
+from concurrent.futures import Executor
+
+import asyncio
+from sip_parser.sip_message import SipMessage
+from sip_parser.stream_parser import SipStreamParser
+from sip_parser.exceptions import SipParseError
+
+# Handlers receive every parsed message alongside the peer it came from (which can be used to reply)
+Handler = Callable[[SipMessage, Any], Awaitable[None]]
+
+
+class SipDatagramPeer:
+    """ Remote end of a UDP "connection" (so that handlers can reply to it) """
+
+    __slots__ = ("protocol", "address")
+
+    def __init__(self, protocol: "SipDatagramProtocol", address: Tuple):
+        self.protocol = protocol
+        self.address = address
+
+    def send(self, message: SipMessage):
+        self.protocol.send(message, self.address)
+
+
+class SipDatagramProtocol(asyncio.DatagramProtocol):
+    """ Receives SIP messages over UDP and hands them over to an async handler.
+
+        Received datagrams are queued (up to max_queue of them) and processed by `concurrency`
+        tasks. There's no way to pause the peers on UDP, so datagrams are dropped (and counted)
+        while the queue is full: SIP retransmissions take care of the rest.
+
+        If an executor is provided, messages are parsed in it instead of the event loop.
+        Messages that can't be parsed, or whose handler raises, are counted and skipped.
+    """
+
+    def __init__(
+        self,
+        handler: Handler,
+        max_queue: int = 1024,
+        concurrency: int = 1,
+        executor: Optional[Executor] = None,
+    ):
+        self.handler = handler
+        self.executor = executor
+        self.concurrency = concurrency
+        self.queue: asyncio.Queue = asyncio.Queue(max_queue)
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self.dropped = 0  # Datagrams dropped because the queue was full
+        self.parse_errors = 0
+        self.handler_errors = 0  # Exceptions raised by the handler (the message is dropped)
+        self._workers = []
+
+    def connection_made(self, transport):
+        self.transport = transport
+        loop = asyncio.get_event_loop()
+        self._workers = [loop.create_task(self.process()) for _ in range(self.concurrency)]
+
+    def connection_lost(self, exc):
+        for worker in self._workers:
+            worker.cancel()
+
+    def datagram_received(self, data: bytes, addr: Tuple):
+        if not data.strip():
+            return  # CRLF keepalive
+
+        try:
+            self.queue.put_nowait((data, addr))
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def send(self, message: SipMessage, addr: Tuple):
+        self.transport.sendto(message.to_bytes(), addr)
+
+    async def process(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            data, addr = await self.queue.get()
+            try:
+                if self.executor:
+                    message = await loop.run_in_executor(self.executor, SipMessage.from_bytes, data)
+                else:
+                    message = SipMessage.from_bytes(data)
+            except (SipParseError, RuntimeError, ValueError):
+                self.parse_errors += 1
+                continue
+
+            try:
+                await self.handler(message, SipDatagramPeer(self, addr))
+            except Exception:
+                self.handler_errors += 1
+
+
+class SipStreamProtocol(asyncio.Protocol):
+    """ Receives SIP messages over a TCP/TLS connection and hands them over to an async handler.
+
+        Messages are handled one at a time, in the order they were received. The queue of
+        pending messages is bounded: reading from the socket is paused once it holds max_queue
+        messages, and resumed once it has been drained down to half of that. Likewise, `drain()`
+        can be awaited after sending to respect the flow control of the transport.
+
+        If an executor is provided, messages are parsed in it instead of the event loop.
+        Messages that can't be parsed, or whose handler raises, are counted and skipped.
+    """
+
+    def __init__(
+        self,
+        handler: Handler,
+        max_queue: int = 64,
+        executor: Optional[Executor] = None,
+        max_header_size: int = SipStreamParser.DEFAULT_MAX_HEADER_SIZE,
+        max_body_size: int = SipStreamParser.DEFAULT_MAX_BODY_SIZE,
+    ):
+        self.handler = handler
+        self.executor = executor
+        self.max_queue = max_queue
+        self.parser = SipStreamParser(
+            max_header_size=max_header_size,
+            max_body_size=max_body_size,
+            on_keepalive=self.send_pong,
+        )
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.transport: Optional[asyncio.Transport] = None
+        self.reading_paused = False
+        self.parse_errors = 0
+        self.handler_errors = 0  # Exceptions raised by the handler (the message is dropped)
+        self._can_write = asyncio.Event()
+        self._can_write.set()
+        self._worker: Optional[asyncio.Task] = None
+
+    @property
+    def address(self) -> Optional[Tuple]:
+        return self.transport.get_extra_info("peername") if self.transport else None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self._worker = asyncio.get_event_loop().create_task(self.process())
+
+    def connection_lost(self, exc):
+        if self._worker:
+            self._worker.cancel()
+
+        self._can_write.set()  # Don't leave anyone stuck on drain()
+
+    def data_received(self, data: bytes):
+        try:
+            frames = self.parser.feed_frames(data)
+        except SipParseError:
+            # The stream can't be recovered after a framing error
+            self.transport.close()
+            return
+
+        for frame in frames:
+            self.queue.put_nowait(frame)
+
+        if not self.reading_paused and self.queue.qsize() >= self.max_queue:
+            self.reading_paused = True
+            self.transport.pause_reading()
+
+    def pause_writing(self):
+        self._can_write.clear()
+
+    def resume_writing(self):
+        self._can_write.set()
+
+    def send(self, message: SipMessage):
+        self.transport.write(message.to_bytes())
+
+    def send_pong(self):
+        self.transport.write(b"\r\n")
+
+    async def drain(self):
+        """ Waits until the transport's write buffer is below its high-water mark """
+        await self._can_write.wait()
+
+    async def process(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            frame = await self.queue.get()
+            if self.reading_paused and self.queue.qsize() <= self.max_queue // 2:
+                self.reading_paused = False
+                self.transport.resume_reading()
+
+            try:
+                if self.executor:
+                    message = await loop.run_in_executor(
+                        self.executor, SipMessage.from_bytes, frame
+                    )
+                else:
+                    message = SipMessage.from_bytes(frame)
+            except (SipParseError, RuntimeError, ValueError):
+                self.parse_errors += 1
+                continue
+
+            try:
+                await self.handler(message, self)
+            except Exception:
+                self.handler_errors += 1
+
+
+async def serve_udp(handler: Handler, host: str, port: int, **kwargs):
+    """ Listens for SIP messages over UDP. kwargs are passed to SipDatagramProtocol.
+        Returns the (transport, protocol) pair
+    """
+    loop = asyncio.get_event_loop()
+    return await loop.create_datagram_endpoint(
+        lambda: SipDatagramProtocol(handler, **kwargs), local_addr=(host, port)
+    )
+
+
+async def serve_tcp(handler: Handler, host: str, port: int, ssl=None, **kwargs):
+    """ Listens for SIP messages over TCP (or TLS, if an SSL context is provided).
+        kwargs are passed to SipStreamProtocol. Returns the asyncio server
+    """
+    loop = asyncio.get_event_loop()
+    return await loop.create_server(
+        lambda: SipStreamProtocol(handler, **kwargs), host, port, ssl=ssl
+    )
@@ -0,0 +1,99 @@
+""" Batch parsing of large amounts of messages, fanned out to a pool of processes """
+from typing import Any, Deque, Iterable, Iterator, List, Optional
+
+import collections
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+
+# Outcome of parsing one of the messages of the batch (index is its position in the input).
+# Either message or error is set
+BatchResult = collections.namedtuple("BatchResult", "index message error")
+
+
+def parse_one(cls, raw_message) -> Any:
+    """ Parses a raw message (str or bytes-like) with the given message class """
+    if isinstance(raw_message, (bytes, bytearray, memoryview)):
+        if hasattr(cls, "from_bytes"):
+            return cls.from_bytes(raw_message)
+
+        raw_message = bytes(raw_message).decode("utf-8")
+
+    return cls.from_string(raw_message)
+
+
+def parse_chunk(cls, start_index: int, raw_messages: List) -> List[BatchResult]:
+    """ Parses a chunk of messages, capturing the errors of each of them """
+    results = []
+    for index, raw_message in enumerate(raw_messages, start_index):
+        try:
+            results.append(BatchResult(index, parse_one(cls, raw_message), None))
+        except Exception as ex:  # Any malformed message must be reported, not stop the batch
+            results.append(BatchResult(index, None, ex))
+
+    return results
+
+
+def parse_many(
+    cls,
+    raw_messages: Iterable,
+    workers: Optional[int] = None,
+    chunksize: int = 256,
+    ordered: bool = True,
+) -> Iterator[BatchResult]:
+    """ Parses every raw message with the given message class (SipMessage/SdpMessage), and yields
+        a BatchResult for each of them.
+
+        Messages are sent in chunks to a pool of `workers` processes (as many as CPUs by default),
+        which send back the parsed messages of each chunk at once, so that the IPC cost is amortized.
+        Results are yielded in input order, unless ordered=False (then they're yielded as soon as
+        their chunk is done). The input is consumed progressively, so it can be larger than memory.
+    """
+
+    if chunksize < 1:
+        raise ValueError(f"chunksize must be at least 1 (got {chunksize})")
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    raw_messages = iter(raw_messages)
+    chunks = iter(lambda: list(itertools.islice(raw_messages, chunksize)), [])
+    return parse_chunks(cls, chunks, workers, ordered)
+
+
+def parse_chunks(cls, chunks: Iterator[List], workers: int, ordered: bool) -> Iterator[BatchResult]:
+    """ Yields the results of parse_many, chunk by chunk """
+    if workers <= 1:
+        start_index = 0
+        for chunk in chunks:
+            yield from parse_chunk(cls, start_index, chunk)
+            start_index += len(chunk)
+
+        return
+
+    max_pending = workers * 2  # Keep every worker busy without reading the whole input upfront
+    with ProcessPoolExecutor(workers) as executor:
+        pending: Deque[Future] = collections.deque()
+        start_index = 0
+        for chunk in chunks:
+            # memoryviews can't be pickled to be sent to the workers
+            chunk = [bytes(raw) if isinstance(raw, memoryview) else raw for raw in chunk]
+            pending.append(executor.submit(parse_chunk, cls, start_index, chunk))
+            start_index += len(chunk)
+
+            while len(pending) >= max_pending:
+                yield from next_done(pending, ordered)
+
+        while pending:
+            yield from next_done(pending, ordered)
+
+
+def next_done(pending: Deque[Future], ordered: bool) -> List[BatchResult]:
+    """ Waits for a pending chunk (the oldest one if ordered) and returns its results """
+    if ordered:
+        return pending.popleft().result()
+
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    future = next(iter(done))
+    pending.remove(future)
+    return future.result()
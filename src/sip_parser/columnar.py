@@ -0,0 +1,219 @@
+""" Columnar extraction of a few fields from lots of raw SIP messages (e.g for reporting).
+
+    Aggregations over huge traces (answer-seizure ratio, error rates per host...) only need a
+    handful of fields of every message. ColumnarBatch scans just those fields out of the raw
+    messages (no SipMessage is built), and appends them to columns: integer fields to flat arrays,
+    and string fields dictionary-encoded (an array of codes, plus the list of distinct values).
+    Columns can be handed over to NumPy (if installed) without copying them.
+"""
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import array
+import re
+from sip_parser.transaction_keys import KEY_HEADER_RE, KEY_HEADERS, CSEQ_RE, VIA_RE
+from sip_parser.exceptions import SipParseError
+
+# Value of the missing fields (e.g status of requests), in integer columns and codes
+MISSING = -1
+
+TYPE_REQUEST = 0
+TYPE_RESPONSE = 1
+
+START_LINE_RE = re.compile(
+    rb"\s*(?:SIP/\d+\.\d+\s+(\d+)|([\w\-.!%*_+`'~]+)\s+\S+\s+SIP\s*/\s*\d+\.\d+)[^\r\n]*"
+)
+HEADER_END_RE = re.compile(rb"\r\n\r\n")
+# User and host of the URI of a From/To value
+URI_RE = re.compile(rb"sips?:(?:([^@;>\s:]+)(?::[^@>\s]*)?@)?([^;>\s:?]+)", re.IGNORECASE)
+
+INT_FIELDS = ("type", "status", "cseq_seq")
+STR_FIELDS = (
+    "method",
+    "cseq_method",
+    "call_id",
+    "from_user",
+    "from_host",
+    "to_user",
+    "to_host",
+    "via_host",
+)
+FIELDS = INT_FIELDS + STR_FIELDS
+DEFAULT_FIELDS = ("type", "status", "method", "cseq_seq", "call_id", "from_user", "via_host")
+
+
+class DictionaryColumn:
+    """ Column of strings, stored as the codes of their position in values (MISSING for None) """
+
+    __slots__ = ("codes", "values", "index")
+
+    def __init__(self):
+        self.codes = array.array("i")
+        self.values: List[str] = []
+        self.index: Dict[bytes, int] = {}  # Keyed by the raw value, to only decode new values
+
+    def append(self, value: Optional[bytes]):
+        if value is None:
+            self.codes.append(MISSING)
+            return
+
+        code = self.index.get(value)
+        if code is None:
+            code = self.index[value] = len(self.values)
+            self.values.append(value.decode("utf-8", "replace"))
+
+        self.codes.append(code)
+
+    def __getitem__(self, row: int) -> Optional[str]:
+        code = self.codes[row]
+        return self.values[code] if code != MISSING else None
+
+    def __len__(self):
+        return len(self.codes)
+
+    def counts(self) -> Dict[Optional[str], int]:
+        """ Number of rows holding each value """
+        counts = [0] * (len(self.values) + 1)  # The last one counts the missing values
+        for code in self.codes:
+            counts[code] += 1
+
+        result: Dict[Optional[str], int] = dict(zip(self.values, counts))
+        if counts[-1]:
+            result[None] = counts[-1]
+
+        return result
+
+
+Column = Union[array.array, DictionaryColumn]
+
+
+class ColumnarBatch:
+    """ Columns of the chosen fields (see FIELDS) of every message appended, one row per message.
+
+        Integer fields (type, status, cseq_seq) are kept in array("q") columns, and the rest in
+        DictionaryColumns. Missing fields are MISSING (or None, once decoded). Invalid messages
+        raise SipParseError, or are just counted (in `invalid`) if skip_invalid is set.
+    """
+
+    def __init__(self, fields: Sequence[str] = DEFAULT_FIELDS, skip_invalid: bool = False):
+        unknown = set(fields) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+        self.fields = tuple(fields)
+        self.skip_invalid = skip_invalid
+        self.invalid = 0
+        self.columns: Dict[str, Column] = {
+            field: array.array("q") if field in INT_FIELDS else DictionaryColumn()
+            for field in self.fields
+        }
+        self._needs_headers = any(field not in ("type", "status", "method") for field in fields)
+
+    def append(self, raw_message: Union[bytes, bytearray, memoryview]):
+        try:
+            row = self.scan(raw_message)
+        except SipParseError:
+            if not self.skip_invalid:
+                raise
+
+            self.invalid += 1
+            return
+
+        for field, value in zip(self.fields, row):
+            self.columns[field].append(value)
+
+    def extend(self, raw_messages: Iterable[Union[bytes, bytearray, memoryview]]):
+        for raw_message in raw_messages:
+            self.append(raw_message)
+
+    def scan(self, raw_message: Union[bytes, bytearray, memoryview]) -> Tuple:
+        """ Values of the fields of a message, in order (raw bytes for the string fields) """
+        if not isinstance(raw_message, bytes):
+            raw_message = bytes(raw_message)  # Slices of bytearrays can't be dictionary keys
+
+        start_line = START_LINE_RE.match(raw_message)
+        if not start_line:
+            raise SipParseError("Invalid SIP message to parse, neither a response nor a request")
+
+        status, method = start_line.groups()
+        values = {
+            "type": TYPE_RESPONSE if status else TYPE_REQUEST,
+            "status": int(status) if status else MISSING,
+            "method": method,
+        }
+
+        if self._needs_headers:
+            header_end = HEADER_END_RE.search(raw_message, start_line.end())
+            if not header_end:
+                raise SipParseError(
+                    "Invalid SIP message format, couldn't find header/body division (header must be followed by 2 linebreaks)"
+                )
+
+            headers = [None, None, None, None, None]
+            missing = 5
+            for m in KEY_HEADER_RE.finditer(raw_message, start_line.end(), header_end.start()):
+                key = KEY_HEADERS[m.group(1).lower()]
+                if headers[key] is None:
+                    headers[key] = m.group(2)
+                    missing -= 1
+                    if not missing:
+                        break
+
+            self.scan_headers(headers, values)
+
+        return tuple(values.get(field) for field in self.fields)
+
+    @staticmethod
+    def scan_headers(headers: List[Optional[bytes]], values: Dict):
+        call_id, cseq, via, from_value, to_value = headers
+        values["call_id"] = call_id.rstrip() if call_id is not None else None
+        values["cseq_seq"] = MISSING
+        if cseq is not None:
+            cseq_match = CSEQ_RE.match(cseq)
+            if not cseq_match:
+                raise SipParseError("Could not parse CSeq header")
+
+            values["cseq_seq"] = int(cseq_match.group(1))
+            values["cseq_method"] = cseq_match.group(2)
+
+        if via is not None:
+            via_match = VIA_RE.match(via)
+            if not via_match:
+                raise SipParseError("Could not parse Via header")
+
+            values["via_host"] = via_match.group(1)
+
+        for prefix, value in (("from", from_value), ("to", to_value)):
+            uri_match = URI_RE.search(value) if value is not None else None
+            if uri_match:
+                values[prefix + "_user"], values[prefix + "_host"] = uri_match.groups()
+
+    def __len__(self):
+        return len(self.columns[self.fields[0]]) if self.fields else 0
+
+    def to_numpy(self) -> Dict[str, "numpy.ndarray"]:
+        """ NumPy arrays sharing the memory of the columns (the codes, for string fields: see
+            `values` of each DictionaryColumn). Requires NumPy, which is an optional dependency
+        """
+        try:
+            import numpy
+        except ImportError:
+            raise ImportError("NumPy is required to export the columns as NumPy arrays")
+
+        return {
+            field: numpy.frombuffer(
+                column.codes if isinstance(column, DictionaryColumn) else column,
+                dtype=numpy.int32 if isinstance(column, DictionaryColumn) else numpy.int64,
+            )
+            for field, column in self.columns.items()
+        }
+
+
+def extract_columns(
+    raw_messages: Iterable[Union[bytes, bytearray, memoryview]],
+    fields: Sequence[str] = DEFAULT_FIELDS,
+    skip_invalid: bool = False,
+) -> ColumnarBatch:
+    """ Scans the fields out of every message into a ColumnarBatch (see ColumnarBatch) """
+    batch = ColumnarBatch(fields, skip_invalid)
+    batch.extend(raw_messages)
+    return batch
@@ -0,0 +1,200 @@
+""" Call-ID affinity sharding of SIP messages across worker processes.
+
+    A single process (and its GIL) can only use one core. The dispatcher reads raw messages (from
+    sockets or handed over by the caller), scans each of them just for its dialog key (Call-ID by
+    default), and sends it to the worker process that key hashes to. Every message of a dialog
+    thus lands on the same worker, which can keep its dialog/transaction state without any locking.
+    Messages are only parsed (into SipMessage) in the workers.
+
+    Exceptions raised by the handler are counted, and don't stop the worker. Workers that die
+    anyway (e.g the handler exits) are started again by the dispatcher the next time it sends them
+    messages. The messages that were pending in the pipe of a dead worker are lost.
+"""
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+import multiprocessing
+import os
+import selectors
+import socket
+import zlib
+from sip_parser.sip_message import SipMessage
+from sip_parser.transaction_keys import extract_call_id
+from sip_parser.exceptions import SipParseError
+
+# Handlers receive every parsed message, alongside the address it came from
+WorkerHandler = Callable[[SipMessage, Any], None]
+
+
+def shard_for(key: bytes, workers: int) -> int:
+    """ Index of the worker in charge of a key (stable across processes, unlike hash()) """
+    return zlib.crc32(key) % workers
+
+
+def worker_main(conn, handler: WorkerHandler, handler_errors, index: int):
+    """ Main loop of the worker processes: parses and handles the batches of messages received
+        through conn, until None is received. Exceptions raised by the handler are counted in
+        handler_errors[index] (an array shared with the dispatcher)
+    """
+    while True:
+        batch = conn.recv()
+        if batch is None:
+            break
+
+        for data, addr in batch:
+            try:
+                message = SipMessage.from_bytes(data)
+            except (SipParseError, RuntimeError, ValueError):
+                continue
+
+            try:
+                handler(message, addr)
+            except Exception:
+                handler_errors[index] += 1
+
+    conn.close()
+
+
+class Dispatcher:
+    """ Hands raw messages over to a pool of worker processes, sharded by dialog key.
+
+        handler is called (in the worker processes, so it must be picklable) with every parsed
+        message and the address it came from. key_fn extracts the dialog key of a raw message
+        (Call-ID by default). Messages are sent to the workers over pipes in batches of up to
+        batch_size messages, so that the IPC cost is amortized: call flush() to send the pending
+        ones right away. Pipes are bounded, so a busy worker slows the dispatcher down
+        (backpressure) rather than piling up messages.
+        handler_errors counts the exceptions raised by the handler, and worker_restarts the
+        workers found dead (and started again)
+    """
+
+    def __init__(
+        self,
+        handler: WorkerHandler,
+        workers: Optional[int] = None,
+        key_fn: Callable[[bytes], bytes] = extract_call_id,
+        batch_size: int = 64,
+    ):
+        self.handler = handler
+        self.key_fn = key_fn
+        self.batch_size = batch_size
+        self.workers = workers or os.cpu_count() or 1
+        self.dispatched = 0
+        self.worker_restarts = 0
+        self._running = False
+
+        self._handler_errors = multiprocessing.Array("q", self.workers, lock=False)
+        self._conns: List[Any] = [None] * self.workers
+        self._processes: List[Any] = [None] * self.workers
+        self._batches: List[List[Tuple[bytes, Any]]] = [[] for _ in range(self.workers)]
+        for index in range(self.workers):
+            self.start_worker(index)
+
+    @property
+    def handler_errors(self) -> int:
+        return sum(self._handler_errors)
+
+    def start_worker(self, index: int):
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(
+            target=worker_main, args=(receiver, self.handler, self._handler_errors, index)
+        )
+        process.daemon = True
+        process.start()
+        receiver.close()
+        self._conns[index] = sender
+        self._processes[index] = process
+
+    def restart_worker(self, index: int):
+        """ Replaces a dead worker (the messages still in its pipe are lost) """
+        self._conns[index].close()
+        self._processes[index].join()
+        self.worker_restarts += 1
+        self.start_worker(index)
+
+    def send_batch(self, index: int, batch: List[Tuple[bytes, Any]]):
+        if not self._processes[index].is_alive():
+            self.restart_worker(index)
+
+        try:
+            self._conns[index].send(batch)
+        except (BrokenPipeError, ConnectionResetError):  # Died since it was checked
+            self.restart_worker(index)
+            self._conns[index].send(batch)
+
+    def dispatch(self, data: bytes, addr: Any = None) -> int:
+        """ Queues a raw message for its worker, and returns the index of that worker """
+        index = shard_for(self.key_fn(data), self.workers)
+        batch = self._batches[index]
+        batch.append((data, addr))
+        if len(batch) >= self.batch_size:
+            self._batches[index] = []
+            self.send_batch(index, batch)
+
+        self.dispatched += 1
+        return index
+
+    def flush(self):
+        """ Sends every pending batch to its worker """
+        for index, batch in enumerate(self._batches):
+            if batch:
+                self._batches[index] = []
+                self.send_batch(index, batch)
+
+    def serve(self, sockets: Iterable[socket.socket], flush_interval: float = 0.001):
+        """ Reads datagrams from the given (UDP) sockets and dispatches them until stop() is called.
+            Pending batches are flushed whenever no datagram arrives for flush_interval seconds
+        """
+        selector = selectors.DefaultSelector()
+        for sock in sockets:
+            sock.setblocking(False)
+            selector.register(sock, selectors.EVENT_READ)
+
+        self._running = True
+        try:
+            while self._running:
+                events = selector.select(flush_interval)
+                if not events:
+                    self.flush()
+                    continue
+
+                for key, _ in events:
+                    self.read_datagrams(key.fileobj)
+        finally:
+            selector.close()
+            self.flush()
+
+    def read_datagrams(self, sock: socket.socket):
+        """ Dispatches every datagram ready to be read from the socket """
+        while True:
+            try:
+                data, addr = sock.recvfrom(65535)
+            except (BlockingIOError, InterruptedError):
+                return
+
+            if data.strip():  # Skip CRLF keepalives
+                self.dispatch(data, addr)
+
+    def stop(self):
+        self._running = False
+
+    def close(self, timeout: Optional[float] = None):
+        """ Flushes the pending messages, and waits for the workers to handle them and exit """
+        self.stop()
+        self.flush()
+        for conn, process in zip(self._conns, self._processes):
+            if process.is_alive():
+                try:
+                    conn.send(None)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            conn.close()
+
+        for process in self._processes:
+            process.join(timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
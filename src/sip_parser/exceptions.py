@@ -8,3 +8,7 @@ class SipParseError(Exception):
 
 class SipBuildError(Exception):
     pass
+
+
+class ParseLimitError(SipParseError):
+    """ The message exceeds one of the limits of hardened parsing (see ParseLimits) """
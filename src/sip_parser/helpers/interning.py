@@ -0,0 +1,206 @@
+""" Interning of the strings that repeat across parsed messages.
+
+    Header names, methods, transports, param names... come from a small vocabulary, but every parsed
+    message would hold its own copy of them. intern_token maps them to a single (sys.intern'ed)
+    instance, which also makes dict lookups by them faster (equal strings that are the same object
+    are found without comparing their characters). Hosts and domains also repeat a lot within a
+    deployment, but aren't known in advance: they can be interned with an opt-in, bounded table.
+"""
+from typing import Dict, Optional
+
+import sys
+
+SIP_VOCABULARY = (
+    # Header names (as parsed: lowercase, uncompressed)
+    "accept",
+    "accept-encoding",
+    "accept-language",
+    "alert-info",
+    "allow",
+    "allow-events",
+    "authentication-info",
+    "authorization",
+    "call-id",
+    "call-info",
+    "contact",
+    "content-disposition",
+    "content-encoding",
+    "content-language",
+    "content-length",
+    "content-type",
+    "cseq",
+    "date",
+    "error-info",
+    "event",
+    "expires",
+    "from",
+    "in-reply-to",
+    "max-forwards",
+    "min-expires",
+    "mime-version",
+    "organization",
+    "p-asserted-identity",
+    "path",
+    "priority",
+    "privacy",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "proxy-require",
+    "rack",
+    "reason",
+    "record-route",
+    "refer-to",
+    "referred-by",
+    "reply-to",
+    "require",
+    "retry-after",
+    "route",
+    "rseq",
+    "server",
+    "session-expires",
+    "subject",
+    "subscription-state",
+    "supported",
+    "timestamp",
+    "to",
+    "unsupported",
+    "user-agent",
+    "via",
+    "warning",
+    "www-authenticate",
+    # Methods
+    "ACK",
+    "BYE",
+    "CANCEL",
+    "INFO",
+    "INVITE",
+    "MESSAGE",
+    "NOTIFY",
+    "OPTIONS",
+    "PRACK",
+    "PUBLISH",
+    "REFER",
+    "REGISTER",
+    "SUBSCRIBE",
+    "UPDATE",
+    # Versions, schemes and transports
+    "2.0",
+    "sip",
+    "sips",
+    "tel",
+    "UDP",
+    "TCP",
+    "TLS",
+    "SCTP",
+    "WS",
+    "WSS",
+    "udp",
+    "tcp",
+    "tls",
+    "sctp",
+    "ws",
+    "wss",
+    # Params (of Via, URIs, name-addrs and auth headers)
+    "branch",
+    "received",
+    "rport",
+    "maddr",
+    "ttl",
+    "tag",
+    "lr",
+    "transport",
+    "user",
+    "method",
+    "q",
+    "ob",
+    "gr",
+    "phone",
+    "Digest",
+    "username",
+    "realm",
+    "nonce",
+    "uri",
+    "response",
+    "algorithm",
+    "cnonce",
+    "opaque",
+    "qop",
+    "nc",
+    "stale",
+    "domain",
+    "auth",
+    "MD5",
+    # Reason phrases
+    "Trying",
+    "Ringing",
+    "Session Progress",
+    "OK",
+    "Accepted",
+    "Unauthorized",
+    "Forbidden",
+    "Not Found",
+    "Proxy Authentication Required",
+    "Request Timeout",
+    "Temporarily Unavailable",
+    "Call/Transaction Does Not Exist",
+    "Busy Here",
+    "Request Terminated",
+    "Server Internal Error",
+    "Service Unavailable",
+)
+
+VOCABULARY: Dict[str, str] = {token: sys.intern(token) for token in SIP_VOCABULARY}
+
+
+def intern_token(token: str) -> str:
+    """ Returns the shared instance of the token if it's part of the vocabulary (the token itself,
+        otherwise)
+    """
+    return VOCABULARY.get(token, token)
+
+
+class HostInternTable:
+    """ Shared instances of the hosts/domains seen, up to maxsize of them (once full, new hosts
+        are no longer added, so that a flood of random hosts can't grow it)
+    """
+
+    __slots__ = ("maxsize", "hosts")
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hosts: Dict[str, str] = {}
+
+    def intern(self, host: str) -> str:
+        interned = self.hosts.get(host)
+        if interned is None:
+            if len(self.hosts) >= self.maxsize:
+                return host
+
+            interned = self.hosts[host] = host
+
+        return interned
+
+    def __len__(self):
+        return len(self.hosts)
+
+
+# Table in use (None while disabled)
+host_table: Optional[HostInternTable] = None
+
+
+def intern_host(host: Optional[str]) -> Optional[str]:
+    if host is None or host_table is None:
+        return host
+
+    return host_table.intern(host)
+
+
+def enable_host_interning(maxsize: int = 4096):
+    """ Enables the interning of hosts (or resets the table, if it was already enabled) """
+    global host_table
+    host_table = HostInternTable(maxsize)
+
+
+def disable_host_interning():
+    global host_table
+    host_table = None
@@ -0,0 +1,81 @@
+""" Opt-in, size-bounded LRU caches of parsed header values.
+
+    Within a deployment, the same Route/Record-Route/Path/Contact values and URIs (our own proxies,
+    registrars...) show up in almost every message. Once enabled, these get parsed once and then
+    served from the cache. Cached values are never handed out: callers always get a copy of them,
+    so that modifying a parsed message can't corrupt the cache.
+"""
+from typing import Any, Dict, Hashable, Optional
+
+import collections
+
+# Longer raw values are not looked up nor cached (unlikely to repeat, and would bloat the cache)
+MAX_CACHED_VALUE_LENGTH = 512
+
+
+class LruCache:
+    """ Mapping of raw values to their parsed value, evicting the least recently used ones """
+
+    __slots__ = ("maxsize", "entries", "hits", "misses", "evictions")
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.entries: collections.OrderedDict = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Any:
+        """ Returns the cached value (None if there's none) """
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any):
+        self.entries[key] = value
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+# Caches in use (None while disabled): URIs, and (header name, raw value) of the route-like and
+# contact headers
+uri_cache: Optional[LruCache] = None
+header_cache: Optional[LruCache] = None
+
+
+def enable_parse_cache(maxsize: int = 1024):
+    """ Enables the caches (or resets them, if they were already enabled), each one holding up to
+        maxsize values
+    """
+    global uri_cache, header_cache
+    uri_cache = LruCache(maxsize)
+    header_cache = LruCache(maxsize)
+
+
+def disable_parse_cache():
+    global uri_cache, header_cache
+    uri_cache = None
+    header_cache = None
+
+
+def parse_cache_stats() -> Optional[Dict[str, Dict[str, int]]]:
+    """ Returns the hit/miss/eviction counters of each cache (None if they're disabled) """
+    if uri_cache is None or header_cache is None:
+        return None
+
+    return {"uri": uri_cache.stats(), "header": header_cache.stats()}
@@ -60,7 +60,7 @@ def parse_repeat(value):
 
 
 def parse_media_attributes(value):
-    subfields = value.split(":")
+    subfields = value.split(":", 1)
     if len(subfields) > 1:
         return (subfields[0], subfields[1])
 
@@ -81,4 +81,7 @@ parse_functions = {
     "e": lambda val: val,
     "p": lambda val: val,
     "c": lambda val: ConnectionDataField(*val.split(" ")),
+    "b": lambda val: val,
+    "z": lambda val: val,
+    "k": lambda val: val,
 }
@@ -2,6 +2,10 @@ from typing import List, Dict, Any, Callable, Tuple, Union, Optional
 
 import urllib.parse
 import re
+from sip_parser.sip_headers import SipUri, NameAddr, Via, CSeq, AuthCredentials
+from sip_parser.helpers import parse_cache
+from sip_parser.helpers.interning import intern_token, intern_host
+from sip_parser import parse_limits
 
 # Dict of headers that can be shortened to a single letter
 COMPACT_HEADERS = {
@@ -17,24 +21,91 @@ COMPACT_HEADERS = {
     "v": "via",
 }
 
+# Header names as they appear on the wire, mapped to how they're parsed (see header_name)
+HEADER_NAMES: Dict[str, str] = {}
+
+
+# Precompiled patterns. Scanners match them at a given position (pos=) instead of slicing the
+# data after every match, which keeps the cost linear in the length of the data.
+# Adjacent quantifiers never overlap (e.g whitespace around a URI in <>, stripped afterwards), so
+# that a failed match can't backtrack through every way of splitting the data between them
+PARAM_RE = re.compile(
+    r'\s*;\s*([\w\-.!%*_+`\'~]+)(?:\s*=\s*([\w\-.!%*_+`\'~]+|"[^"\\]*(\\.[^"\\]*)*"))?'
+)
+COMMA_RE = re.compile(r"\s*,\s*")
+WHITESPACE_RE = re.compile(r"\s*")
+VIA_RE = re.compile(r"SIP\s*\/\s*(\d+\.\d+)\s*\/\s*([\S]+)\s+([^\s;:]+)(?:\s*:\s*(\d+))?")
+AUTH_SCHEME_RE = re.compile(r"([^\s]*)\s+")
+AUTH_PARAM_RE = re.compile(r'([^\s,"=]*)\s*=\s*([^\s,"]+|"[^"\\]*(?:\\.[^"\\]*)*")\s*')
+CSEQ_RE = re.compile(r"(\d+)\s*([\S]+)")
+AOR_RE = re.compile(
+    r'((?:[\w\-.!%*_+`\'~]+)(?:\s+[\w\-.!%*_+`\'~]+)*|"[^"\\]*(?:\\.[^"\\]*)*")?\s*<([^>]*)>|((?:[^\s@"<]@)?[^\s;]+)'
+)
+URI_RE = re.compile(
+    r"^(sips?):(?:([^\s>:@]+)(?::([^\s@>]+))?@)?([\w\-\.]+)(?::(\d+))?((?:;[^\s=\?>;]+(?:=[^\s?\;]+)?)*)(?:\?(([^\s&=>]+=[^\s&=>]+)(&[^\s&=>]+=[^\s&=>]+)*))?$"
+)
+URI_PARAM_RE = re.compile(r"([^;=]+)(=([^;=]+))?")
+URI_HEADER_RE = re.compile(r"([^&=]+)=([^&=]+)")
+RESPONSE_RE = re.compile(r"^SIP\/(\d+\.\d+)\s+(\d+)\s*(.*)\s*$")
+REQUEST_RE = re.compile(r"^([\w\-.!%*_+`'~]+)\s([^\s]+)\sSIP\s*\/\s*(\d+\.\d+)")
+
+
+def header_name(raw_name: str) -> str:
+    """ Unquoted, lowercase and uncompressed (interned) header name. Memoized """
+    name = HEADER_NAMES.get(raw_name)
+    if name is None:
+        name = urllib.parse.unquote(raw_name).lower()
+        name = intern_token(COMPACT_HEADERS.get(name, name))
+        if len(HEADER_NAMES) < 4096:  # Don't let unusual header names grow it unbounded
+            HEADER_NAMES[raw_name] = name
+
+    return name
+
+
+def scan_params(data: str, pos: int = 0) -> Tuple[Dict[str, Optional[str]], int]:
+    """ Parse the parameters of the header (separated by semicolons) found at data[pos:].
+        Returns the parameters and the position where they end
+    """
+
+    params = {}
+    limits = parse_limits.active_limits
+    m = PARAM_RE.match(data, pos)
+    while m:
+        params[intern_token(m.group(1).lower())] = m.group(2)
+        if limits is not None:
+            limits.check_params(len(params))
+
+        pos = m.end()
+        m = PARAM_RE.match(data, pos)
+
+    return params, pos
+
 
 def parse_params(data):
     """ Parse the parameters of the header, separated by semicolons (;) """
 
-    params = {}
-    while True:
-        m = re.match(
-            r'\s*;\s*([\w\-.!%*_+`\'~]+)(?:\s*=\s*([\w\-.!%*_+`\'~]+|"[^"\\]*(\\.[^"\\]*)*"))?',
-            data,
-        )
-        if not m:  # We're done matching
-            break
-
-        params[m.group(1).lower()] = m.group(2)
-        data = data[m.end() :]
+    params, pos = scan_params(data)
 
     # Return the list of parameters AND the leftover data
-    return params, data
+    return params, data[pos:]
+
+
+def scan_multiheader(scan_fn: Callable, data: str, pos: int = 0) -> Tuple[List, int]:
+    """ Scan a header that can have multiple values in comma-separated times, starting at data[pos:].
+        The scanner with which to parse every value is the first arg
+    """
+    values = []
+    header, pos = scan_fn(data, pos)
+    values.append(header)
+
+    # Find a comma, and discard it, then parse the header... until no more commas exist
+    m = COMMA_RE.match(data, pos)
+    while m:
+        header, pos = scan_fn(data, m.end())
+        values.append(header)
+        m = COMMA_RE.match(data, pos)
+
+    return values, pos
 
 
 def parse_multiheader(parse_fn: Callable, data: str) -> Tuple[List, str]:
@@ -43,6 +114,10 @@ def parse_multiheader(parse_fn: Callable, data: str) -> Tuple[List, str]:
         These headers (e.g Contact) can also just appear multiple times in the message, but this function
         just parses a single line. The function with which to parse the header is the first arg
     """
+    if parse_fn in SCANNERS:
+        values, pos = scan_multiheader(SCANNERS[parse_fn], data)
+        return values, data[pos:]
+
     values = []
     header, data = parse_fn(data)
     values.append(header)
@@ -51,7 +126,7 @@ def parse_multiheader(parse_fn: Callable, data: str) -> Tuple[List, str]:
         # If there's leftover data, this is probably a multi header
         while True:
             # Find a comma at the start, and discard it, then parse the header
-            m = re.match(r"^\s*,\s*", data)
+            m = COMMA_RE.match(data)
             if not m:
                 break  # ... until no more commas exist
 
@@ -61,115 +136,155 @@ def parse_multiheader(parse_fn: Callable, data: str) -> Tuple[List, str]:
     return values, data
 
 
-def parse_via(data: str):
-    m = re.match(r"SIP\s*\/\s*(\d+\.\d+)\s*\/\s*([\S]+)\s+([^\s;:]+)(?:\s*:\s*(\d+))?", data)
+def scan_via(data: str, pos: int = 0):
+    m = VIA_RE.match(data, pos)
     if not m:
         raise RuntimeError("Could not parse Via header!")
 
-    params, data = parse_params(data[m.end() :])
-    val = {
-        "version": m.group(1),  # Can be None!
-        "protocol": m.group(2),
-        "host": m.group(3),
-        "port": int(m.group(4)) if m.group(4) else None,
-        "params": params,
-    }
+    params, pos = scan_params(data, m.end())
+    val = Via(
+        intern_token(m.group(1)),  # Can be None!
+        intern_token(m.group(2)),
+        intern_host(m.group(3)),
+        int(m.group(4)) if m.group(4) else None,
+        params,
+    )
 
-    return val, data
+    return val, pos
 
 
-def parse_auth_header_with_scheme(data: str):
-    """ Parse an auth header that begins with a scheme """
-    sch_match = re.match(r"([^\s]*)\s+", data)
+def parse_via(data: str):
+    val, pos = scan_via(data)
+    return val, data[pos:]
+
+
+def scan_auth_header_with_scheme(data: str, pos: int = 0):
+    """ Scan an auth header that begins with a scheme """
+    sch_match = AUTH_SCHEME_RE.match(data, pos)
     if not sch_match:
         raise RuntimeError("Could not extract scheme from authentication header")
 
-    val, data = parse_auth_header(data[sch_match.end() :])
-    val["scheme"] = sch_match.group(1)
+    val, pos = scan_auth_header(data, sch_match.end())
+    val.scheme = intern_token(sch_match.group(1))
 
-    return val, data
+    return val, pos
 
 
-def parse_auth_header(data: str):
-    """ Parse an auth header (without a prefix scheme) """
-    val = {}
+def parse_auth_header_with_scheme(data: str):
+    """ Parse an auth header that begins with a scheme """
+    val, pos = scan_auth_header_with_scheme(data)
+    return val, data[pos:]
+
+
+def scan_auth_header(data: str, pos: int = 0):
+    """ Scan an auth header (without a prefix scheme) """
+    params = {}
+    limits = parse_limits.active_limits
     while True:
-        m = re.match(r'([^\s,"=]*)\s*=\s*([^\s,"]+|"[^"\\]*(?:\\.[^"\\]*)*")\s*', data)
+        m = AUTH_PARAM_RE.match(data, pos)
         if not m:  # We're done processing
             break
 
         # Extract the rest of the information, one by one
-        val[m.group(1)] = m.group(2)
-        data = data[m.end() :]
+        params[intern_token(m.group(1))] = m.group(2)
+        if limits is not None:
+            limits.check_params(len(params))
+
+        pos = m.end()
 
         # There must be a comma now, or we're done
-        if not data or data[0] != ",":
+        if pos >= len(data) or data[pos] != ",":
             break
 
-        data = data[
-            1:
-        ].lstrip()  # Skip the comma and strip whitespace right after the comma and before the data
+        # Skip the comma and whitespace right after the comma and before the data
+        pos = WHITESPACE_RE.match(data, pos + 1).end()
+
+    return AuthCredentials(None, params), pos
+
 
-    return val, data
+def parse_auth_header(data: str):
+    """ Parse an auth header (without a prefix scheme) """
+    val, pos = scan_auth_header(data)
+    return val, data[pos:]
 
 
-def parse_cseq(data: str) -> Dict[str, Any]:
+def parse_cseq(data: str) -> CSeq:
     """ Parses a CSeq header value (<number> <method>)"""
-    m = re.match(r"(\d+)\s*([\S]+)", data)
+    m = CSEQ_RE.match(data)
     if not m:
         raise RuntimeError("Could not parse CSeq header")
 
-    return {"seq": int(m.group(1)), "method": urllib.parse.unquote(m.group(2))}
+    return CSeq(int(m.group(1)), intern_token(urllib.parse.unquote(m.group(2))))
 
 
-def parse_aor(data: str):
-    """ Parses an Address Of Record """
+def scan_aor(data: str, pos: int = 0):
+    """ Scans an Address Of Record """
 
-    aor_match = re.match(
-        r'((?:[\w\-.!%*_+`\'~]+)(?:\s+[\w\-.!%*_+`\'~]+)*|"[^"\\]*(?:\\.[^"\\]*)*")?\s*\<\s*([^>]*)\s*\>|((?:[^\s@"<]@)?[^\s;]+)',
-        data,
-    )
+    aor_match = AOR_RE.match(data, pos)
     if not aor_match:
-        raise RuntimeError('Invalid AOR found: "%s"' % data)
+        raise RuntimeError('Invalid AOR found: "%s"' % data[pos:])
 
     name = aor_match.group(1)
     uri = ""
     if aor_match.group(2):
-        uri = aor_match.group(2)
+        uri = aor_match.group(2).strip()
     elif aor_match.group(3):
         uri = aor_match.group(3)
 
-    params, data = parse_params(data[aor_match.end() :])
-    props = {"name": name, "uri": uri, "params": params}  # Can be None!
+    params, pos = scan_params(data, aor_match.end())
+    props = NameAddr(name, uri, params)  # Can be None!
+
+    # Return the extracted header and where it ends
+    return props, pos
+
+
+def parse_aor(data: str):
+    """ Parses an Address Of Record """
+
+    props, pos = scan_aor(data)
 
     # Return the extracted header and leftover data
-    return props, data
+    return props, data[pos:]
 
 
-def parse_uri(uri: str):
+def parse_uri(uri: str) -> SipUri:
     """ Breaks down a URI into its different components """
-    m = re.match(
-        r"^(sips?):(?:([^\s>:@]+)(?::([^\s@>]+))?@)?([\w\-\.]+)(?::(\d+))?((?:;[^\s=\?>;]+(?:=[^\s?\;]+)?)*)(?:\?(([^\s&=>]+=[^\s&=>]+)(&[^\s&=>]+=[^\s&=>]+)*))?$",
-        uri,
-    )
+    cache = parse_cache.uri_cache
+    if cache is not None and len(uri) <= parse_cache.MAX_CACHED_VALUE_LENGTH:
+        cached = cache.get(uri)
+        if cached is None:
+            cached = scan_uri(uri)
+            cache.put(uri, cached)
+
+        return cached.copy()
+
+    return scan_uri(uri)
+
+
+def scan_uri(uri: str) -> SipUri:
+    """ Actual parsing of parse_uri (bypassing the cache) """
+    m = URI_RE.match(uri)
     if not m:
         raise RuntimeError('Could not parse URI: "%s"' % uri)
 
+    limits = parse_limits.active_limits
+
     # Extract params
     params: Dict[str, Optional[str]] = {}
     if m.group(6):
-        for param_m in re.finditer(r"([^;=]+)(=([^;=]+))?", m.group(6)):
-            if m.group(2):
-                params[param_m.group(1)] = param_m.group(2)
-            else:
-                # The param has no specific value (e.g loose routing indicator, ;lr)
-                params[param_m.group(1)] = None
+        for param_m in URI_PARAM_RE.finditer(m.group(6)):
+            # The param may have no specific value (e.g loose routing indicator, ;lr)
+            params[intern_token(param_m.group(1))] = param_m.group(3)
+            if limits is not None:
+                limits.check_params(len(params))
 
     # Extract headers
     headers: Dict[str, str] = {}
     if m.group(7):
-        for header_m in re.finditer(r"([^&=]+)=([^&=]+)", m.group(7)):
+        for header_m in URI_HEADER_RE.finditer(m.group(7)):
             headers[header_m.group(1)] = header_m.group(2)
+            if limits is not None:
+                limits.check_params(len(headers))
 
     if m.group(5):
         try:
@@ -179,46 +294,62 @@ def parse_uri(uri: str):
     else:
         port = None
 
-    return {
-        "schema": m.group(1),
-        "user": m.group(2),
-        "password": m.group(3),
-        "host": m.group(4),
-        "port": port,
-        "params": params,
-        "headers": headers,
-    }
+    return SipUri(
+        intern_token(m.group(1)),
+        m.group(2),
+        m.group(3),
+        intern_host(m.group(4)),
+        port,
+        params,
+        headers,
+    )
 
 
-def parse_aor_with_uri(data: str) -> Tuple[Dict, str]:
-    """ Parses AOR and then parses the URI that we extracted """
-    props, data = parse_aor(data)
-    if not props["uri"]:
+def scan_aor_with_uri(data: str, pos: int = 0) -> Tuple[NameAddr, int]:
+    """ Scans AOR and then parses the URI that we extracted """
+    props, pos = scan_aor(data, pos)
+    if not props.uri:
         raise RuntimeError("There's no URI to parse when trying to parse AOR with URI")
 
-    props["uri"] = parse_uri(props["uri"])
-    return props, data
+    props.uri = parse_uri(props.uri)
+    return props, pos
+
+
+def parse_aor_with_uri(data: str) -> Tuple[NameAddr, str]:
+    """ Parses AOR and then parses the URI that we extracted """
+    props, pos = scan_aor_with_uri(data)
+    return props, data[pos:]
 
 
 def parse_response(lines: List[str]) -> Optional[Dict[str, Any]]:
-    res_match = re.match(r"^SIP\/(\d+\.\d+)\s+(\d+)\s*(.*)\s*$", lines[0])
+    res_match = RESPONSE_RE.match(lines[0])
     if not res_match:
         return None
 
     return {
-        "version": res_match.group(1),
+        "version": intern_token(res_match.group(1)),
         "status": int(res_match.group(2)),
-        "reason": res_match.group(3),
+        "reason": intern_token(res_match.group(3)),
     }
 
 
 def parse_request(lines: List[str]) -> Optional[Dict[str, Any]]:
-    req_match = re.match(r"^([\w\-.!%*_+`'~]+)\s([^\s]+)\sSIP\s*\/\s*(\d+\.\d+)", lines[0])
+    req_match = REQUEST_RE.match(lines[0])
     if not req_match:
         return None
 
     return {
-        "method": urllib.parse.unquote(req_match.group(1)),
+        "method": intern_token(urllib.parse.unquote(req_match.group(1))),
         "uri": req_match.group(2),
-        "version": req_match.group(3),
+        "version": intern_token(req_match.group(3)),
     }
+
+
+# Position-based scanners behind each of the parse functions that can be used on multi-headers
+SCANNERS = {
+    parse_aor: scan_aor,
+    parse_aor_with_uri: scan_aor_with_uri,
+    parse_via: scan_via,
+    parse_auth_header: scan_auth_header,
+    parse_auth_header_with_scheme: scan_auth_header_with_scheme,
+}
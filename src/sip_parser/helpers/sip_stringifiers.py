@@ -1,168 +1,331 @@
 from typing import List, Dict, Any, Union
 import re
 
+# The stringifiers write the fragments of the output into a list (joined once at the end), rather
+# than building intermediate strings for every header and parameter.
+# The stringify_* functions are the same thing, for a single value.
 
-def stringify_params(params: List):
-    params_str = ""
+
+def text(value: Any) -> str:
+    """ Values given by the user may be ints (e.g ports in params), and must be written as str """
+    return value if isinstance(value, str) else str(value)
+
+
+def write_params(out: List[str], params: Dict):
     for key, val in params.items():
-        params_str += f";{key}"
+        out.append(";")
+        out.append(text(key))
         if val:
-            params_str += f"={val}"
+            out.append("=")
+            out.append(text(val))
 
-    return params_str
 
+def stringify_params(params: Dict):
+    out: List[str] = []
+    write_params(out, params)
+    return "".join(out)
 
-def stringify_uri(uri: Union[str, Dict]):
+
+def write_uri(out: List[str], uri: Union[str, Dict]):
     if isinstance(uri, str):
-        return uri
+        out.append(uri)
+        return
+
+    out.append(text(uri.get("schema") or "sip"))
+    out.append(":")
+    user = uri.get("user")
+    if user:
+        out.append(text(user))
+        password = uri.get("password")
+        if password:
+            out.append(":")
+            out.append(text(password))
+
+        out.append("@")
 
-    uri_str = uri.get("schema", "sip") + ":"
-    if uri.get("user"):
-        if uri.get("password"):
-            uri_str += f'{uri["user"]}:{uri["password"]}@'
-        else:
-            uri_str += f'{uri["user"]}@'
+    out.append(text(uri.get("host")))
+    port = uri.get("port")
+    if port:
+        out.append(":")
+        out.append(str(port))
 
-    uri_str += uri.get("host")
-    if uri.get("port"):
-        uri_str += f':{uri["port"]}'
+    params = uri.get("params")
+    if params:
+        write_params(out, params)
 
-    if uri.get("params"):
-        uri_str += stringify_params(uri["params"])
+    headers = uri.get("headers")
+    if headers:
+        out.append("?")
+        out.append("&".join([text(key) + "=" + text(value) for key, value in headers.items()]))
 
-    if uri.get("headers"):
-        uri_headers = [key + "=" + str(value) for key, value in uri["headers"].items()]
-        if uri_headers:
-            uri_str += "?" + "&".join(uri_headers)
 
-    return uri_str
+def stringify_uri(uri: Union[str, Dict]):
+    out: List[str] = []
+    write_uri(out, uri)
+    return "".join(out)
 
 
 def stringify_version(version: Any):
-    return str(version) or "2.0"
+    return str(version) if version else "2.0"
 
 
-def stringify_aor(aor: Union[Dict, str]):
+def write_aor(out: List[str], aor: Union[Dict, str]):
     if isinstance(aor, str):
-        return aor
+        out.append(aor)
+        return
+
+    # Preferred format as section 7.3.1 of RFC 3261 indicates
+    name = text(aor.get("name") or "").lstrip()
+    if name:
+        out.append(name)
+        out.append(" <")
+    else:
+        out.append("<")
+
+    write_uri(out, aor["uri"])
+    out.append(">")
+    params = aor.get("params")
+    if params:
+        write_params(out, params)
+
+
+def stringify_aor(aor: Union[Dict, str]):
+    out: List[str] = []
+    write_aor(out, aor)
+    return "".join(out)
 
-    aor_str = f'{aor.get("name") or ""} <{stringify_uri(aor["uri"])}>{stringify_params(aor.get("params", {}))}'
-    return aor_str.strip()  # Preferred format as section 7.3.1 of RFC 3261 indicates
 
+def write_aor_list(out: List[str], name: str, data: List[Union[Dict, str]]):
+    out.append(name)
+    out.append(": ")
+    for index, aor in enumerate(data):
+        if index:
+            out.append(", ")
+
+        write_aor(out, aor)
+
+
+def write_via(out: List[str], all_via: List):
+    for index, data in enumerate(all_via):
+        if index:
+            out.append("\r\n")
+
+        if isinstance(data, str):
+            out.append("Via: ")
+            out.append(data)
+            continue
 
-def stringify_via(all_via: List):
-    header_strs = []
-    for data in all_via:
         if not data.get("host"):
             raise RuntimeError("No host found when stringifiying Via header")
 
-        host_ref = data["host"]
+        out.append("Via: SIP/")
+        out.append(stringify_version(data["version"]))
+        out.append("/")
+        out.append(data["protocol"].upper())
+        out.append(" ")
+        out.append(text(data["host"]))
         if data.get("port"):
-            host_ref += f":{data['port']}"
+            out.append(":")
+            out.append(str(data["port"]))
+
+        write_params(out, data["params"])
+
+
+def write_to(out: List[str], data: Dict):
+    out.append("To: ")
+    write_aor(out, data)
+
+
+def write_from(out: List[str], data: Dict):
+    out.append("From: ")
+    write_aor(out, data)
+
+
+def write_contact(out: List[str], data: List[Dict]):
+    if data == "*" or not data:
+        out.append("Contact: *")
+        return
+
+    write_aor_list(out, "Contact", data)
 
-        header_strs.append(
-            f'Via: SIP/{stringify_version(data["version"])}/{data["protocol"].upper()} {host_ref}{stringify_params(data["params"])}'
+
+def write_route(out: List[str], data: List[Dict]):
+    write_aor_list(out, "Route", data)
+
+
+def write_record_route(out: List[str], data: List[Dict]):
+    write_aor_list(out, "Record-Route", data)
+
+
+def write_path(out: List[str], data: List[Dict]):
+    write_aor_list(out, "Path", data)
+
+
+def write_cseq(out: List[str], data: Dict[str, Any]):
+    out.append("CSeq: ")
+    out.append(str(data["seq"]))
+    out.append(" ")
+    out.append(text(data["method"]))
+
+
+def write_auth_header_one(out: List[str], name: str, data: Dict):
+    out.append(name)
+    out.append(": ")
+    if isinstance(data, str):
+        out.append(data)
+        return
+
+    if data.get("scheme"):
+        out.append(text(data["scheme"]))
+        out.append(" ")
+
+    out.append(
+        ",".join(
+            [
+                text(param) + "=" + text(data[param])
+                for param in data
+                if param != "scheme" and data[param]
+            ]
         )
+    )
 
-    return "\r\n".join(header_strs)
 
+def write_auth_header_many(out: List[str], name: str, data_many: List[Dict]):
+    # These can't be combined into a single comma-separated header: one line per value
+    for index, data_one in enumerate(data_many):
+        if index:
+            out.append("\r\n")
 
-def stringify_to(data: Dict):
-    return f"To: {stringify_aor(data)}"
+        write_auth_header_one(out, name, data_one)
 
 
-def stringify_from(data: Dict):
-    return f"From: {stringify_aor(data)}"
+def write_refer_to(out: List[str], data: Dict):
+    out.append("Refer-To: ")
+    write_aor(out, data)
 
 
-def stringify_contact(data: List[Dict]):
-    if data == "*" or not data:
-        return f"Contact: *"
+def joined(write, *args) -> str:
+    """ Output of a write_* function, as a single string """
+    out: List[str] = []
+    write(out, *args)
+    return "".join(out)
 
-    contacts = ", ".join([stringify_aor(aor) for aor in data])
-    return f"Contact: {contacts}"
 
+def stringify_via(all_via: List) -> str:
+    return joined(write_via, all_via)
 
-def stringify_route(data: List[Dict]):
-    routes = ", ".join([stringify_aor(aor) for aor in data])
-    return f"Route: {routes}"
 
+def stringify_to(data: Dict) -> str:
+    return joined(write_to, data)
 
-def stringify_record_route(data: List[Dict]):
-    record_routes = ", ".join([stringify_aor(aor) for aor in data])
-    return f"Record-Route: {record_routes}"
 
+def stringify_from(data: Dict) -> str:
+    return joined(write_from, data)
 
-def stringify_path(data: List[Dict]):
-    paths = ", ".join([stringify_aor(aor) for aor in data])
-    return f"Path: {paths}"
 
+def stringify_contact(data: List[Dict]) -> str:
+    return joined(write_contact, data)
 
-def stringify_cseq(data: Dict[str, Any]):
-    return f'CSeq: {data["seq"]} {data["method"]}'
 
+def stringify_route(data: List[Dict]) -> str:
+    return joined(write_route, data)
 
-def stringify_auth_header_one(name: str, data: Dict):
-    params = []
 
-    for param in data:
-        if param != "scheme" and data[param]:
-            params.append(param + "=" + str(data[param]))
+def stringify_record_route(data: List[Dict]) -> str:
+    return joined(write_record_route, data)
 
-    params_str = ",".join(params)
-    if data.get("scheme"):
-        return f'{name}: {data["scheme"]} {params_str}'
 
-    return f"{name}: {params_str}"
+def stringify_path(data: List[Dict]) -> str:
+    return joined(write_path, data)
+
 
+def stringify_cseq(data: Dict[str, Any]) -> str:
+    return joined(write_cseq, data)
 
-def stringify_auth_header_many(name: str, data_many: List[Dict]):
-    stringified_headers = []
-    for data_one in data_many:
-        stringified_headers.append(stringify_auth_header_one(name, data_one))
 
-    return "".join(stringified_headers)
+def stringify_auth_header_one(name: str, data: Dict) -> str:
+    return joined(write_auth_header_one, name, data)
 
 
-def stringify_refer_to(data: Dict):
-    return f"Refer-To: {stringify_aor(data)}"
+def stringify_auth_header_many(name: str, data_many: List[Dict]) -> str:
+    return joined(write_auth_header_many, name, data_many)
+
+
+def stringify_refer_to(data: Dict) -> str:
+    return joined(write_refer_to, data)
+
+
+PRETTIFY_HEADER_NAME_RE = re.compile(r"\b([a-z])")
+
+# Wire format of the header names, filled as they're found (see wire_header_name)
+WIRE_HEADER_NAMES = {"call-id": "Call-ID", "cseq": "CSeq", "www-authenticate": "WWW-Authenticate"}
 
 
 def prettify_header_name(header_name: str):
     if header_name == "call-id":
         return "Call-ID"
 
-    return re.sub(r"\b([a-z])", lambda m: m.group(0).upper(), header_name)
+    return PRETTIFY_HEADER_NAME_RE.sub(lambda m: m.group(0).upper(), header_name)
 
 
-def stringify_header(header_name, header_data):
-    # First, see if we can transform the header in a simple way, or we
-    # don't know what to do with it (has no stringifier)
-    if isinstance(header_data, (str, int)) or header_name not in HEADER_STRINGIFIER_FN.keys():
+def wire_header_name(header_name: str):
+    """ Same as prettify_header_name, but memoized """
+    wire_name = WIRE_HEADER_NAMES.get(header_name)
+    if wire_name is None:
+        wire_name = prettify_header_name(header_name)
+        if len(WIRE_HEADER_NAMES) < 4096:  # Don't let unusual header names grow it unbounded
+            WIRE_HEADER_NAMES[header_name] = wire_name
+
+    return wire_name
+
+
+def write_header(out: List[str], header_name: str, header_data: Any):
+    """ Writes a header (without the trailing line break) """
+    fn = HEADER_WRITER_FN.get(header_name)
+
+    # See if we can transform the header in a simple way, or we
+    # don't know what to do with it (has no writer)
+    if fn is None or isinstance(header_data, (str, int)):
         if isinstance(header_data, (tuple, list)):
             header_data = header_data[0]
 
-        return f"{prettify_header_name(header_name)}: {header_data}"
+        out.append(wire_header_name(header_name))
+        out.append(": ")
+        out.append(header_data if isinstance(header_data, str) else str(header_data))
+        return
 
-    # Else, call the stringifier function
-    fn = HEADER_STRINGIFIER_FN[header_name]
-    return fn(header_data)
+    fn(out, header_data)
 
 
-# Association of header names to stringifier functions
+def stringify_header(header_name, header_data):
+    out: List[str] = []
+    write_header(out, header_name, header_data)
+    return "".join(out)
+
+
+# Association of header names to writer functions
+HEADER_WRITER_FN = {
+    "via": write_via,
+    "to": write_to,
+    "from": write_from,
+    "contact": write_contact,
+    "route": write_route,
+    "record-route": write_record_route,
+    "path": write_path,
+    "cseq": write_cseq,
+    "www-authenticate": lambda out, data: write_auth_header_many(out, "WWW-Authenticate", data),
+    "proxy-authenticate": lambda out, data: write_auth_header_many(out, "Proxy-Authenticate", data),
+    "authorization": lambda out, data: write_auth_header_many(out, "Authorization", data),
+    "proxy-authorization": lambda out, data: write_auth_header_many(
+        out, "Proxy-Authorization", data
+    ),
+    "authentication-info": lambda out, data: write_auth_header_one(
+        out, "Authentication-Info", data
+    ),
+    "refer-to": write_refer_to,
+}
+
+# Association of header names to stringifier functions (returning the header as a string)
 HEADER_STRINGIFIER_FN = {
-    "via": stringify_via,
-    "to": stringify_to,
-    "from": stringify_from,
-    "contact": stringify_contact,
-    "route": stringify_route,
-    "record-route": stringify_record_route,
-    "path": stringify_path,
-    "cseq": stringify_cseq,
-    "www-authenticate": lambda data: stringify_auth_header_many("WWW-Authenticate", data),
-    "proxy-authenticate": lambda data: stringify_auth_header_many("Proxy-Authenticate", data),
-    "authorization": lambda data: stringify_auth_header_many("Authorization", data),
-    "proxy-authorization": lambda data: stringify_auth_header_many("Proxy-Authorization", data),
-    "authentication-info": stringify_auth_header_one,
-    "refer-to": stringify_refer_to,
+    name: (lambda data, name=name: stringify_header(name, data)) for name in HEADER_WRITER_FN
 }
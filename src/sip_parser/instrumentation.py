@@ -0,0 +1,157 @@
+""" Opt-in profiling of the parsers: where the parse time goes, per phase and per header.
+
+    Once enabled (enable_profiling), SipMessage.from_string/from_bytes, the parsing of every header
+    and SdpMessage.from_string report their timings to the profiler. It aggregates them (count,
+    total and max time per phase and per header name, message sizes), and keeps the slowest
+    messages seen, so that they can be saved as regression inputs. The aggregates can be exported
+    as a snapshot dict or in the Prometheus text format, and a callback can get every message.
+    While disabled (the default), the parsers only check that the profiler is None.
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import collections
+import heapq
+
+# Parsed message, reported to the callback of the profiler (kind is "sip" or "sdp")
+ParseSample = collections.namedtuple("ParseSample", "kind seconds size")
+# One of the slowest messages seen
+SlowMessage = collections.namedtuple("SlowMessage", "seconds kind raw_message")
+
+ProfileCallback = Callable[[ParseSample], None]
+
+
+class Timing:
+    """ Aggregated timings of a phase or header """
+
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def as_dict(self) -> Dict[str, Union[int, float]]:
+        return {"count": self.count, "total": self.total, "max": self.max}
+
+
+class ParseProfiler:
+    """ Aggregates the timings reported by the parsers (see the module docstring).
+
+        Phases are named after the parser ("sip.split", "sip.start_line", "sip.headers", "sdp",
+        ...), and headers by their (parsed) name. keep_slowest is how many of the slowest
+        messages are kept, and callback (optional) is called with a ParseSample for every message
+    """
+
+    def __init__(self, keep_slowest: int = 10, callback: Optional[ProfileCallback] = None):
+        self.keep_slowest = keep_slowest
+        self.callback = callback
+        self.reset()
+
+    def reset(self):
+        """ Drops everything recorded so far """
+        self.phases: Dict[str, Timing] = collections.defaultdict(Timing)
+        self.headers: Dict[str, Timing] = collections.defaultdict(Timing)
+        self.messages: Dict[str, Timing] = collections.defaultdict(Timing)
+        self.message_bytes: Dict[str, int] = collections.defaultdict(int)
+        self._slowest: List[Tuple[float, int, str, Any]] = []  # Min-heap
+        self._seq = 0
+
+    def add_phase(self, phase: str, seconds: float):
+        self.phases[phase].add(seconds)
+
+    def add_header(self, name: str, seconds: float):
+        self.headers[name].add(seconds)
+
+    def add_message(self, kind: str, raw_message: Any, seconds: float):
+        """ Records a whole parsed message (raw_message is str or bytes-like) """
+        size = len(raw_message)
+        self.messages[kind].add(seconds)
+        self.message_bytes[kind] += size
+
+        slowest = self._slowest
+        if self.keep_slowest and (len(slowest) < self.keep_slowest or seconds > slowest[0][0]):
+            if not isinstance(raw_message, (str, bytes)):
+                raw_message = bytes(raw_message)  # Don't keep the caller's buffer alive
+
+            self._seq += 1
+            entry = (seconds, self._seq, kind, raw_message)
+            if len(slowest) < self.keep_slowest:
+                heapq.heappush(slowest, entry)
+            else:
+                heapq.heapreplace(slowest, entry)
+
+        if self.callback is not None:
+            self.callback(ParseSample(kind, seconds, size))
+
+    def slowest(self) -> List[SlowMessage]:
+        """ Slowest messages seen, the slowest first """
+        return [
+            SlowMessage(seconds, kind, raw_message)
+            for seconds, _, kind, raw_message in sorted(self._slowest, reverse=True)
+        ]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """ Aggregates so far, as plain dicts (times in seconds) """
+        return {
+            "messages": {
+                kind: dict(timing.as_dict(), bytes=self.message_bytes[kind])
+                for kind, timing in self.messages.items()
+            },
+            "phases": {phase: timing.as_dict() for phase, timing in self.phases.items()},
+            "headers": {name: timing.as_dict() for name, timing in self.headers.items()},
+        }
+
+    def prometheus(self, prefix: str = "sip_parser") -> str:
+        """ Aggregates so far, in the Prometheus text exposition format """
+        lines: List[str] = []
+        groups = (
+            ("message", "kind", self.messages),
+            ("phase", "phase", self.phases),
+            ("header", "header", self.headers),
+        )
+        for group, label, timings in groups:
+            for suffix, metric_type, attr in (
+                ("seconds_total", "counter", "total"),
+                ("seconds_max", "gauge", "max"),
+                ("count", "counter", "count"),
+            ):
+                metric = f"{prefix}_{group}_{suffix}"
+                lines.append(f"# TYPE {metric} {metric_type}")
+                for name, timing in timings.items():
+                    value = getattr(timing, attr)
+                    lines.append(f'{metric}{{{label}="{escape_label(name)}"}} {value}')
+
+        metric = f"{prefix}_message_bytes_total"
+        lines.append(f"# TYPE {metric} counter")
+        for kind, size in self.message_bytes.items():
+            lines.append(f'{metric}{{kind="{escape_label(kind)}"}} {size}')
+
+        return "\n".join(lines) + "\n"
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Profiler in use (None while disabled)
+profiler: Optional[ParseProfiler] = None
+
+
+def enable_profiling(
+    keep_slowest: int = 10, callback: Optional[ProfileCallback] = None
+) -> ParseProfiler:
+    """ Enables the profiling of the parsers (with a new profiler), and returns the profiler """
+    global profiler
+    profiler = ParseProfiler(keep_slowest, callback)
+    return profiler
+
+
+def disable_profiling():
+    global profiler
+    profiler = None
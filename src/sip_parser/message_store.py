@@ -0,0 +1,276 @@
+""" Compact store of lots of raw SIP messages (e.g whole captures, for analytics).
+
+    Keeping millions of parsed SipMessages (and their header dicts) in memory takes kilobytes per
+    message. SipMessageStore keeps the raw messages back to back in a single buffer instead, plus
+    the offsets of every message and header line in flat arrays: a few bytes per header on top of
+    the message itself. Messages are only parsed (lazily) when they're accessed.
+
+    The buffer can live in a file, read through mmap, so that the OS pages it in and out as needed.
+    The offsets are then saved next to it (in <path>.idx) by flush(), and loaded back when the
+    store is opened again.
+"""
+from typing import BinaryIO, Dict, Iterator, List, Optional, Union
+
+import array
+import json
+import mmap
+import os
+import re
+import struct
+from sip_parser.sip_message import SipMessage, parse_header_values
+from sip_parser.helpers.sip_parsers import header_name
+from sip_parser.exceptions import SipParseError
+
+LEADING_WHITESPACE_RE = re.compile(rb"\s*")
+HEADER_END_RE = re.compile(rb"\r\n\r\n")
+# End of a header line (line breaks followed by whitespace are folding, not the end of the line)
+LINE_END_RE = re.compile(rb"\r\n(?![ \t])")
+VALUE_START_RE = re.compile(rb":[ \t]*")
+
+# Index files: magic, number of messages, number of headers and size of the header names table
+# (a JSON list, since decoded header names may hold any character)
+INDEX_MAGIC = b"SIPSTOR2"
+INDEX_HEADER = struct.Struct("<8sQQQ")
+MAX_HEADER_NAMES = 65535  # Header names are stored as "H" ids
+
+
+class SipMessageStore:
+    """ Append-only store of raw SIP messages, with random access by index.
+
+        Each message takes its own size, plus 20 bytes and 10 bytes per header line of offsets.
+        store[i] parses a message lazily (see LazyHeaders), and store.header_value(i, name) gets a
+        single header straight from the raw message, without building a SipMessage at all.
+        If path is given, the messages are kept in that file (see flush).
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        # Offsets of the messages within the buffer (message i is [offsets[i], offsets[i + 1]))
+        self.message_offsets = array.array("Q", [0])
+        # Offsets of the bodies and header values, relative to the start of their message
+        self.body_offsets = array.array("I")
+        self.value_starts = array.array("I")
+        self.value_ends = array.array("I")
+        # Headers of message i are [header_offsets[i], header_offsets[i + 1]) of the header arrays
+        self.header_offsets = array.array("Q", [0])
+        self.name_ids = array.array("H")
+        self.names: List[str] = []
+        self._name_ids: Dict[str, int] = {}
+
+        self.path = path
+        self._file: Optional[BinaryIO] = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._buffer = bytearray()
+        if path is not None:
+            self._file = open(path, "a+b")
+            try:
+                if os.path.exists(self.index_path):
+                    self.load_index()
+
+                size = os.path.getsize(path)
+                if size != self.message_offsets[-1]:
+                    raise SipParseError(
+                        f"Index of {path} doesn't match its data ({size} bytes, "
+                        f"{self.message_offsets[-1]} indexed)"
+                    )
+            except Exception:
+                self._file.close()
+                self._file = None
+                raise
+
+    @property
+    def index_path(self) -> str:
+        return f"{self.path}.idx"
+
+    def append(self, raw_message: Union[bytes, bytearray, memoryview]) -> int:
+        """ Adds a raw message (leading whitespace is dropped), and returns its index """
+        data = memoryview(raw_message).cast("B")
+        data = data[LEADING_WHITESPACE_RE.match(data).end() :]
+        header_end = HEADER_END_RE.search(data)
+        if not header_end:
+            raise SipParseError(
+                "Invalid SIP message format, couldn't find header/body division (header must be followed by 2 linebreaks)"
+            )
+
+        # Locate the header lines first, so that nothing is stored for invalid messages
+        headers = []
+        end = header_end.start()
+        line_end = LINE_END_RE.search(data, 0, end)
+        while line_end:
+            line_start = line_end.end()
+            line_end = LINE_END_RE.search(data, line_start, end)
+            value_end = line_end.start() if line_end else end
+            colon = VALUE_START_RE.search(data, line_start, value_end)
+            if not colon:
+                raise SipParseError(
+                    "Invalid SIP header detected. Parsing line: %s"
+                    % bytes(data[line_start:value_end])
+                )
+
+            raw_name = str(data[line_start : colon.start()], "utf-8").rstrip()
+            headers.append((self.name_id(header_name(raw_name)), colon.end(), value_end))
+
+        for name_id, value_start, value_end in headers:
+            self.name_ids.append(name_id)
+            self.value_starts.append(value_start)
+            self.value_ends.append(value_end)
+
+        self.header_offsets.append(len(self.name_ids))
+        self.body_offsets.append(header_end.end())
+        if self._file is not None:
+            self._file.write(data)
+        else:
+            self._buffer += data
+
+        self.message_offsets.append(self.message_offsets[-1] + len(data))
+        return len(self) - 1
+
+    def extend(self, raw_messages):
+        for raw_message in raw_messages:
+            self.append(raw_message)
+
+    def name_id(self, name: str) -> int:
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            if len(self.names) >= MAX_HEADER_NAMES:
+                raise SipParseError("Too many different header names in the store")
+
+            name_id = self._name_ids[name] = len(self.names)
+            self.names.append(name)
+
+        return name_id
+
+    def data(self) -> Union[bytearray, mmap.mmap]:
+        """ Buffer holding every message (the file is mapped again if it grew since last time) """
+        if self._file is None:
+            return self._buffer
+
+        if self._mmap is None or len(self._mmap) < self.message_offsets[-1]:
+            self._file.flush()
+            if self._mmap is not None:
+                self._mmap.close()
+
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        return self._mmap
+
+    def raw(self, index: int) -> bytes:
+        """ Raw message, as it was appended """
+        index = self.check_index(index)
+        return self.data()[self.message_offsets[index] : self.message_offsets[index + 1]]
+
+    def raw_header_values(self, index: int, name: str) -> List[str]:
+        """ Raw values of every ocurrence of a header in a message (name as parsed: "call-id") """
+        index = self.check_index(index)
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            return []
+
+        data = self.data()
+        start = self.message_offsets[index]
+        name_ids = self.name_ids
+        values = []
+        for i in range(self.header_offsets[index], self.header_offsets[index + 1]):
+            if name_ids[i] == name_id:
+                values.append(
+                    str(data[start + self.value_starts[i] : start + self.value_ends[i]], "utf-8")
+                )
+
+        return values
+
+    def header_value(self, index: int, name: str):
+        """ Parsed value of a header of a message (None if it doesn't have it) """
+        raw_values = self.raw_header_values(index, name)
+        return parse_header_values(name, raw_values) if raw_values else None
+
+    def body(self, index: int) -> bytes:
+        index = self.check_index(index)
+        start = self.message_offsets[index]
+        return self.data()[start + self.body_offsets[index] : self.message_offsets[index + 1]]
+
+    def check_index(self, index: int) -> int:
+        length = len(self)
+        if index < 0:
+            index += length
+
+        if not 0 <= index < length:
+            raise IndexError("SipMessageStore index out of range")
+
+        return index
+
+    def __getitem__(self, index: int) -> SipMessage:
+        return SipMessage.from_bytes(self.raw(index), lazy=True)
+
+    def __iter__(self) -> Iterator[SipMessage]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def __len__(self):
+        return len(self.body_offsets)
+
+    def flush(self):
+        """ Writes the pending messages to the file, and saves the index next to it """
+        if self._file is None:
+            return
+
+        self._file.flush()
+        names = json.dumps(self.names).encode("utf-8")
+        with open(self.index_path, "wb") as index_file:
+            index_file.write(
+                INDEX_HEADER.pack(INDEX_MAGIC, len(self), len(self.name_ids), len(names))
+            )
+            for offsets in self.index_arrays():
+                offsets.tofile(index_file)
+
+            index_file.write(names)
+
+    def load_index(self):
+        with open(self.index_path, "rb") as index_file:
+            magic, messages, headers, names_size = INDEX_HEADER.unpack(
+                index_file.read(INDEX_HEADER.size)
+            )
+            if magic != INDEX_MAGIC:
+                raise SipParseError(f"{self.index_path} is not a SipMessageStore index")
+
+            self.message_offsets = array.array("Q")
+            self.body_offsets = array.array("I")
+            self.header_offsets = array.array("Q")
+            self.name_ids = array.array("H")
+            self.value_starts = array.array("I")
+            self.value_ends = array.array("I")
+            sizes = (messages + 1, messages, messages + 1, headers, headers, headers)
+            for offsets, size in zip(self.index_arrays(), sizes):
+                offsets.fromfile(index_file, size)
+
+            names = index_file.read(names_size).decode("utf-8")
+
+        self.names = json.loads(names)
+        self._name_ids = {name: name_id for name_id, name in enumerate(self.names)}
+
+    def index_arrays(self):
+        return (
+            self.message_offsets,
+            self.body_offsets,
+            self.header_offsets,
+            self.name_ids,
+            self.value_starts,
+            self.value_ends,
+        )
+
+    def close(self):
+        """ Flushes the store (see flush), and releases the file """
+        if self._file is None:
+            return
+
+        self.flush()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
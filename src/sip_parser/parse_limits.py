@@ -0,0 +1,66 @@
+""" Hardened parsing: limits enforced on the messages received from untrusted sources.
+
+    The patterns of the parser can't backtrack catastrophically, but the work (and memory) a
+    message can cause still grows with its number of headers, params, the length of its lines...
+    Once hardened parsing is enabled, messages exceeding any of the limits are rejected (with a
+    ParseLimitError) as soon as that's detected, which bounds the cost of every message. Limits are
+    checked in lazy mode too (the params of a header, once it's parsed).
+"""
+from typing import Optional
+
+from sip_parser.exceptions import ParseLimitError
+
+
+class ParseLimits:
+    """ Maximum size of a message (in bytes, or characters for str messages), number of header
+        lines (start line included), length of a (unfolded) line, and number of params of a
+        single header value, URI or auth header
+    """
+
+    __slots__ = ("max_message_size", "max_headers", "max_line_length", "max_params")
+
+    def __init__(
+        self,
+        max_message_size: int = 65535,
+        max_headers: int = 128,
+        max_line_length: int = 8192,
+        max_params: int = 64,
+    ):
+        self.max_message_size = max_message_size
+        self.max_headers = max_headers
+        self.max_line_length = max_line_length
+        self.max_params = max_params
+
+    def check_size(self, size: int):
+        if size > self.max_message_size:
+            raise ParseLimitError(f"Message too big ({size} > {self.max_message_size})")
+
+    def check_line(self, line_number: int, length: int):
+        if line_number > self.max_headers:
+            raise ParseLimitError(f"Too many header lines (> {self.max_headers})")
+
+        if length > self.max_line_length:
+            raise ParseLimitError(f"Line too long ({length} > {self.max_line_length})")
+
+    def check_params(self, count: int):
+        if count > self.max_params:
+            raise ParseLimitError(f"Too many params ({count} > {self.max_params})")
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)}" for name in self.__slots__)
+        return f"ParseLimits({fields})"
+
+
+# Limits in force (None while hardened parsing is disabled)
+active_limits: Optional[ParseLimits] = None
+
+
+def enable_hardened_parsing(limits: Optional[ParseLimits] = None):
+    """ Enforces the given limits (the defaults of ParseLimits, if not given) on every message """
+    global active_limits
+    active_limits = limits if limits is not None else ParseLimits()
+
+
+def disable_hardened_parsing():
+    global active_limits
+    active_limits = None
@@ -0,0 +1,103 @@
+""" Selective parsing: which headers get parsed into structures, kept as raw strings or dropped.
+
+    Parsing headers that nobody reads is wasted work (e.g the auth headers, on a node that never
+    authenticates). A ParseProfile, given to SipMessage.from_string/from_bytes, says what to do
+    with every header, and is compiled once into a dispatch table (header name -> value parser),
+    so that it costs a single dict lookup per header line.
+"""
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from sip_parser.sip_message import MULTI_INSTANCE_HEADER_NAMES, parse_header_value
+from sip_parser.helpers.sip_parsers import header_name
+
+# What to do with a header
+STRUCTURED = "structured"  # Parsed as usual (headers without a structure are kept as str anyway)
+RAW = "raw"  # Kept as the raw str (multi-headers as a list of str, one per line)
+DROP = "drop"  # Not even kept in the message (so it's not stringified either)
+ACTIONS = (STRUCTURED, RAW, DROP)
+
+# Headers the parser itself relies on (e.g Content-Length sizes the body in from_bytes)
+ALWAYS_STRUCTURED = ("content-length",)
+
+# Parses the raw value of a header, merging it into its current value (see parse_header_value)
+HeaderParser = Callable[[str, str, Any], Any]
+
+
+def parse_raw_header_value(name: str, data: str, current: Any = None) -> Any:
+    """ Same as parse_header_value, but keeping the raw value """
+    if name in MULTI_INSTANCE_HEADER_NAMES:
+        if current is None:
+            current = []
+
+        current.append(data)
+        return current
+
+    if current is not None:
+        return current + "," + data
+
+    return data
+
+
+ACTION_PARSERS: Dict[str, Optional[HeaderParser]] = {
+    STRUCTURED: parse_header_value,
+    RAW: parse_raw_header_value,
+    DROP: None,
+}
+
+
+class ParseProfile:
+    """ Action (STRUCTURED, RAW or DROP) to take on every header, by name: the ones listed in
+        structured, raw and drop, and default for the rest. Names are case-insensitive, and may
+        be compact forms ("v" for Via). Content-Length is always structured
+    """
+
+    __slots__ = ("actions", "default", "parsers", "default_parser")
+
+    def __init__(
+        self,
+        structured: Iterable[str] = (),
+        raw: Iterable[str] = (),
+        drop: Iterable[str] = (),
+        default: str = STRUCTURED,
+    ):
+        if default not in ACTIONS:
+            raise ValueError(f"Unknown parse action: {default}")
+
+        self.actions: Dict[str, str] = {}
+        for action, names in ((STRUCTURED, structured), (RAW, raw), (DROP, drop)):
+            for name in names:
+                name = header_name(name)
+                if self.actions.get(name, action) != action:
+                    raise ValueError(f"Header {name} given more than one parse action")
+
+                if name in ALWAYS_STRUCTURED and action != STRUCTURED:
+                    raise ValueError(f"Header {name} can only be parsed structurally")
+
+                self.actions[name] = action
+
+        self.default = default
+        self.compile()
+
+    def compile(self):
+        """ Builds the dispatch table (to be called again if actions or default are changed) """
+        self.parsers: Dict[str, Optional[HeaderParser]] = {
+            name: ACTION_PARSERS[action] for name, action in self.actions.items()
+        }
+        for name in ALWAYS_STRUCTURED:
+            self.parsers[name] = parse_header_value
+
+        self.default_parser = ACTION_PARSERS[self.default]
+
+    def parser(self, name: str) -> Optional[HeaderParser]:
+        """ Value parser of a header (by parsed name: "call-id"), None if it's dropped """
+        return self.parsers.get(name, self.default_parser)
+
+    def action(self, name: str) -> str:
+        name = header_name(name)
+        if name in ALWAYS_STRUCTURED:
+            return STRUCTURED
+
+        return self.actions.get(name, self.default)
+
+    def __repr__(self):
+        return f"ParseProfile(actions={self.actions!r}, default={self.default!r})"
@@ -0,0 +1,466 @@
+""" Extraction of SIP messages from pcap/pcapng captures.
+
+    Captures are memory-mapped and walked packet by packet (Ethernet, Linux cooked, loopback or raw
+    IP link layers; IPv4/IPv6 with fragment reassembly; UDP, and TCP with stream reassembly), so
+    memory usage is bounded no matter how large the capture is.
+"""
+from typing import Dict, Iterator, Optional, Tuple
+
+import collections
+import mmap
+import re
+import socket
+import struct
+from sip_parser.sip_message import SipMessage
+from sip_parser.stream_parser import SipStreamParser
+from sip_parser.exceptions import SipParseError
+
+CapturedSipMessage = collections.namedtuple(
+    "CapturedSipMessage", "timestamp transport src_addr src_port dst_addr dst_port message"
+)
+
+PCAP_MAGIC_NUMBERS = {
+    # magic: (byte order, timestamp fraction units per second)
+    b"\xd4\xc3\xb2\xa1": ("<", 1000000),
+    b"\xa1\xb2\xc3\xd4": (">", 1000000),
+    b"\x4d\x3c\xb2\xa1": ("<", 1000000000),
+    b"\xa1\xb2\x3c\x4d": (">", 1000000000),
+}
+PCAPNG_SECTION_HEADER = 0x0A0D0D0A
+PCAPNG_INTERFACE_DESCRIPTION = 1
+PCAPNG_OBSOLETE_PACKET = 2
+PCAPNG_SIMPLE_PACKET = 3
+PCAPNG_ENHANCED_PACKET = 6
+
+LINKTYPE_NULL = 0
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = (12, 101, 228, 229)
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_LINUX_SLL2 = 276
+
+ETHERTYPE_IPV4 = 0x0800
+ETHERTYPE_IPV6 = 0x86DD
+ETHERTYPE_VLAN = (0x8100, 0x88A8, 0x9100)
+
+IPPROTO_TCP = 6
+IPPROTO_UDP = 17
+IPV6_EXTENSION_HEADERS = (0, 43, 60)  # Hop-by-hop, routing, destination options
+IPV6_FRAGMENT_HEADER = 44
+
+TCP_FIN = 0x01
+TCP_SYN = 0x02
+TCP_RST = 0x04
+SEQ_MASK = 0xFFFFFFFF
+
+# Quick check, to avoid parsing payloads of other protocols (RTP, DNS, HTTP...) as SIP
+SIP_START_RE = re.compile(rb"\s*(?:SIP/2\.0 \d{3}|[\w\-.!%*+`'~]+ \S+ SIP/2\.0\r\n)")
+MAX_START_LINE = 4096
+
+
+class FragmentReassembler:
+    """ Reassembles fragmented IP datagrams. At most max_datagrams incomplete datagrams are kept,
+        the oldest ones are discarded after that
+    """
+
+    def __init__(self, max_datagrams: int = 1024):
+        self.max_datagrams = max_datagrams
+        self.datagrams: "collections.OrderedDict[Tuple, Dict]" = collections.OrderedDict()
+
+    def add(self, key: Tuple, offset: int, more: bool, payload: bytes) -> Optional[bytes]:
+        """ Adds a fragment, returns the whole payload if the datagram is now complete """
+        datagram = self.datagrams.get(key)
+        if datagram is None:
+            datagram = self.datagrams[key] = {"parts": {}, "size": None}
+            if len(self.datagrams) > self.max_datagrams:
+                self.datagrams.popitem(last=False)
+
+        datagram["parts"][offset] = payload
+        if not more:
+            datagram["size"] = offset + len(payload)
+
+        if datagram["size"] is None:
+            return None
+
+        # Check whether the fragments cover the whole datagram
+        parts, pos = [], 0
+        for part_offset in sorted(datagram["parts"]):
+            if part_offset > pos:
+                return None  # There's a gap
+
+            part = datagram["parts"][part_offset]
+            parts.append(part[pos - part_offset :])
+            pos = max(pos, part_offset + len(part))
+
+        del self.datagrams[key]
+        return b"".join(parts)[: datagram["size"]]
+
+
+class TcpStream:
+    """ Reassembly state of one direction of a TCP connection """
+
+    __slots__ = ("next_seq", "pending", "parser", "is_sip")
+
+    def __init__(self, next_seq: Optional[int], parser: SipStreamParser):
+        self.next_seq = next_seq
+        self.pending: Dict[int, bytes] = {}  # Out of order segments, by sequence number
+        self.parser = parser
+        self.is_sip: Optional[bool] = None  # Unknown until its first data is seen
+
+
+class PcapReader:
+    """ Reads the SIP messages (over UDP and TCP) of a pcap or pcapng capture file.
+
+        Iterating it yields a CapturedSipMessage (timestamp, transport, 5-tuple and the parsed
+        SipMessage) for every message found. The number of reassembly buffers (IP fragments and
+        TCP streams) is bounded, so memory usage doesn't depend on the size of the capture.
+        Malformed messages are skipped and counted in parse_errors.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ports: Optional[Tuple[int, ...]] = None,
+        max_streams: int = 10000,
+        max_pending_segments: int = 64,
+        max_fragmented_datagrams: int = 1024,
+    ):
+        self.path = path
+        self.ports = ports  # Only look at traffic from/to these ports, if given
+        self.max_streams = max_streams
+        self.max_pending_segments = max_pending_segments
+        self.fragments = FragmentReassembler(max_fragmented_datagrams)
+        self.streams: "collections.OrderedDict[Tuple, TcpStream]" = collections.OrderedDict()
+        self.packets = 0
+        self.parse_errors = 0
+
+    def __iter__(self) -> Iterator[CapturedSipMessage]:
+        with open(self.path, "rb") as capture_file:
+            if not capture_file.seek(0, 2):
+                return  # Empty file, can't be mapped
+
+            with mmap.mmap(capture_file.fileno(), 0, access=mmap.ACCESS_READ) as capture:
+                for timestamp, linktype, frame in iter_packets(capture):
+                    self.packets += 1
+                    yield from self.process_frame(timestamp, linktype, frame)
+
+    def process_frame(self, timestamp: float, linktype: int, frame: bytes):
+        ip_packet = strip_link_layer(linktype, memoryview(frame))
+        if ip_packet is None or len(ip_packet) < 1:
+            return
+
+        version = ip_packet[0] >> 4
+        if version == 4:
+            parsed = self.parse_ipv4(ip_packet)
+        elif version == 6:
+            parsed = self.parse_ipv6(ip_packet)
+        else:
+            return
+
+        if parsed is None:
+            return
+
+        protocol, src_addr, dst_addr, payload = parsed
+        if protocol == IPPROTO_UDP and len(payload) >= 8:
+            src_port, dst_port = struct.unpack_from("!HH", payload)
+            if self.ports and src_port not in self.ports and dst_port not in self.ports:
+                return
+
+            datagram = bytes(payload[8:])
+            if not SIP_START_RE.match(datagram):
+                return
+
+            message = self.parse_message(datagram)
+            if message:
+                yield CapturedSipMessage(
+                    timestamp, "UDP", src_addr, src_port, dst_addr, dst_port, message
+                )
+        elif protocol == IPPROTO_TCP and len(payload) >= 20:
+            src_port, dst_port, seq, _, offset_flags = struct.unpack_from("!HHIIH", payload)
+            if self.ports and src_port not in self.ports and dst_port not in self.ports:
+                return
+
+            data_offset = (offset_flags >> 12) * 4
+            flow = (src_addr, src_port, dst_addr, dst_port)
+            for message in self.process_segment(
+                flow, seq, offset_flags & 0xFF, payload[data_offset:]
+            ):
+                yield CapturedSipMessage(
+                    timestamp, "TCP", src_addr, src_port, dst_addr, dst_port, message
+                )
+
+    def parse_ipv4(self, packet: memoryview):
+        if len(packet) < 20:
+            return None
+
+        header_length = (packet[0] & 0x0F) * 4
+        total_length, identification, flags_offset, _, protocol = struct.unpack_from(
+            "!HHHBB", packet, 2
+        )
+        src_addr = socket.inet_ntop(socket.AF_INET, packet[12:16])
+        dst_addr = socket.inet_ntop(socket.AF_INET, packet[16:20])
+        payload = packet[header_length:total_length]
+
+        fragment_offset = (flags_offset & 0x1FFF) * 8
+        more_fragments = bool(flags_offset & 0x2000)
+        if fragment_offset or more_fragments:
+            key = (4, src_addr, dst_addr, identification, protocol)
+            payload = self.fragments.add(key, fragment_offset, more_fragments, bytes(payload))
+            if payload is None:
+                return None
+
+            payload = memoryview(payload)
+
+        return protocol, src_addr, dst_addr, payload
+
+    def parse_ipv6(self, packet: memoryview):
+        if len(packet) < 40:
+            return None
+
+        payload_length, next_header = struct.unpack_from("!HB", packet, 4)
+        src_addr = socket.inet_ntop(socket.AF_INET6, packet[8:24])
+        dst_addr = socket.inet_ntop(socket.AF_INET6, packet[24:40])
+        payload = packet[40 : 40 + payload_length]
+
+        # Walk the extension headers
+        while next_header in IPV6_EXTENSION_HEADERS or next_header == IPV6_FRAGMENT_HEADER:
+            if len(payload) < 8:
+                return None
+
+            if next_header == IPV6_FRAGMENT_HEADER:
+                next_header = payload[0]
+                offset_flags, identification = struct.unpack_from("!HI", payload, 2)
+                fragment_offset = (offset_flags >> 3) * 8
+                more_fragments = bool(offset_flags & 1)
+                key = (6, src_addr, dst_addr, identification)
+                payload = self.fragments.add(
+                    key, fragment_offset, more_fragments, bytes(payload[8:])
+                )
+                if payload is None:
+                    return None
+
+                payload = memoryview(payload)
+            else:
+                header_length = (payload[1] + 1) * 8
+                next_header = payload[0]
+                payload = payload[header_length:]
+
+        return next_header, src_addr, dst_addr, payload
+
+    def process_segment(self, flow: Tuple, seq: int, flags: int, data: memoryview):
+        """ Reassembles the TCP stream of the flow, and returns the messages completed by the segment """
+        stream = self.streams.get(flow)
+        if flags & TCP_SYN:
+            stream = self.new_stream(flow, (seq + 1) & SEQ_MASK)
+            return []
+
+        if stream is None:
+            # The capture started mid-connection: take it from here
+            stream = self.new_stream(flow, seq)
+
+        self.streams.move_to_end(flow)
+        messages = []
+        if data:
+            messages = self.add_segment(stream, seq, bytes(data))
+
+        if flags & (TCP_FIN | TCP_RST):
+            del self.streams[flow]
+
+        return messages
+
+    def new_stream(self, flow: Tuple, next_seq: int) -> TcpStream:
+        stream = self.streams[flow] = TcpStream(next_seq, SipStreamParser())
+        if len(self.streams) > self.max_streams:
+            self.streams.popitem(last=False)
+
+        return stream
+
+    def add_segment(self, stream: TcpStream, seq: int, data: bytes):
+        ahead = (seq - stream.next_seq) & SEQ_MASK
+        if ahead and ahead < 0x80000000:
+            # Out of order, keep it for later (within bounds)
+            stream.pending[seq] = data
+            if len(stream.pending) <= self.max_pending_segments:
+                return []
+
+            # Too many missing data, give up on it and resume from the earliest segment we've got
+            seq = min(
+                stream.pending, key=lambda pending_seq: (pending_seq - stream.next_seq) & SEQ_MASK
+            )
+            data = stream.pending.pop(seq)
+            stream.next_seq = seq
+            stream.parser = SipStreamParser()
+            stream.is_sip = None
+        elif ahead:
+            # Retransmission, skip what we already had
+            behind = (stream.next_seq - seq) & SEQ_MASK
+            if behind >= len(data):
+                return []
+
+            data = data[behind:]
+
+        messages = []
+        while data is not None:
+            stream.next_seq = (stream.next_seq + len(data)) & SEQ_MASK
+            messages.extend(self.feed_stream(stream, data))
+            data = stream.pending.pop(stream.next_seq, None)
+
+        return messages
+
+    def feed_stream(self, stream: TcpStream, data: bytes):
+        if stream.is_sip is False:
+            return []
+
+        try:
+            frames = stream.parser.feed_frames(data)
+        except SipParseError:
+            # Not recoverable, skip the rest of this stream
+            self.parse_errors += 1
+            stream.is_sip = False
+            return []
+
+        if stream.is_sip is None:
+            # Check whether it's SIP as soon as the first line of the stream is complete
+            start = frames[0] if frames else bytes(stream.parser.buffer[:MAX_START_LINE]).lstrip()
+            if frames or b"\n" in start or len(start) >= MAX_START_LINE:
+                stream.is_sip = bool(SIP_START_RE.match(start))
+                if not stream.is_sip:
+                    stream.parser = SipStreamParser()  # Release whatever was buffered
+                    return []
+
+        messages = (self.parse_message(frame) for frame in frames)
+        return [message for message in messages if message]
+
+    def parse_message(self, raw_message: bytes) -> Optional[SipMessage]:
+        try:
+            return SipMessage.from_bytes(raw_message)
+        except (SipParseError, RuntimeError, ValueError):
+            self.parse_errors += 1
+            return None
+
+
+def iter_packets(buffer: mmap.mmap) -> Iterator[Tuple[float, int, bytes]]:
+    """ Yields (timestamp, linktype, frame) for every packet of a pcap/pcapng capture.
+        Only the packet being processed is copied out of the map
+    """
+    magic = buffer[:4]
+    if magic in PCAP_MAGIC_NUMBERS:
+        return iter_pcap_packets(buffer)
+
+    if len(buffer) >= 12 and struct.unpack_from("<I", buffer)[0] == PCAPNG_SECTION_HEADER:
+        return iter_pcapng_packets(buffer)
+
+    raise ValueError("Unknown capture file format (neither pcap nor pcapng)")
+
+
+def iter_pcap_packets(buffer: mmap.mmap):
+    byte_order, units = PCAP_MAGIC_NUMBERS[buffer[:4]]
+    linktype = struct.unpack_from(byte_order + "I", buffer, 20)[0] & 0x0FFFFFFF
+    record_header = struct.Struct(byte_order + "IIII")
+
+    pos = 24
+    while pos + record_header.size <= len(buffer):
+        ts_sec, ts_frac, captured_length, _ = record_header.unpack_from(buffer, pos)
+        pos += record_header.size
+        yield ts_sec + ts_frac / units, linktype, buffer[pos : pos + captured_length]
+        pos += captured_length
+
+
+def iter_pcapng_packets(buffer: mmap.mmap):
+    byte_order = "<"
+    interfaces = []  # (linktype, timestamp units per second)
+
+    pos = 0
+    while pos + 12 <= len(buffer):
+        block_type = struct.unpack_from(byte_order + "I", buffer, pos)[0]
+        if block_type == PCAPNG_SECTION_HEADER:
+            # The byte order magic tells the endianness of the whole section
+            byte_order = "<" if buffer[pos + 8 : pos + 12] == b"\x4d\x3c\x2b\x1a" else ">"
+            interfaces = []
+
+        block_length = struct.unpack_from(byte_order + "I", buffer, pos + 4)[0]
+        if block_length < 12:
+            raise ValueError(f"Invalid pcapng block length ({block_length}) at offset {pos}")
+
+        body = buffer[pos + 8 : pos + block_length - 4]
+        pos += block_length
+
+        if block_type == PCAPNG_INTERFACE_DESCRIPTION:
+            linktype = struct.unpack_from(byte_order + "H", body)[0]
+            interfaces.append((linktype, parse_pcapng_tsresol(body[8:], byte_order)))
+        elif block_type in (PCAPNG_ENHANCED_PACKET, PCAPNG_OBSOLETE_PACKET):
+            if block_type == PCAPNG_ENHANCED_PACKET:
+                interface, ts_high, ts_low, captured_length = struct.unpack_from(
+                    byte_order + "IIII", body
+                )
+            else:
+                interface, _, ts_high, ts_low, captured_length = struct.unpack_from(
+                    byte_order + "HHIII", body
+                )
+
+            linktype, units = interfaces[interface]
+            timestamp = ((ts_high << 32) | ts_low) / units
+            yield timestamp, linktype, body[20 : 20 + captured_length]
+        elif block_type == PCAPNG_SIMPLE_PACKET:
+            original_length = struct.unpack_from(byte_order + "I", body)[0]
+            linktype, _ = interfaces[0]
+            yield 0.0, linktype, body[4 : 4 + original_length]
+
+
+def parse_pcapng_tsresol(options: bytes, byte_order: str) -> int:
+    """ Finds the timestamp resolution (if_tsresol option) of a pcapng interface, in units per second """
+    pos = 0
+    while pos + 4 <= len(options):
+        code, length = struct.unpack_from(byte_order + "HH", options, pos)
+        if code == 0:  # opt_endofopt
+            break
+
+        if code == 9 and length == 1:
+            tsresol = options[pos + 4]
+            return 2 ** (tsresol & 0x7F) if tsresol & 0x80 else 10 ** tsresol
+
+        pos += 4 + (length + 3) // 4 * 4  # Options are padded to 32 bits
+
+    return 1000000
+
+
+def strip_link_layer(linktype: int, frame: memoryview) -> Optional[memoryview]:
+    """ Returns the IP packet contained in a link layer frame (None if it doesn't contain one) """
+    if linktype == LINKTYPE_ETHERNET:
+        pos = 12
+        ethertype = struct.unpack_from("!H", frame, pos)[0] if len(frame) >= 14 else None
+        while ethertype in ETHERTYPE_VLAN and len(frame) >= pos + 6:
+            pos += 4
+            ethertype = struct.unpack_from("!H", frame, pos)[0]
+
+        if ethertype not in (ETHERTYPE_IPV4, ETHERTYPE_IPV6):
+            return None
+
+        return frame[pos + 2 :]
+
+    if linktype in LINKTYPE_RAW:
+        return frame
+
+    if linktype == LINKTYPE_LINUX_SLL and len(frame) >= 16:
+        return (
+            frame[16:]
+            if struct.unpack_from("!H", frame, 14)[0] in (ETHERTYPE_IPV4, ETHERTYPE_IPV6)
+            else None
+        )
+
+    if linktype == LINKTYPE_LINUX_SLL2 and len(frame) >= 20:
+        return (
+            frame[20:]
+            if struct.unpack_from("!H", frame)[0] in (ETHERTYPE_IPV4, ETHERTYPE_IPV6)
+            else None
+        )
+
+    if linktype == LINKTYPE_NULL and len(frame) >= 4:
+        # The address family is in the byte order of the capturing host
+        return frame[4:]
+
+    return None
+
+
+def read_pcap(path: str, **kwargs) -> Iterator[CapturedSipMessage]:
+    """ Yields every SIP message found in a pcap/pcapng capture. kwargs are passed to PcapReader """
+    return iter(PcapReader(path, **kwargs))
@@ -0,0 +1,201 @@
+""" Fast-path operations of stateless proxies, done straight on the raw message.
+
+    Forwarding a request only takes a handful of changes (Via, Route, Max-Forwards, Record-Route,
+    Request-URI). Parsing the whole message into a SipMessage and stringifying it back would
+    process dozens of values that never change, so RawSipMessage just locates the start line and
+    the header section, and edits the bytes of the affected headers in place.
+"""
+from typing import Dict, Optional, Pattern, Tuple, Union
+
+import re
+from sip_parser.helpers.sip_parsers import COMPACT_HEADERS
+from sip_parser.exceptions import SipParseError
+
+# End of a header line (line breaks followed by whitespace are folding, not the end of the line)
+LINE_END_RE = re.compile(rb"\r\n(?![ \t])")
+# Whitespace (including folding) after the comma separating the values of a header
+VALUE_SEPARATOR_RE = re.compile(rb"[ \t]*(?:\r\n)?[ \t]*")
+LEADING_WHITESPACE_RE = re.compile(rb"\s*")
+# One of the comma-separated values of a header (commas within quotes or <URIs> don't separate them)
+VALUE_RE = re.compile(rb'(?:[^,"<]+|"(?:[^"\\]|\\.)*"|<[^>]*>)*')
+
+HEADER_LINE_RES: Dict[str, Pattern] = {}
+
+
+def decode(data: Union[bytes, bytearray]) -> str:
+    """ Decodes part of the header section, which must be valid UTF-8 (as in from_bytes) """
+    try:
+        return data.decode()
+    except UnicodeDecodeError as ex:
+        raise SipParseError(f"Invalid SIP message header encoding: {ex}")
+
+
+def header_line_re(name: str) -> Pattern:
+    """ Pattern of the beginning of a header line (up to its value), compact form included """
+    pattern = HEADER_LINE_RES.get(name)
+    if pattern is None:
+        full_name = name.lower()
+        names = [full_name] + [
+            short for short, full in COMPACT_HEADERS.items() if full == full_name
+        ]
+        alternatives = b"|".join(re.escape(alternative.encode()) for alternative in names)
+        pattern = HEADER_LINE_RES[name] = re.compile(
+            rb"^(?:" + alternatives + rb")[ \t]*:[ \t]*", re.IGNORECASE | re.MULTILINE
+        )
+
+    return pattern
+
+
+class RawSipMessage:
+    """ SIP message kept as raw bytes, edited in place by the proxy operations.
+
+        Only the start line and the boundaries of the header section are scanned upfront. Each
+        operation then looks for the header it needs (compact forms included), and rewrites just
+        those bytes. The body is only touched by set_body(), which updates Content-Length.
+    """
+
+    __slots__ = ("buffer", "header_end", "start_line_end")
+
+    def __init__(self, raw_message: Union[bytes, bytearray, memoryview]):
+        buffer = bytearray(raw_message)
+        del buffer[: LEADING_WHITESPACE_RE.match(buffer).end()]
+
+        self.buffer = buffer
+        self.header_end = buffer.find(b"\r\n\r\n")  # Where the last header line ends
+        self.start_line_end = buffer.find(b"\r\n")
+        if self.header_end == -1:
+            raise SipParseError(
+                "Invalid SIP message format, couldn't find header/body division (header must be followed by 2 linebreaks)"
+            )
+
+    @property
+    def is_request(self) -> bool:
+        return not self.buffer.startswith(b"SIP/")
+
+    def request_line(self) -> Tuple[str, str, str]:
+        """ Returns the method, Request-URI and version (e.g "SIP/2.0") of a request """
+        parts = bytes(self.buffer[: self.start_line_end]).split(b" ")
+        if not self.is_request or len(parts) != 3:
+            raise SipParseError("Invalid SIP request line")
+
+        method, uri, version = (decode(part) for part in parts)
+        return method, uri, version
+
+    @property
+    def method(self) -> str:
+        return self.request_line()[0]
+
+    @property
+    def request_uri(self) -> str:
+        return self.request_line()[1]
+
+    def rewrite_request_uri(self, uri: str):
+        method, _, version = self.request_line()
+        self.replace(0, self.start_line_end, f"{method} {uri} {version}".encode())
+
+    def find_header(self, name: str) -> Optional[Tuple[int, int, int]]:
+        """ Locates the first (topmost) line of a header. Returns the position where the line
+            starts, where its value starts and where it ends (None if the header isn't there)
+        """
+        m = header_line_re(name).search(self.buffer, self.start_line_end + 2, self.header_end)
+        if not m:
+            return None
+
+        line_end = LINE_END_RE.search(self.buffer, m.end()).start()
+        return m.start(), m.end(), line_end
+
+    def header_value(self, name: str) -> Optional[str]:
+        """ Raw value of the first (topmost) line of a header """
+        location = self.find_header(name)
+        if location is None:
+            return None
+
+        _, value_start, line_end = location
+        return decode(self.buffer[value_start:line_end])
+
+    def insert_header(self, name: str, value: str):
+        """ Adds a header line on top of the other lines of that header (or right after the
+            start line, if there are none)
+        """
+        location = self.find_header(name)
+        pos = location[0] if location else self.start_line_end + 2
+        self.replace(pos, pos, f"{name}: {value}\r\n".encode())
+
+    def remove_top_value(self, name: str) -> Optional[str]:
+        """ Removes the first value of a header (which can be a comma-separated list of them, or be
+            repeated on several lines). Returns the removed value (None if the header isn't there)
+        """
+        location = self.find_header(name)
+        if location is None:
+            return None
+
+        line_start, value_start, line_end = location
+        value_end = VALUE_RE.match(self.buffer, value_start, line_end).end()
+        value = decode(self.buffer[value_start:value_end]).rstrip()
+        if value_end == line_end:
+            self.replace(line_start, line_end + 2, b"")  # The line had a single value
+        else:
+            next_value = VALUE_SEPARATOR_RE.match(self.buffer, value_end + 1).end()
+            self.replace(value_start, next_value, b"")
+
+        return value
+
+    def insert_via(self, via: str):
+        """ Adds a Via on top (e.g "SIP/2.0/UDP proxy.example.com;branch=z9hG4bK...") """
+        self.insert_header("Via", via)
+
+    def remove_top_via(self) -> Optional[str]:
+        return self.remove_top_value("via")
+
+    def remove_top_route(self) -> Optional[str]:
+        return self.remove_top_value("route")
+
+    def add_record_route(self, record_route: str):
+        """ Adds a Record-Route on top (e.g "<sip:proxy.example.com;lr>") """
+        self.insert_header("Record-Route", record_route)
+
+    def decrement_max_forwards(self, default: int = 70) -> int:
+        """ Decrements Max-Forwards (added with default - 1 if missing), and returns its new value.
+
+            If it was already 0, the request must not be forwarded (but answered with a 483 Too
+            Many Hops): it's left as is, and -1 is returned.
+        """
+        location = self.find_header("max-forwards")
+        if location is None:
+            self.insert_header("Max-Forwards", str(default - 1))
+            return default - 1
+
+        _, value_start, line_end = location
+        try:
+            max_forwards = int(self.buffer[value_start:line_end])
+        except ValueError:
+            raise SipParseError("Invalid Max-Forwards header")
+
+        if max_forwards <= 0:
+            return -1
+
+        self.replace(value_start, line_end, str(max_forwards - 1).encode())
+        return max_forwards - 1
+
+    @property
+    def body(self) -> bytes:
+        return bytes(self.buffer[self.header_end + 4 :])
+
+    def set_body(self, body: bytes):
+        """ Replaces the body, updating Content-Length (if the message has it) """
+        self.buffer[self.header_end + 4 :] = body
+        location = self.find_header("content-length")
+        if location is not None:
+            _, value_start, line_end = location
+            self.replace(value_start, line_end, str(len(body)).encode())
+
+    def replace(self, start: int, end: int, data: bytes):
+        """ Replaces buffer[start:end] (which must be in the header section) with data """
+        self.buffer[start:end] = data
+        delta = len(data) - (end - start)
+        self.header_end += delta
+        if start < self.start_line_end:
+            self.start_line_end += delta
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.buffer)
@@ -0,0 +1,104 @@
+""" Index of the attributes (a=) of SDP media descriptions.
+
+    Attributes are parsed as a flat list of (name, value) tuples. Looking a codec up in there (or
+    gathering the ICE candidates) means scanning the whole list, which gets long on WebRTC offers.
+    AttributeIndex groups the attributes by name, and keys rtpmap/fmtp/rtcp-fb by payload type,
+    in a single pass over the list.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import collections
+from sip_parser.exceptions import SdpParseError
+
+RtpMapField = collections.namedtuple(
+    "RtpMapField", "payload_type encoding_name clock_rate encoding_parameters"
+)
+
+# Payload type of the attributes that apply to every format (e.g "a=rtcp-fb:* nack")
+ANY_PAYLOAD_TYPE = "*"
+
+PayloadType = Union[int, str]
+
+
+def split_payload_type(name: str, value: Any) -> Tuple[PayloadType, str]:
+    """ Splits attribute values starting with a payload type (e.g "111 opus/48000/2") """
+    if not isinstance(value, str):
+        raise SdpParseError(f"Missing value of the {name} attribute (a=)")
+
+    payload_type, _, rest = value.partition(" ")
+    if payload_type == ANY_PAYLOAD_TYPE:
+        return payload_type, rest.strip()
+
+    try:
+        return int(payload_type), rest.strip()
+    except ValueError:
+        raise SdpParseError(f"Invalid payload type of the {name} attribute (a=): <{value}>")
+
+
+def parse_rtpmap(value: Any) -> RtpMapField:
+    payload_type, encoding = split_payload_type("rtpmap", value)
+    subfields = encoding.split("/")
+    if len(subfields) < 2:
+        raise SdpParseError(f"Unexpected format found while parsing rtpmap attribute: <{value}>")
+
+    try:
+        clock_rate = int(subfields[1])
+    except ValueError:
+        raise SdpParseError(f"Invalid clock rate of rtpmap attribute: <{value}>")
+
+    return RtpMapField(
+        payload_type, subfields[0], clock_rate, subfields[2] if len(subfields) > 2 else None
+    )
+
+
+class AttributeIndex:
+    """ Attributes of a media description, by name (the values of property attributes, such as
+        a=sendrecv, are True). rtpmap, fmtp and rtcp_fb are keyed by payload type (rtcp-fb can
+        also be keyed by ANY_PAYLOAD_TYPE), with the parsed rtpmap, the format parameters string
+        and the list of feedback types, respectively
+    """
+
+    __slots__ = ("by_name", "rtpmap", "fmtp", "rtcp_fb")
+
+    def __init__(self, attributes: Optional[Iterable[Tuple[str, Any]]]):
+        self.by_name: Dict[str, List[Any]] = {}
+        self.rtpmap: Dict[int, RtpMapField] = {}
+        self.fmtp: Dict[int, str] = {}
+        self.rtcp_fb: Dict[PayloadType, List[str]] = {}
+
+        by_name = self.by_name
+        for name, value in attributes or ():
+            values = by_name.get(name)
+            if values is None:
+                values = by_name[name] = []
+
+            values.append(value)
+            if name == "rtpmap":
+                rtpmap = parse_rtpmap(value)
+                self.rtpmap[rtpmap.payload_type] = rtpmap
+            elif name == "fmtp":
+                payload_type, parameters = split_payload_type(name, value)
+                self.fmtp[payload_type] = parameters
+            elif name == "rtcp-fb":
+                payload_type, feedback = split_payload_type(name, value)
+                self.rtcp_fb.setdefault(payload_type, []).append(feedback)
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """ Value of the first attribute with that name """
+        values = self.by_name.get(name)
+        return values[0] if values else default
+
+    def get_all(self, name: str) -> List[Any]:
+        """ Values of every attribute with that name, in order """
+        return self.by_name.get(name, [])
+
+    @property
+    def candidates(self) -> List[str]:
+        """ ICE candidates (RFC 8839), as their raw values """
+        return self.get_all("candidate")
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.by_name
+
+    def __repr__(self):
+        return f"<AttributeIndex {list(self.by_name)}>"
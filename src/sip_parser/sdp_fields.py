@@ -1,4 +1,5 @@
 import collections
+from sip_parser.sdp_attributes import AttributeIndex
 
 FieldRaw = collections.namedtuple("FieldRaw", "name value")
 MediaField = collections.namedtuple("MediaField", "media port number_of_ports proto fmt")
@@ -10,10 +11,24 @@ RepeatTimesField = collections.namedtuple(
     "RepeatTimesField", "repeat_interval active_duration offsets"
 )
 TimeDescription = collections.namedtuple("TimeDescription", "timing repeat_times")
-MediaDescription = collections.namedtuple(
-    "MediaDescription",
-    "media media_title connection_information bandwidth_information encryption_key media_attributes",
-)
 ConnectionDataField = collections.namedtuple(
     "ConnectionDataField", "net_type addr_type connection_address"
 )
+
+
+class MediaDescription(
+    collections.namedtuple(
+        "MediaDescription",
+        "media media_title connection_information bandwidth_information encryption_key media_attributes",
+    )
+):
+    @property
+    def attributes(self) -> AttributeIndex:
+        """ Index of media_attributes, built the first time it's accessed (so it doesn't reflect
+            later changes to media_attributes)
+        """
+        try:
+            return self._attribute_index
+        except AttributeError:
+            self._attribute_index = AttributeIndex(self.media_attributes)
+            return self._attribute_index
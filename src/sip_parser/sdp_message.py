@@ -1,13 +1,46 @@
 """ SDP message parser following RFC4566 """
 from typing import List, Dict, Any, Optional, Union
 
-import re
+import time
 from sip_parser.exceptions import SdpParseError
+from sip_parser import batch, instrumentation, parse_limits
 from sip_parser.helpers.sdp_parsers import parse_functions
-from sip_parser.sdp_fields import FieldRaw, TimeDescription, MediaDescription
+from sip_parser.sdp_fields import TimeDescription, MediaDescription
 
 REPEATABLE_HEADER_NAMES = ("b", "r", "a")
 
+# Valid order of the fields (RFC 4566, section 5), as the fields that may follow each state:
+#   v o s i? u? e* p* c? b* (t r*)+ z? k? a* (m i? c? b* k? a*)*
+# States are numbered after the field that led to them. Media descriptions begin at MEDIA_STATE
+SDP_TRANSITIONS: List[Dict[str, int]] = [
+    {"v": 1},  # 0: start
+    {"o": 2},  # 1: v
+    {"s": 3},  # 2: o
+    {"i": 4, "u": 5, "e": 6, "p": 7, "c": 8, "b": 9, "t": 10},  # 3: s
+    {"u": 5, "e": 6, "p": 7, "c": 8, "b": 9, "t": 10},  # 4: i
+    {"e": 6, "p": 7, "c": 8, "b": 9, "t": 10},  # 5: u
+    {"e": 6, "p": 7, "c": 8, "b": 9, "t": 10},  # 6: e
+    {"p": 7, "c": 8, "b": 9, "t": 10},  # 7: p
+    {"b": 9, "t": 10},  # 8: c
+    {"b": 9, "t": 10},  # 9: b
+    {"t": 10, "r": 11, "z": 12, "k": 13, "a": 14, "m": 15},  # 10: t
+    {"t": 10, "r": 11, "z": 12, "k": 13, "a": 14, "m": 15},  # 11: r
+    {"k": 13, "a": 14, "m": 15},  # 12: z
+    {"a": 14, "m": 15},  # 13: k
+    {"a": 14, "m": 15},  # 14: a
+    {"i": 16, "c": 17, "b": 18, "k": 19, "a": 20, "m": 15},  # 15: m
+    {"c": 17, "b": 18, "k": 19, "a": 20, "m": 15},  # 16: i
+    {"b": 18, "k": 19, "a": 20, "m": 15},  # 17: c
+    {"b": 18, "k": 19, "a": 20, "m": 15},  # 18: b
+    {"a": 20, "m": 15},  # 19: k
+    {"a": 20, "m": 15},  # 20: a
+]
+MEDIA_STATE = 15
+FINAL_STATES = frozenset(range(10, 21))  # At least one time description is required
+
+# Position of each field in MediaDescription
+MEDIA_FIELD_INDEX = {"i": 1, "c": 2, "b": 3, "k": 4, "a": 5}
+
 
 class SdpMessage:
     def __init__(self):
@@ -30,81 +63,76 @@ class SdpMessage:
     def add_media_description(self, media_desc):
         self.media_descriptions.append(media_desc)
 
+    @classmethod
+    def parse_many(cls, raw_messages, workers=None, chunksize=256, ordered=True):
+        """ Parses lots of messages (str or bytes) using a pool of processes.
+            Yields a BatchResult (index, message, error) per message, see batch.parse_many
+        """
+        return batch.parse_many(cls, raw_messages, workers, chunksize, ordered)
+
     @staticmethod
     def from_string(raw_message: str):
+        """ Parses the SDP in a single pass over its lines, validating the order of the fields
+            (see SDP_TRANSITIONS) while building the session, time and media descriptions
+        """
+        profiler = instrumentation.profiler
+        if profiler is not None:
+            started = time.perf_counter()
+
+        limits = parse_limits.active_limits
+        if limits is not None:
+            limits.check_size(len(raw_message))
+
         sdp_msg = SdpMessage()
-        lines = [line.strip().split("=", maxsplit=1) for line in raw_message.split("\n")]
-
-        fields_order = ""
-        fields = []
-        for line in lines:
-            name, value = line[0], line[1]
-            fields_order += name
-            fields.append(FieldRaw(name, value))
-
-        # This is the right order for the headers (repetition/optionality too)
-        # If this doesn't match, it's the wrong order.
-        m = re.match(r"vosi?u?e?p?c?b*(tr?)+z?k?a?(mi?c?b*k?a*)*", fields_order)
-        if not m:
-            raise SdpParseError(f"Incorrect SDP header order detected")
+        state = 0
+        repeat_times: List = []
+        media: Optional[List] = None  # Fields of the media description being parsed
 
-        # Now that we know how they're properly sorted, we can process the time descriptors
-        time_fields = [field for field in fields if field.name in ("t", "r")]
-        cur_time_attrs = {"timing": None, "repeat_times": []}
-        for i, field in enumerate(time_fields):
-            parsed_value = parse_functions[field.name](field.value)
-            if field.name == "t":
-                cur_time_attrs["timing"] = parsed_value
-            else:
-                cur_time_attrs["repeat_times"].append(parsed_value)
-
-            # Determine if we're done with this time description: This happens when we either
-            # are on a "r" attribute or there's "t" attribute next. If so, save it
-            if i + 1 >= len(time_fields) or time_fields[i + 1][0] == "t":
-                sdp_msg.add_time_description(TimeDescription(**cur_time_attrs))
-                cur_time_attrs = {"timing": None, "repeat_times": []}
-
-        # Then, process the media fields
-        if "m" in fields_order:
-            target_attr_map = {
-                "m": "media",
-                "i": "media_title",
-                "c": "connection_information",
-                "b": "bandwidth_information",
-                "k": "encryption_key",
-                "a": "media_attributes",
-            }
-
-            # Factory for new media descriptions
-            new_media_desc = lambda: {name: None for name in target_attr_map.values()}
-
-            # Iterate through all media fields
-            cur_media_desc_attrs = new_media_desc()
-            media_desc_fields = fields[fields_order.index("m") :]
-            for i, field in enumerate(media_desc_fields):
-                target_key = target_attr_map[field.name]
-                processed_value = parse_functions[field.name](field.value)
-                if target_key in REPEATABLE_HEADER_NAMES:
-                    if cur_media_desc_attrs[target_key] is None:
-                        cur_media_desc_attrs[target_key] = []
-
-                    cur_media_desc_attrs[target_key].append(processed_value)
+        for line in raw_message.split("\n"):
+            line = line.strip()
+            if not line:
+                continue
+
+            name = line[0]
+            if line[1:2] != "=":
+                raise SdpParseError(f"Invalid SDP line found: <{line}>")
+
+            state = SDP_TRANSITIONS[state].get(name, -1)
+            if state == -1:
+                raise SdpParseError(f"Incorrect SDP header order detected")
+
+            value = parse_functions[name](line[2:])
+
+            if state >= MEDIA_STATE:
+                if name == "m":
+                    if media is not None:
+                        sdp_msg.add_media_description(MediaDescription(*media))
+
+                    media = [value, None, None, None, None, None]
                 else:
-                    cur_media_desc_attrs[target_key] = processed_value
-
-                # Determine if we're done with this media description. If so, save it
-                if i + 1 >= len(media_desc_fields) or media_desc_fields[i + 1][0] == "m":
-                    sdp_msg.add_media_description(MediaDescription(**cur_media_desc_attrs))
-                    cur_media_desc_attrs = new_media_desc()
-
-            # *Discard* the media fields
-            fields = fields[: fields_order.index("m")]
-
-        # Process the regular session description fields
-        session_fields = [field for field in fields if field.name not in ("t", "r")]
-        for i, field in enumerate(session_fields):
-            sdp_msg.add_session_description_field(
-                name=field.name, value=parse_functions[field.name](field.value)
-            )
+                    index = MEDIA_FIELD_INDEX[name]
+                    if name in REPEATABLE_HEADER_NAMES:
+                        if media[index] is None:
+                            media[index] = []
+
+                        media[index].append(value)
+                    else:
+                        media[index] = value
+            elif name == "t":
+                repeat_times = []
+                sdp_msg.add_time_description(TimeDescription(value, repeat_times))
+            elif name == "r":
+                repeat_times.append(value)
+            else:
+                sdp_msg.add_session_description_field(name, value)
+
+        if state not in FINAL_STATES:
+            raise SdpParseError(f"Incorrect SDP header order detected")
+
+        if media is not None:
+            sdp_msg.add_media_description(MediaDescription(*media))
+
+        if profiler is not None:
+            profiler.add_message("sdp", raw_message, time.perf_counter() - started)
 
         return sdp_msg
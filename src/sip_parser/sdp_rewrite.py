@@ -0,0 +1,88 @@
+""" In-place rewriting of the SDP fields changed when anchoring media (e.g by B2BUAs).
+
+    Relaying media only takes new connection addresses (c=), media ports (m=) and a new version of
+    the session (o=). rewrite_sdp edits just those values in the raw SDP, in a single scan, without
+    parsing it into an SdpMessage: every other line (and the line breaks) is kept byte-identical.
+"""
+from typing import Optional, Sequence, TypeVar, Union
+
+import re
+from sip_parser.raw_ops import RawSipMessage
+from sip_parser.sip_message import SipMessage
+from sip_parser.exceptions import SdpParseError
+
+# o=, c= and m= lines, split around the sub-field that may be rewritten
+ORIGIN_RE = r"o=(?P<o_head>\S+ \S+ )(?P<o_version>\S+)(?P<o_tail>[^\r\n]*)"
+CONNECTION_RE = r"c=(?P<c_net_type>\S+ )(?P<c_addr_type>\S+) (?P<c_address>[^/\s]+)"
+MEDIA_RE = r"m=(?P<m_type>\S+ )(?P<m_port>\d+)"
+REWRITTEN_LINE_RE = re.compile(
+    f"^(?:{ORIGIN_RE}|{CONNECTION_RE}|{MEDIA_RE})", re.MULTILINE | re.IGNORECASE
+)
+
+AnySdp = TypeVar("AnySdp", str, bytes)
+
+
+def rewrite_sdp(
+    sdp: AnySdp,
+    connection_address: Optional[str] = None,
+    media_ports: Optional[Sequence[Optional[int]]] = None,
+    origin_version: Optional[int] = None,
+) -> AnySdp:
+    """ Rewrites the raw SDP (str or bytes, returning the same type):
+
+        - connection_address replaces the address of every c= line (session and media level). The
+          address type (IP4/IP6) follows the new address, and the TTL/number of addresses is kept.
+        - media_ports holds the new port of each m= line, in order (None keeps the current one).
+        - origin_version replaces the session version of the o= line.
+    """
+    is_bytes = isinstance(sdp, (bytes, bytearray))
+    text = sdp.decode("latin-1") if is_bytes else sdp  # latin-1 maps every byte, losslessly
+    addr_type = "IP6" if connection_address and ":" in connection_address else "IP4"
+    media_index = -1
+
+    def rewrite_line(m) -> str:
+        nonlocal media_index
+        if m.group("o_head") is not None:
+            if origin_version is None:
+                return m.group(0)
+
+            return f"o={m.group('o_head')}{origin_version}{m.group('o_tail')}"
+
+        if m.group("c_net_type") is not None:
+            if connection_address is None:
+                return m.group(0)
+
+            return f"c={m.group('c_net_type')}{addr_type} {connection_address}"
+
+        media_index += 1
+        if media_ports is None or media_index >= len(media_ports):
+            return m.group(0)
+
+        port = media_ports[media_index]
+        if port is None:
+            return m.group(0)
+
+        return f"m={m.group('m_type')}{port}"
+
+    text = REWRITTEN_LINE_RE.sub(rewrite_line, text)
+    if media_ports is not None and media_index + 1 < len(media_ports):
+        raise SdpParseError(
+            f"Got {len(media_ports)} media ports, but the SDP has {media_index + 1} m= lines"
+        )
+
+    return text.encode("latin-1") if is_bytes else text
+
+
+def rewrite_message_sdp(
+    message: Union[SipMessage, RawSipMessage],
+    connection_address: Optional[str] = None,
+    media_ports: Optional[Sequence[Optional[int]]] = None,
+    origin_version: Optional[int] = None,
+):
+    """ Rewrites the SDP body of a message (see rewrite_sdp), updating its Content-Length """
+    if isinstance(message, RawSipMessage):
+        message.set_body(rewrite_sdp(message.body, connection_address, media_ports, origin_version))
+        return
+
+    message.content = rewrite_sdp(message.content, connection_address, media_ports, origin_version)
+    message.headers["content-length"] = len(message.body_bytes())
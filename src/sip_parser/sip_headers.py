@@ -0,0 +1,158 @@
+""" Typed values of the structured SIP headers, as produced by the parser.
+
+    They're __slots__ classes (much cheaper to build and to keep in memory than dicts) which can
+    still be used as the dicts the parser used to produce: header["host"], header.get("port"),
+    iteration over the keys, comparison with dicts... are all supported.
+"""
+from typing import Any, Dict, Optional, Union
+from collections.abc import MutableMapping
+
+
+class HeaderValue(MutableMapping):
+    """ Base class of the header values: maps the dict-like accessors to the slots """
+
+    __slots__ = ()
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.__slots__:
+            return getattr(self, key)
+
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key not in self.__slots__:
+            raise KeyError(f"{self.__class__.__name__} has no {key} field")
+
+        setattr(self, key, value)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        # Faster than MutableMapping's (no exception raised for missing keys)
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def __delitem__(self, key: str):
+        raise TypeError(f"Fields of {self.__class__.__name__} can't be deleted")
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __repr__(self):
+        fields = ", ".join(f"{key}={value!r}" for key, value in self.items())
+        return f"{self.__class__.__name__}({fields})"
+
+    def copy(self):
+        """ Copies the value, along with its params (so that the copy can be modified freely) """
+        return self.__class__(
+            *(
+                value.copy() if isinstance(value, (dict, HeaderValue)) else value
+                for value in self.values()
+            )
+        )
+
+
+class SipUri(HeaderValue):
+    __slots__ = ("schema", "user", "password", "host", "port", "params", "headers")
+
+    def __init__(
+        self,
+        schema: str,
+        user: Optional[str],
+        password: Optional[str],
+        host: str,
+        port: Optional[int],
+        params: Dict[str, Optional[str]],
+        headers: Dict[str, str],
+    ):
+        self.schema = schema
+        self.user = user
+        self.password = password
+        self.host = host
+        self.port = port
+        self.params = params
+        self.headers = headers
+
+
+class NameAddr(HeaderValue):
+    """ Address of record: optional display name, URI (parsed or not) and header parameters """
+
+    __slots__ = ("name", "uri", "params")
+
+    def __init__(
+        self, name: Optional[str], uri: Union[str, SipUri], params: Dict[str, Optional[str]]
+    ):
+        self.name = name
+        self.uri = uri
+        self.params = params
+
+
+class Via(HeaderValue):
+    __slots__ = ("version", "protocol", "host", "port", "params")
+
+    def __init__(
+        self,
+        version: str,
+        protocol: str,
+        host: str,
+        port: Optional[int],
+        params: Dict[str, Optional[str]],
+    ):
+        self.version = version
+        self.protocol = protocol
+        self.host = host
+        self.port = port
+        self.params = params
+
+
+class CSeq(HeaderValue):
+    __slots__ = ("seq", "method")
+
+    def __init__(self, seq: int, method: str):
+        self.seq = seq
+        self.method = method
+
+
+class AuthCredentials(HeaderValue):
+    """ Value of an authentication header (Authorization, WWW-Authenticate, Authentication-Info...)
+
+        The auth parameters (realm, nonce...) are accessed as keys, same as the scheme (if any),
+        which is listed last
+    """
+
+    __slots__ = ("scheme", "params")
+
+    def __init__(self, scheme: Optional[str], params: Dict[str, str]):
+        self.scheme = scheme
+        self.params = params
+
+    get = MutableMapping.get
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "scheme" and self.scheme is not None:
+            return self.scheme
+
+        return self.params[key]
+
+    def __setitem__(self, key: str, value: Any):
+        if key == "scheme":
+            self.scheme = value
+        else:
+            self.params[key] = value
+
+    def __delitem__(self, key: str):
+        if key == "scheme":
+            self.scheme = None
+        else:
+            del self.params[key]
+
+    def __iter__(self):
+        yield from self.params
+        if self.scheme is not None:
+            yield "scheme"
+
+    def __len__(self):
+        return len(self.params) + (self.scheme is not None)
+
+    def copy(self):
+        return AuthCredentials(self.scheme, self.params.copy())
@@ -1,27 +1,34 @@
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Optional, Union, Iterator, Tuple, Set
+from collections.abc import MutableMapping
 
-import urllib
 import re
+import time
 from sip_parser.helpers.sip_parsers import (
-    COMPACT_HEADERS,
-    parse_params,
-    parse_multiheader,
-    parse_via,
-    parse_auth_header_with_scheme,
+    header_name,
+    scan_multiheader,
+    scan_via,
+    scan_auth_header_with_scheme,
+    scan_aor,
+    scan_aor_with_uri,
     parse_auth_header,
     parse_cseq,
     parse_aor,
-    parse_uri,
-    parse_aor_with_uri,
     parse_response,
     parse_request,
 )
 from sip_parser.helpers.sip_stringifiers import (
-    stringify_header,
-    stringify_uri,
+    write_header,
+    write_uri,
     prettify_header_name,
 )
+from sip_parser.helpers import parse_cache
 from sip_parser.exceptions import SipParseError, SipBuildError
+from sip_parser import batch, instrumentation, parse_limits
+
+# Used to find the header/body division on raw (bytes) messages
+HEADER_END_RE = re.compile(rb"\r\n\r\n")
+LEADING_WHITESPACE_RE = re.compile(rb"\s*")
+TEXT_LEADING_WHITESPACE_RE = re.compile(r"\s*")
 
 # These headers MAY appear multiple times in a single message
 MULTI_INSTANCE_HEADER_NAMES = (
@@ -39,6 +46,298 @@ MULTI_INSTANCE_HEADER_NAMES = (
 )
 
 
+HEADER_LINE_RE = re.compile(r"([\S]*?)\s*:\s*([\s\S]*)$")
+LINE_BREAK_RE = re.compile(r"\r\n(?![ \t])")
+
+
+def iter_line_spans(head: str) -> Iterator[Tuple[int, int]]:
+    """ Yields the (start, end) positions of every line in the header section.
+        Lines starting with whitespace are continuations of the previous one (header folding)
+    """
+    pos = 0
+    for m in LINE_BREAK_RE.finditer(head):
+        yield pos, m.start()
+        pos = m.end()
+
+    yield pos, len(head)
+
+
+# Multi-headers which usually carry the same values message after message (see parse_cache)
+CACHEABLE_HEADER_NAMES = ("contact", "route", "record-route", "path")
+
+
+def limited_line_spans(
+    line_spans: Iterator[Tuple[int, int]], limits: "parse_limits.ParseLimits"
+) -> Iterator[Tuple[int, int]]:
+    """ Enforces the limits on the number and length of the lines, as they're iterated """
+    for line_number, (start, end) in enumerate(line_spans, 1):
+        limits.check_line(line_number, end - start)
+        yield start, end
+
+
+def parse_multi_header_value(name: str, raw_val: str) -> Union[str, List]:
+    """ Parses a single line of a multi-header (which may contain several comma-separated values) """
+    cache = parse_cache.header_cache
+    if (
+        cache is not None
+        and name in CACHEABLE_HEADER_NAMES
+        and len(raw_val) <= parse_cache.MAX_CACHED_VALUE_LENGTH
+    ):
+        key = (name, raw_val)
+        cached = cache.get(key)
+        if cached is None:
+            cached = scan_multi_header_value(name, raw_val)
+            cache.put(key, cached)
+
+        return [value.copy() for value in cached] if isinstance(cached, list) else cached
+
+    return scan_multi_header_value(name, raw_val)
+
+
+def scan_multi_header_value(name: str, raw_val: str) -> Union[str, List]:
+    """ Actual parsing of parse_multi_header_value (bypassing the cache) """
+
+    values: Union[str, List]  # [Type declaration]
+    pos = len(raw_val)
+    if name == "contact":
+        if raw_val == "*":
+            values = "*"
+        else:
+            values, pos = scan_multiheader(scan_aor, raw_val)
+    elif name in ("route", "record-route", "path"):
+        values, pos = scan_multiheader(scan_aor_with_uri, raw_val)
+    elif name == "via":
+        values, pos = scan_multiheader(scan_via, raw_val)
+    elif name in (
+        "www-authenticate",
+        "proxy-authenticate",
+        "authorization",
+        "proxy-authorization",
+    ):
+        values, pos = scan_multiheader(scan_auth_header_with_scheme, raw_val)
+    else:
+        raise SipParseError(f"Don't know how to process header {name} as a multi-header")
+
+    # Make sure there's no leftover data after parsing (either we parsed wrong or the header is invalid, either way - bad)
+    if pos < len(raw_val):
+        raise SipParseError(f"Leftover data found after processing {name} header")
+
+    return values
+
+
+def parse_header_value(name: str, data: str, current: Any = None) -> Any:
+    """ Parses the raw value of a header. If the header had already been found in the
+        message, its current value is given and the new ocurrence gets merged into it
+    """
+
+    if name in MULTI_INSTANCE_HEADER_NAMES:
+        if current is None:
+            current = []
+
+        current.extend(parse_multi_header_value(name, data))
+        return current
+    elif name in ("to", "from", "refer-to"):
+        val, _ = parse_aor(data)
+        return val
+    elif name == "cseq":
+        return parse_cseq(data)
+    elif name in ("content-length", "max-forwards"):
+        return int(data)
+    elif name == "authentication-info":
+        # Directly parse auth header, without scheme
+        val, _ = parse_auth_header(data)
+        return val
+
+    # Generic header parsing (just key -> value)
+    if current is not None:  # Header existed, append
+        return current + "," + data
+
+    return data
+
+
+# Single-instance headers parsed into something else than their raw value (a repeated one
+# replaces the previous value, instead of being appended to it)
+PARSED_SINGLE_HEADER_NAMES = (
+    "to",
+    "from",
+    "refer-to",
+    "cseq",
+    "content-length",
+    "max-forwards",
+    "authentication-info",
+)
+
+
+def joins_repeated(name: str, parse=parse_header_value) -> bool:
+    """ Whether parse merges the ocurrences of a header by joining their raw values with commas
+        (any parser other than parse_header_value keeps the raw values, see parse_profile)
+    """
+    return name not in MULTI_INSTANCE_HEADER_NAMES and (
+        parse is not parse_header_value or name not in PARSED_SINGLE_HEADER_NAMES
+    )
+
+
+def parse_header_values(name: str, raw_values: List[str], parse=parse_header_value) -> Any:
+    """ Parses every ocurrence of a header into a single value. Repeated plain headers are joined
+        at once, rather than one by one (which would copy the value so far again for each one)
+    """
+    if len(raw_values) > 1 and joins_repeated(name, parse):
+        return parse(name, ",".join(raw_values))
+
+    value = None
+    for raw_value in raw_values:
+        value = parse(name, raw_value, value)
+
+    return value
+
+
+class UnparsedHeader:
+    """ Placeholder for the value of a header that hasn't been parsed yet """
+
+    def __repr__(self):
+        return "<unparsed>"
+
+    def __reduce__(self):
+        return "UNPARSED"
+
+
+UNPARSED = UnparsedHeader()
+
+
+class LazyHeaders(MutableMapping):
+    """ Headers of a message parsed in lazy mode.
+
+        Only the name and the span of the raw value of every header are recorded while parsing
+        the message. A header is parsed the first time it's read, and the result is memoized.
+        Other than that, it behaves just like the regular headers dict.
+
+        When the message is stringified, headers that haven't been modified are copied verbatim
+        from the source, and only the modified ones are rendered again. Since parsed values can be
+        modified in place, a header is taken as modified once it's been set, or once its parsed
+        value has been read (unless it's a plain str/int, which can't be modified in place).
+        Headers are parsed according to the profile, if given (see parse_profile.ParseProfile)
+    """
+
+    def __init__(self, source: str, profile=None):
+        self.source = source
+        self.profile = profile
+        self.spans: Dict[str, List[Tuple[int, int]]] = {}
+        self.lines: Dict[str, List[Tuple[int, int]]] = {}  # Spans of the whole header lines
+        self._values: Dict[str, Any] = {}
+        self._dirty: Set[str] = set()
+
+    def add_raw(self, name: str, start: int, end: int, line_start: int):
+        """ Records an ocurrence of a header, whose raw value is source[start:end] (and which
+            begins at line_start, name included)
+        """
+        if name in self.spans:
+            self.spans[name].append((start, end))
+            self.lines[name].append((line_start, end))
+        else:
+            self.spans[name] = [(start, end)]
+            self.lines[name] = [(line_start, end)]
+            self._values[name] = UNPARSED
+
+    def raw_values(self, name: str) -> List[str]:
+        """ Raw values of every ocurrence of the header, as found in the message """
+        return [self.source[start:end] for start, end in self.spans.get(name, ())]
+
+    def is_parsed(self, name: str) -> bool:
+        return self._values[name] is not UNPARSED
+
+    def is_modified(self, name: str) -> bool:
+        """ Whether the header can't be copied verbatim from the source when stringifying """
+        if name not in self.lines:
+            return True  # Added after parsing
+
+        if name not in self._dirty:
+            return False
+
+        # Set again, but maybe to the same value (e.g Content-Length when stringifying)
+        value = self._values[name]
+        return not isinstance(value, (str, int)) or value != self.parse_raw(name)
+
+    def parse_raw(self, name: str) -> Any:
+        profiler = instrumentation.profiler
+        if profiler is not None:
+            started = time.perf_counter()
+
+        parse = parse_header_value if self.profile is None else self.profile.parser(name)
+        value = parse_header_values(name, self.raw_values(name), parse)
+
+        if profiler is not None:
+            profiler.add_header(name, time.perf_counter() - started)
+
+        return value
+
+    def write(self, out: List[str]):
+        """ Writes every header (each one followed by a line break) into out, copying the
+            unmodified ones from the source. Consecutive unmodified lines are copied at once.
+        """
+        source = self.source
+        run_start = run_end = -1
+        for name, value in self._values.items():
+            if not self.is_modified(name):
+                for start, end in self.lines[name]:
+                    if start != run_end + 2:
+                        if run_end != -1:
+                            out.append(source[run_start:run_end])
+                            out.append("\r\n")
+
+                        run_start = start
+
+                    run_end = end
+
+                continue
+
+            if value is None:
+                continue
+
+            if run_end != -1:
+                out.append(source[run_start:run_end])
+                out.append("\r\n")
+                run_start = run_end = -1
+
+            write_header(out, name, value)
+            out.append("\r\n")
+
+        if run_end != -1:
+            out.append(source[run_start:run_end])
+            out.append("\r\n")
+
+    def __getitem__(self, name: str) -> Any:
+        value = self._values[name]
+        if value is UNPARSED:
+            value = self._values[name] = self.parse_raw(name)
+
+        if not isinstance(value, (str, int)):
+            self._dirty.add(name)  # Could be modified in place from now on
+
+        return value
+
+    def __setitem__(self, name: str, value: Any):
+        self._values[name] = value
+        self._dirty.add(name)
+
+    def __delitem__(self, name: str):
+        del self._values[name]
+        self.spans.pop(name, None)
+        self.lines.pop(name, None)
+
+    def __contains__(self, name: object) -> bool:
+        # Overridden so that checking for a header doesn't parse it
+        return name in self._values
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self._values!r})"
+
+
 class SipMessage:
     TYPE_REQUEST = 0
     TYPE_RESPONSE = 1
@@ -51,11 +350,39 @@ class SipMessage:
         self.reason: Optional[str]  # Response
         self.method: Optional[str]  # Request
         self.uri: Optional[str]  # Request
-        self.content: str
+
+        # Body. When parsed from bytes, it's kept as a (non-copied) memoryview and only
+        # decoded into `content` when accessed
+        self.body: Optional[memoryview] = None
+        self._content: Optional[str] = None
 
         # Headers
         self.headers: Dict[str, Any] = {}
 
+    @property
+    def content(self) -> str:
+        if self._content is None:
+            self._content = str(self.body, "utf-8") if self.body is not None else ""
+
+        return self._content
+
+    @content.setter
+    def content(self, value: str):
+        self._content = value
+        self.body = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if self.body is not None:
+            state["body"] = bytes(self.body)  # memoryviews can't be pickled
+
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.body is not None:
+            self.body = memoryview(self.body)
+
     @classmethod
     def from_dict(cls, data: Dict[str, Any]):
         """ Creates an instance of the class based off the given data """
@@ -106,88 +433,203 @@ class SipMessage:
         return message
 
     @classmethod
-    def from_string(cls, raw_message: str):
+    def from_string(cls, raw_message: str, lazy: bool = False, profile=None):
         """ Parses a message contained in raw_message and produces
             a class instance with values based off of it
+
+            In lazy mode, headers are only parsed when first accessed (see LazyHeaders)
+            A profile chooses which headers get parsed, kept raw or dropped (see ParseProfile)
         """
 
+        profiler = instrumentation.profiler
+        if profiler is not None:
+            started = time.perf_counter()
+
+        limits = parse_limits.active_limits
+        if limits is not None:
+            limits.check_size(len(raw_message))
+
         message = cls()
 
-        # Split header/content (header > 2 linebreaks > content)
-        parts = re.match(r"^\s*([\S\s]*?)\r\n\r\n([\S\s]*)$", raw_message)
-        if not parts:
+        # Split header/content (header > 2 linebreaks > content), skipping any leading whitespace
+        start = TEXT_LEADING_WHITESPACE_RE.match(raw_message).end()
+        header_end = raw_message.find("\r\n\r\n", start)
+        if header_end == -1:
             raise SipParseError(
                 "Invalid SIP message format, couldn't find header/body division (header must be followed by 2 linebreaks)"
             )
 
-        message.content = parts.group(2)
-        lines = re.split(r"\r\n(?![ \t])", parts.group(1))
-        if not lines:  # Empty message
-            return
+        message.content = raw_message[header_end + 4 :]
+        if profiler is not None:
+            profiler.add_phase("sip.split", time.perf_counter() - started)
+
+        message.parse_head(raw_message[start:header_end], lazy, profile)
+
+        if profiler is not None:
+            profiler.add_message("sip", raw_message, time.perf_counter() - started)
+
+        return message
+
+    @classmethod
+    def from_bytes(
+        cls, raw_message: Union[bytes, bytearray, memoryview], lazy: bool = False, profile=None
+    ):
+        """ Parses a message straight from a bytes-like object (e.g a datagram read from a socket)
+
+            Only the header section gets decoded. The body is exposed through `body` as a memoryview
+            slice of raw_message (sized by Content-Length, if present), so it's neither copied nor
+            decoded unless `content` is accessed.
+        """
+
+        profiler = instrumentation.profiler
+        if profiler is not None:
+            started = time.perf_counter()
+
+        message = cls()
+        buffer = memoryview(raw_message).cast("B")
+        limits = parse_limits.active_limits
+        if limits is not None:
+            limits.check_size(len(buffer))
+
+        # Skip any leading whitespace, then find the header/body division in a single scan
+        start = LEADING_WHITESPACE_RE.match(buffer).end()
+        header_end = HEADER_END_RE.search(buffer, start)
+        if not header_end:
+            raise SipParseError(
+                "Invalid SIP message format, couldn't find header/body division (header must be followed by 2 linebreaks)"
+            )
+
+        try:
+            head = str(buffer[start : header_end.start()], "utf-8")
+        except UnicodeDecodeError as ex:
+            raise SipParseError(f"Invalid SIP message header encoding: {ex}")
+
+        if profiler is not None:
+            profiler.add_phase("sip.split", time.perf_counter() - started)
+
+        message.parse_head(head, lazy, profile)
+
+        body_start = header_end.end()
+        content_length = message.headers.get("content-length")
+        if content_length is None:
+            message.body = buffer[body_start:]
+        else:
+            if content_length < 0:
+                raise SipParseError(f"Invalid Content-Length ({content_length})")
+
+            if body_start + content_length > len(buffer):
+                raise SipParseError(
+                    f"Content-Length ({content_length}) exceeds the size of the received body"
+                )
+
+            message.body = buffer[body_start : body_start + content_length]
+
+        if profiler is not None:
+            profiler.add_message("sip", buffer, time.perf_counter() - started)
+
+        return message
+
+    # Alias, for those that think of it as "parsing a buffer"
+    from_buffer = from_bytes
+
+    @classmethod
+    def parse_many(cls, raw_messages, workers=None, chunksize=256, ordered=True):
+        """ Parses lots of messages (str or bytes) using a pool of processes.
+            Yields a BatchResult (index, message, error) per message, see batch.parse_many
+        """
+        return batch.parse_many(cls, raw_messages, workers, chunksize, ordered)
+
+    def parse_head(self, head: str, lazy: bool = False, profile=None):
+        """ Parses the start line and headers of a message (everything before the body)
+            In lazy mode, headers are just located and will be parsed when accessed (see LazyHeaders)
+            A profile chooses which headers get parsed, kept raw or dropped (see ParseProfile)
+        """
+        profiler = instrumentation.profiler
+        if profiler is not None:
+            started = time.perf_counter()
+
+        limits = parse_limits.active_limits
+        line_spans = iter_line_spans(head)
+        if limits is not None:
+            line_spans = limited_line_spans(line_spans, limits)
 
         # Is it a response?
-        response_parsed = parse_response(lines)
+        start_line = [head[slice(*next(line_spans))]]
+        response_parsed = parse_response(start_line)
         if response_parsed:
             # Yes, it is a response
-            message.type = message.TYPE_RESPONSE
-            message.version = response_parsed["version"]
-            message.status = response_parsed["status"]
-            message.reason = response_parsed["reason"]
+            self.type = self.TYPE_RESPONSE
+            self.version = response_parsed["version"]
+            self.status = response_parsed["status"]
+            self.reason = response_parsed["reason"]
         else:
             # We couldn't parse it as a response, it must be a request
-            request_parsed = parse_request(lines)
+            request_parsed = parse_request(start_line)
             if not request_parsed:
                 raise SipParseError(
                     "Invalid SIP message to parse, neither a response nor a request"
                 )
 
-            message.type = message.TYPE_REQUEST
-            message.version = request_parsed["version"]
-            message.method = request_parsed["method"]
-            message.uri = request_parsed["uri"]
+            self.type = self.TYPE_REQUEST
+            self.version = request_parsed["version"]
+            self.method = request_parsed["method"]
+            self.uri = request_parsed["uri"]
 
-        # Parse the headers
-        for line in lines[1:]:
-            header_match = re.match(r"^([\S]*?)\s*:\s*([\s\S]*)$", line)
+        if profiler is not None:
+            headers_start = time.perf_counter()
+            profiler.add_phase("sip.start_line", headers_start - started)
+
+        if lazy:
+            self.headers = LazyHeaders(head, profile)
+
+        if profile is not None:
+            parsers = profile.parsers
+            default_parser = profile.default_parser
+
+        # Raw values of the repeated headers joined once they've all been found (see joins_repeated)
+        repeated: Dict[str, List[str]] = {}
+
+        # Parse (or just locate) the headers
+        for start, end in line_spans:
+            header_match = HEADER_LINE_RE.match(head, start, end)
             if not header_match:
-                raise SipParseError("Invalid SIP header detected. Parsing line: %s" % line)
+                raise SipParseError(
+                    "Invalid SIP header detected. Parsing line: %s" % head[start:end]
+                )
 
-            name = urllib.parse.unquote(header_match.group(1)).lower()
-            if name in COMPACT_HEADERS:
-                name = COMPACT_HEADERS[name]  # Uncompress shorteners
+            name = header_name(header_match.group(1))  # Uncompresses shorteners too
+            parse = parse_header_value
+            if profile is not None:
+                parse = parsers.get(name, default_parser)
+                if parse is None:
+                    continue  # Dropped
+
+            if lazy:
+                self.headers.add_raw(name, header_match.start(2), header_match.end(2), start)
+            elif name in repeated:
+                repeated[name].append(header_match.group(2))
+            elif name in self.headers and joins_repeated(name, parse):
+                repeated[name] = [self.headers[name], header_match.group(2)]
+            else:
+                self.add_header_from_str(name, header_match.group(2), parse)
 
-            message.add_header_from_str(name, header_match.group(2))
+        for name, raw_values in repeated.items():
+            if profiler is None:
+                self.headers[name] = ",".join(raw_values)
+            else:
+                joined = time.perf_counter()
+                self.headers[name] = ",".join(raw_values)
+                profiler.add_header(name, time.perf_counter() - joined)
 
-        return message
+        if profiler is not None:
+            profiler.add_phase("sip.headers", time.perf_counter() - headers_start)
 
     def add_multi_header_from_str(self, name: str, raw_val: str):
         """ Extends or creates a multi-header
             Some headers (e.g Contact) can occur multiple times in the message, and must be parsed into a list of ocurrences.
         """
 
-        values: Union[str, List]  # [Type declaration]
-        if name == "contact":
-            if raw_val == "*":
-                values = "*"
-            else:
-                values, data = parse_multiheader(parse_aor, raw_val)
-        elif name in ("route", "record-route", "path"):
-            values, data = parse_multiheader(parse_aor_with_uri, raw_val)
-        elif name == "via":
-            values, data = parse_multiheader(parse_via, raw_val)
-        elif name in (
-            "www-authenticate",
-            "proxy-authenticate",
-            "authorization",
-            "proxy-authorization",
-        ):
-            values, data = parse_multiheader(parse_auth_header_with_scheme, raw_val)
-        else:
-            raise SipParseError(f"Don't know how to process header {name} as a multi-header")
-
-        # Make sure there's no leftover data after parsing (either we parsed wrong or the header is invalid, either way - bad)
-        if data:
-            raise SipParseError(f"Leftover data found after processing {name} header")
+        values = parse_multi_header_value(name, raw_val)
 
         # If we hadn't found this header before, create it. Otherwise, append to it
         if name not in self.headers:
@@ -195,48 +637,69 @@ class SipMessage:
 
         self.headers[name].extend(values)
 
-    def add_header_from_str(self, name: str, data: str):
-        if name in MULTI_INSTANCE_HEADER_NAMES:
-            self.add_multi_header_from_str(name, data)
-        elif name in ("to", "from", "refer-to"):
-            val, _ = parse_aor(data)
-            self.headers[name] = val
-        elif name == "cseq":
-            self.headers["cseq"] = parse_cseq(data)
-        elif name in ("content-length", "max-forwards"):
-            self.headers[name] = int(data)
-        elif name == "authentication-info":
-            # Directly parse auth header, without scheme
-            val, _ = parse_auth_header(data)
-            self.headers[name] = val
-        else:
-            # Generic header parsing (just key -> value)
-            if name in self.headers:  # Header existed, append
-                self.headers[name] += "," + data
-            else:
-                self.headers[name] = data
+    def add_header_from_str(self, name: str, data: str, parse=parse_header_value):
+        """ Parses a header line's value (with parse, see parse_header_value) into the headers """
+        profiler = instrumentation.profiler
+        if profiler is None:
+            self.headers[name] = parse(name, data, self.headers.get(name))
+            return
+
+        started = time.perf_counter()
+        self.headers[name] = parse(name, data, self.headers.get(name))
+        profiler.add_header(name, time.perf_counter() - started)
 
-    def stringify(self):
+    def write_head(self, out: List[str], content_length: int):
+        """ Writes the start line and the headers (up to the blank line before the body) into out """
         ver = self.version if self.version else "2.0"
         if self.type == self.TYPE_RESPONSE:
-            msg_str = f"SIP/{ver} {self.status} {self.reason}\r\n"
+            out.append(f"SIP/{ver} {self.status} {self.reason}\r\n")
         else:
-            uri = stringify_uri(self.uri)
-            msg_str = f"{self.method} {uri} SIP/{ver}\r\n"
+            out.append(self.method)
+            out.append(" ")
+            write_uri(out, self.uri)
+            out.append(f" SIP/{ver}\r\n")
+
+        self.headers["content-length"] = content_length
+        if isinstance(self.headers, LazyHeaders):
+            self.headers.write(out)  # Unmodified headers are copied as they were received
+        else:
+            for header_name, header_data in self.headers.items():
+                if header_data is None:
+                    continue
 
-        self.headers["content-length"] = len(self.content) or 0
-        for header_name, header_data in self.headers.items():
-            if header_data is None:
-                continue
+                write_header(out, header_name, header_data)
+                out.append("\r\n")
+
+        out.append("\r\n")
+
+    def body_bytes(self) -> Union[bytes, memoryview]:
+        """ The body, as it goes on the wire """
+        if self.body is not None:
+            return self.body
 
-            msg_str += stringify_header(header_name, header_data) + "\r\n"
+        return self.content.encode("utf-8")
 
-        msg_str += "\r\n"
+    def stringify(self) -> str:
+        content = self.content
+        # Content-Length counts bytes, not characters
+        content_length = len(content) if content.isascii() else len(self.body_bytes())
+
+        out: List[str] = []
+        self.write_head(out, content_length)
+        out.append(content)
+
+        return "".join(out)
+
+    def to_bytes(self) -> bytes:
+        """ Same as stringify(), but produces the bytes to send over the wire. The body is copied
+            as is (it's not decoded nor encoded if the message was parsed from bytes)
+        """
+        body = self.body_bytes()
 
-        if self.content:
-            msg_str += self.content
+        out: List[str] = []
+        self.write_head(out, len(body))
 
-        return msg_str
+        return b"".join(("".join(out).encode("utf-8"), body))
 
     def debug_print(self):
         import pprint
@@ -0,0 +1,130 @@
+""" Incremental (sans-IO) framing of SIP messages received over stream transports (TCP/TLS) """
+from typing import List, Optional, Callable, Union
+
+import re
+from sip_parser.sip_message import SipMessage
+from sip_parser.exceptions import SipParseError
+
+# Content-Length header (or its compact form), looked up in the header section of a message
+CONTENT_LENGTH_RE = re.compile(
+    rb"^(?:content-length|l)[ \t]*:\s*(\d+)", re.IGNORECASE | re.MULTILINE
+)
+
+
+class SipStreamParser:
+    """ Splits a stream of bytes into SIP messages, using Content-Length to frame them (RFC 3261, 18.3).
+
+        Data is provided as it arrives through `feed()`, which returns every message completed by it,
+        no matter how the stream was segmented. Bytes are never scanned twice, so the cost is
+        linear in the size of the stream regardless of how many messages it carries.
+
+        Double CRLF keepalives (RFC 5626) found between messages are consumed and reported through
+        on_keepalive (which should answer with a single CRLF pong). Single CRLF pongs are discarded.
+
+        Messages that are framed but can't be parsed are skipped by `feed()` (and counted in
+        parse_errors), without losing the ones around them.
+
+        A SipParseError is raised if the header section or the body of a message exceeds the
+        configured limits. The stream can't be recovered after that, so the connection should be closed.
+    """
+
+    DEFAULT_MAX_HEADER_SIZE = 64 * 1024
+    DEFAULT_MAX_BODY_SIZE = 1024 * 1024
+
+    def __init__(
+        self,
+        max_header_size: int = DEFAULT_MAX_HEADER_SIZE,
+        max_body_size: int = DEFAULT_MAX_BODY_SIZE,
+        lazy: bool = False,
+        on_keepalive: Optional[Callable[[], None]] = None,
+    ):
+        self.max_header_size = max_header_size
+        self.max_body_size = max_body_size
+        self.lazy = lazy
+        self.on_keepalive = on_keepalive
+        self.keepalives = 0  # Number of keepalive pings received
+        self.parse_errors = 0  # Number of messages that couldn't be parsed (see feed)
+
+        self.buffer = bytearray()
+        self._scan_pos = 0  # Where to resume looking for the end of the header section
+        self._message_end: Optional[int] = None  # Known once the header section has been found
+
+    def feed(self, chunk: Union[bytes, bytearray, memoryview]) -> List[SipMessage]:
+        """ Adds data received from the stream, and returns the messages it completed (if any) """
+        messages = []
+        for frame in self.feed_frames(chunk):
+            try:
+                messages.append(SipMessage.from_bytes(frame, self.lazy))
+            except (SipParseError, RuntimeError, ValueError):
+                self.parse_errors += 1
+
+        return messages
+
+    def feed_frames(self, chunk: Union[bytes, bytearray, memoryview]) -> List[bytes]:
+        """ Same as feed(), but returns the raw (unparsed) messages """
+        self.buffer += chunk
+
+        frames = []
+        frame = self.next_frame()
+        while frame is not None:
+            frames.append(frame)
+            frame = self.next_frame()
+
+        return frames
+
+    def next_frame(self) -> Optional[bytes]:
+        """ Extracts the next complete message from the buffer, if there's one """
+        buffer = self.buffer
+
+        if self._message_end is None:
+            self.skip_keepalives()
+
+            header_end = buffer.find(b"\r\n\r\n", self._scan_pos)
+            if header_end == -1:
+                if len(buffer) > self.max_header_size:
+                    raise SipParseError(
+                        f"Header section exceeds the maximum size ({self.max_header_size} bytes)"
+                    )
+
+                # Resume from here next time (the separator could be split across chunks)
+                self._scan_pos = max(0, len(buffer) - 3)
+                return None
+
+            if header_end > self.max_header_size:
+                raise SipParseError(
+                    f"Header section exceeds the maximum size ({self.max_header_size} bytes)"
+                )
+
+            # A missing Content-Length is taken as an empty body
+            content_length_match = CONTENT_LENGTH_RE.search(buffer, 0, header_end)
+            content_length = int(content_length_match.group(1)) if content_length_match else 0
+            if content_length > self.max_body_size:
+                raise SipParseError(
+                    f"Body exceeds the maximum size ({content_length} > {self.max_body_size} bytes)"
+                )
+
+            self._message_end = header_end + 4 + content_length
+
+        if len(buffer) < self._message_end:
+            return None  # The body is still incomplete
+
+        frame = bytes(buffer[: self._message_end])
+        del buffer[: self._message_end]
+        self._scan_pos = 0
+        self._message_end = None
+
+        return frame
+
+    def skip_keepalives(self):
+        """ Consumes the keepalive pings (CRLFCRLF) and pongs (CRLF) found before a message """
+        buffer = self.buffer
+        while buffer.startswith(b"\r\n"):
+            if buffer.startswith(b"\r\n\r\n"):
+                del buffer[:4]
+                self.keepalives += 1
+                if self.on_keepalive:
+                    self.on_keepalive()
+            elif len(buffer) > 2 and buffer[2] != ord("\r"):
+                del buffer[:2]  # A pong
+            else:
+                break  # Could be the beginning of a ping, wait for more data
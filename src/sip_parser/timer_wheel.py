@@ -0,0 +1,103 @@
+""" Hashed timing wheel, to keep huge amounts of (mostly cancelled) timers cheaply.
+
+    Timers are spread over a fixed ring of slots, one per tick: scheduling and cancelling a timer
+    are O(1), and every tick only looks at the timers of a single slot. Timers further away than a
+    whole turn of the wheel wait there for as many turns (rounds) as needed.
+    The precision of the timers is the duration of a tick.
+"""
+from typing import Any, Callable, Dict, List, Optional
+
+import asyncio
+import math
+import time
+
+
+class Timer:
+    """ A scheduled timer, which can be cancelled """
+
+    __slots__ = ("wheel", "slot", "rounds", "callback", "args")
+
+    def __init__(self, wheel: "TimerWheel", slot: int, rounds: int, callback: Callable, args):
+        self.wheel = wheel
+        self.slot: Optional[int] = slot  # None once fired or cancelled
+        self.rounds = rounds
+        self.callback = callback
+        self.args = args
+
+    @property
+    def active(self) -> bool:
+        return self.slot is not None
+
+    def cancel(self):
+        if self.slot is not None:
+            del self.wheel.slots[self.slot][self]
+            self.wheel.count -= 1
+            self.slot = None
+
+
+class TimerWheel:
+    """ Timers driven by advance(), which fires every timer due (by the clock) since the last call.
+        run() does so periodically on an asyncio loop (a single asyncio timer for all of them).
+    """
+
+    def __init__(
+        self, tick: float = 0.01, size: int = 512, clock: Callable[[], float] = time.monotonic
+    ):
+        self.tick = tick
+        self.size = size
+        self.clock = clock
+        self.start = clock()
+        self.current = 0  # Ticks processed so far
+        self.count = 0  # Active timers
+        # Dicts are used as (insertion ordered) sets, for O(1) removal of cancelled timers
+        self.slots: List[Dict[Timer, None]] = [{} for _ in range(size)]
+
+    def __len__(self):
+        return self.count
+
+    def schedule(self, delay: float, callback: Callable, *args: Any) -> Timer:
+        """ Calls callback(*args) after delay seconds (rounded up to the next tick) """
+        # (Tolerating floating point errors, so that e.g 0.05 is exactly 5 ticks of 0.01)
+        deadline = math.ceil((self.clock() - self.start + delay) / self.tick - 1e-6)
+        ticks = max(1, deadline - self.current)
+        slot = (self.current + ticks) % self.size
+        timer = Timer(self, slot, (ticks - 1) // self.size, callback, args)
+        self.slots[slot][timer] = None
+        self.count += 1
+        return timer
+
+    def advance(self, now: Optional[float] = None) -> int:
+        """ Fires the timers that are due, and returns how many of them were fired """
+        if now is None:
+            now = self.clock()
+
+        fired = 0
+        due = math.floor((now - self.start) / self.tick + 1e-6)
+        while self.current < due:
+            self.current += 1
+            slot_index = self.current % self.size
+            slot = self.slots[slot_index]
+            if not slot:
+                continue
+
+            for timer in list(slot):
+                if timer.slot != slot_index:
+                    continue  # Cancelled by a previous callback
+
+                if timer.rounds:
+                    timer.rounds -= 1
+                    continue
+
+                del slot[timer]
+                self.count -= 1
+                timer.slot = None
+                timer.callback(*timer.args)
+                fired += 1
+
+        return fired
+
+    async def run(self):
+        """ Advances the wheel every tick, forever (run it as a task, and cancel it to stop) """
+        while True:
+            await asyncio.sleep(self.tick)
+            self.advance()
@@ -0,0 +1,126 @@
+""" Fast extraction of the keys that identify the transaction/dialog of a raw SIP message.
+
+    Load balancers and dispatchers only need a handful of values to route a message (Call-ID,
+    CSeq, top Via, From/To tags). extract_keys looks for just those headers, and stops scanning as
+    soon as all of them have been found, without building a SipMessage.
+"""
+from typing import Union
+
+import collections
+import re
+from sip_parser.exceptions import SipParseError
+
+TransactionKeys = collections.namedtuple(
+    "TransactionKeys", "call_id cseq_seq cseq_method via_branch via_sent_by from_tag to_tag"
+)
+
+# Lines of the headers holding the keys (compact forms included), with their (unfolded) value.
+# Starting with the line break (rather than ^) lets the regex engine jump from line to line
+KEY_HEADER_RE = re.compile(
+    rb"\r\n(call-id|i|cseq|via|v|from|f|to|t)[ \t]*:[ \t]*([^\r\n]*(?:\r\n[ \t][^\r\n]*)*)",
+    re.IGNORECASE,
+)
+CSEQ_RE = re.compile(rb"(\d+)\s+(\S+)")
+# Sent-by (host and port) and params of the top Via
+VIA_RE = re.compile(rb"SIP\s*/\s*[^/\s]+\s*/\s*[^\s/]+\s+([^\s;,:]+)(?:\s*:\s*(\d+))?([^,]*)")
+BRANCH_RE = re.compile(rb";\s*branch\s*=\s*([^\s;,]+)", re.IGNORECASE)
+TAG_RE = re.compile(rb";\s*tag\s*=\s*([^\s;,]+)", re.IGNORECASE)
+HEADER_END_RE = re.compile(rb"\r\n\r\n")
+LEADING_WHITESPACE_RE = re.compile(rb"\s*")  # e.g CRLF keepalives
+
+CALL_ID = 0
+CSEQ = 1
+VIA = 2
+FROM = 3
+TO = 4
+KEY_HEADERS = {
+    b"call-id": CALL_ID,
+    b"i": CALL_ID,
+    b"cseq": CSEQ,
+    b"via": VIA,
+    b"v": VIA,
+    b"from": FROM,
+    b"f": FROM,
+    b"to": TO,
+    b"t": TO,
+}
+
+
+def extract_keys(raw_message: Union[bytes, bytearray, memoryview, str]) -> TransactionKeys:
+    """ Extracts the transaction/dialog keys of a raw message (any bytes-like object, or str).
+
+        Every key is returned as a str (cseq_seq as an int), or None if it's missing from the
+        message (e.g to_tag on dialog-creating requests). Only the top Via is taken into account.
+    """
+    if isinstance(raw_message, str):
+        raw_message = raw_message.encode("utf-8")
+
+    start = LEADING_WHITESPACE_RE.match(raw_message).end()
+    header_end = HEADER_END_RE.search(raw_message, start)
+    if not header_end:
+        raise SipParseError(
+            "Invalid SIP message format, couldn't find header/body division (header must be followed by 2 linebreaks)"
+        )
+
+    values = [None, None, None, None, None]
+    missing = 5
+    for m in KEY_HEADER_RE.finditer(raw_message, start, header_end.start()):
+        key = KEY_HEADERS[m.group(1).lower()]
+        if values[key] is None:
+            values[key] = m.group(2)
+            missing -= 1
+            if not missing:
+                break
+
+    call_id, cseq, via, from_value, to_value = values
+    cseq_seq = cseq_method = via_branch = via_sent_by = None
+
+    if cseq is not None:
+        cseq_match = CSEQ_RE.match(cseq)
+        if not cseq_match:
+            raise SipParseError("Could not parse CSeq header")
+
+        cseq_seq = int(cseq_match.group(1))
+        cseq_method = cseq_match.group(2).decode()
+
+    if via is not None:
+        via_match = VIA_RE.match(via)
+        if not via_match:
+            raise SipParseError("Could not parse Via header")
+
+        host, port, params = via_match.groups()
+        via_sent_by = (host + b":" + port if port else host).decode()
+        branch_match = BRANCH_RE.search(params)
+        if branch_match:
+            via_branch = branch_match.group(1).decode()
+
+    return TransactionKeys(
+        call_id.rstrip().decode() if call_id is not None else None,
+        cseq_seq,
+        cseq_method,
+        via_branch,
+        via_sent_by,
+        extract_tag(from_value),
+        extract_tag(to_value),
+    )
+
+
+def extract_call_id(raw_message: Union[bytes, bytearray, memoryview]) -> bytes:
+    """ Raw Call-ID of a message (empty if there's none), scanned just like in extract_keys """
+    start = LEADING_WHITESPACE_RE.match(raw_message).end()
+    header_end = HEADER_END_RE.search(raw_message, start)
+    end = header_end.start() if header_end else len(raw_message)
+    for m in KEY_HEADER_RE.finditer(raw_message, start, end):
+        if KEY_HEADERS[m.group(1).lower()] == CALL_ID:
+            return bytes(m.group(2).rstrip())
+
+    return b""
+
+
+def extract_tag(value: bytes):
+    """ Extracts the tag param of a From/To value (params within the <URI> are skipped) """
+    if value is None:
+        return None
+
+    tag_match = TAG_RE.search(value, value.rfind(b">") + 1)
+    return tag_match.group(1).decode() if tag_match else None
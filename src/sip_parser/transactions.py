@@ -0,0 +1,406 @@
+""" RFC 3261 (section 17) transaction layer: client and server, INVITE and non-INVITE transactions.
+
+    The layer matches every received message to its transaction, absorbing retransmissions (of
+    requests on the server side, of final responses on the client side), and retransmits
+    requests and responses itself over unreliable transports. Only the messages the transaction
+    user (TU) must see are passed up to it.
+
+    Timers (A to K) are kept in a TimerWheel, so that scheduling and cancelling them is O(1), and
+    transactions are compact __slots__ records: hundreds of thousands of them can be alive at once.
+"""
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from sip_parser.sip_message import SipMessage
+from sip_parser.timer_wheel import Timer, TimerWheel
+
+# Default values of the timers (RFC 3261, 17.1.1.1), in seconds
+T1 = 0.5
+T2 = 4.0
+T4 = 5.0
+
+# States
+CALLING = "calling"
+TRYING = "trying"
+PROCEEDING = "proceeding"
+COMPLETED = "completed"
+CONFIRMED = "confirmed"
+TERMINATED = "terminated"
+
+# Prefix of the branches of RFC 3261 compliant requests (RFC 3261, 8.1.1.7)
+MAGIC_COOKIE = "z9hG4bK"
+
+# Sends raw bytes to an address
+Transport = Callable[[bytes, Any], None]
+
+
+class TransactionUser:
+    """ What the layer passes up to the TU. Subclass it and override the methods needed """
+
+    def on_request(self, transaction: Optional["ServerTransaction"], request: SipMessage):
+        """ New request (transaction is None for ACKs of 2xx responses, which have none) """
+
+    def on_response(self, transaction: Optional["ClientTransaction"], response: SipMessage):
+        """ Response to a request (transaction is None for 2xx retransmissions, RFC 3261 17.1.1.2) """
+
+    def on_timeout(self, transaction: "Transaction"):
+        """ The request got no final response (client) or the response got no ACK (server) """
+
+
+def top_via(message: SipMessage):
+    return message.headers["via"][0]
+
+
+def client_key(message: SipMessage) -> Tuple[str, str]:
+    """ Key of the client transaction of a request/response (RFC 3261, 17.1.3) """
+    return top_via(message)["params"].get("branch"), message.headers["cseq"]["method"]
+
+
+def tag(aor: Any) -> Optional[str]:
+    return aor["params"].get("tag") if isinstance(aor, dict) else None
+
+
+def server_key(request: SipMessage) -> Tuple:
+    """ Key of the server transaction of a request (RFC 3261, 17.2.3). ACKs match INVITEs.
+
+        Only branches with the magic cookie are unique. Requests without one (RFC 2543 clients)
+        are matched by Request-URI, From tag, To tag, Call-ID, CSeq and top Via instead (the To
+        tag is left out for INVITEs, as their ACK carries the one of the response)
+    """
+    via = top_via(request)
+    sent_by = f"{via['host']}:{via['port']}" if via["port"] else via["host"]
+    method = "INVITE" if request.method == "ACK" else request.method
+    branch = via["params"].get("branch")
+    if branch and branch.startswith(MAGIC_COOKIE):
+        return branch, sent_by, method
+
+    headers = request.headers
+    to_tag = None if method == "INVITE" else tag(headers.get("to"))
+    return (
+        branch,
+        sent_by,
+        method,
+        request.uri,
+        tag(headers.get("from")),
+        to_tag,
+        headers.get("call-id"),
+        headers["cseq"]["seq"],
+    )
+
+
+class Transaction:
+    __slots__ = (
+        "layer",
+        "key",
+        "state",
+        "request",
+        "addr",
+        "wire",  # Bytes of the message being retransmitted (if any)
+        "interval",  # Current retransmission interval
+        "retransmit_timer",
+        "timeout_timer",
+    )
+
+    def __init__(self, layer: "TransactionLayer", key: Tuple, request: SipMessage, addr: Any):
+        self.layer = layer
+        self.key = key
+        self.request = request
+        self.addr = addr
+        self.state = ""
+        self.wire: Optional[bytes] = None
+        self.interval = layer.t1
+        self.retransmit_timer: Optional[Timer] = None
+        self.timeout_timer: Optional[Timer] = None
+
+    def send(self, wire: bytes):
+        self.wire = wire
+        self.layer.transport(wire, self.addr)
+
+    def start_retransmissions(self):
+        """ Starts retransmitting the last message sent (only over unreliable transports) """
+        if not self.layer.reliable:
+            self.interval = self.layer.t1
+            self.retransmit_timer = self.layer.wheel.schedule(self.interval, self.retransmit)
+
+    def retransmit(self):
+        self.layer.transport(self.wire, self.addr)
+        self.interval = self.next_interval()
+        self.retransmit_timer = self.layer.wheel.schedule(self.interval, self.retransmit)
+
+    def next_interval(self) -> float:
+        return min(self.interval * 2, self.layer.t2)
+
+    def start_timeout(self, delay: float, callback: Callable):
+        """ Starts the timer that ends the current state (fires right away if delay is 0) """
+        if self.timeout_timer:
+            self.timeout_timer.cancel()
+
+        if delay:
+            self.timeout_timer = self.layer.wheel.schedule(delay, callback)
+        else:
+            callback()
+
+    def stop_retransmissions(self):
+        if self.retransmit_timer:
+            self.retransmit_timer.cancel()
+            self.retransmit_timer = None
+
+    def time_out(self):
+        """ Timer B/F/H: the other end didn't answer """
+        if self.state != TERMINATED:
+            self.terminate()
+            self.layer.tu.on_timeout(self)
+
+    def terminate(self):
+        self.state = TERMINATED
+        self.stop_retransmissions()
+        if self.timeout_timer:
+            self.timeout_timer.cancel()
+            self.timeout_timer = None
+
+        self.layer.remove(self)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.key} {self.state}>"
+
+
+class ClientTransaction(Transaction):
+    __slots__ = ()
+
+    def start(self):
+        """ Sends the request, starting the retransmission (A/E) and timeout (B/F) timers """
+        self.send(self.request.to_bytes())
+        self.start_retransmissions()
+        self.start_timeout(64 * self.layer.t1, self.time_out)
+
+
+class ClientInviteTransaction(ClientTransaction):
+    """ RFC 3261, 17.1.1 """
+
+    __slots__ = ()
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.state = CALLING
+
+    def next_interval(self) -> float:
+        return self.interval * 2  # Timer A isn't capped by T2
+
+    def receive_response(self, response: SipMessage):
+        status = response.status
+        if self.state in (CALLING, PROCEEDING):
+            if status < 200:
+                self.state = PROCEEDING
+                self.stop_retransmissions()
+                if self.timeout_timer:  # Timer B only applies to the calling state
+                    self.timeout_timer.cancel()
+                    self.timeout_timer = None
+            elif status < 300:
+                self.terminate()  # The TU takes care of ACKing 2xx responses
+            else:
+                self.state = COMPLETED
+                self.stop_retransmissions()
+                self.send(self.build_ack(response).to_bytes())
+                self.start_timeout(0 if self.layer.reliable else 32, self.terminate)  # Timer D
+
+            self.layer.tu.on_response(self, response)
+        elif self.state == COMPLETED and status >= 300:
+            self.layer.transport(self.wire, self.addr)  # Retransmitted response: ACK it again
+
+    def build_ack(self, response: SipMessage) -> SipMessage:
+        """ ACK of a non-2xx final response (RFC 3261, 17.1.1.3) """
+        request_headers = self.request.headers
+        headers = {
+            "via": [top_via(self.request)],
+            "max-forwards": 70,
+            "to": response.headers["to"],
+            "from": request_headers["from"],
+            "call-id": request_headers["call-id"],
+            "cseq": {"seq": request_headers["cseq"]["seq"], "method": "ACK"},
+        }
+        if "route" in request_headers:
+            headers["route"] = request_headers["route"]
+
+        return SipMessage.from_dict(
+            {"method": "ACK", "uri": self.request.uri, "version": "2.0", "headers": headers}
+        )
+
+
+class ClientNonInviteTransaction(ClientTransaction):
+    """ RFC 3261, 17.1.2 """
+
+    __slots__ = ()
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.state = TRYING
+
+    def retransmit(self):
+        if self.state == PROCEEDING:
+            self.interval = self.layer.t2 / 2  # So that it's retransmitted every T2 from now on
+
+        super().retransmit()
+
+    def receive_response(self, response: SipMessage):
+        if self.state not in (TRYING, PROCEEDING):
+            return  # Retransmission of the final response
+
+        if response.status < 200:
+            self.state = PROCEEDING
+        else:
+            self.state = COMPLETED
+            self.stop_retransmissions()
+            self.start_timeout(0 if self.layer.reliable else self.layer.t4, self.terminate)  # K
+
+        self.layer.tu.on_response(self, response)
+
+
+class ServerTransaction(Transaction):
+    """ Base of the server transactions, which the TU answers with respond(response) """
+
+    __slots__ = ()
+
+
+class ServerInviteTransaction(ServerTransaction):
+    """ RFC 3261, 17.2.1 """
+
+    __slots__ = ()
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.state = PROCEEDING
+
+    def receive_request(self, request: SipMessage):
+        if request.method == "ACK":
+            if self.state == COMPLETED:
+                self.state = CONFIRMED
+                self.stop_retransmissions()
+                self.start_timeout(0 if self.layer.reliable else self.layer.t4, self.terminate)  # I
+        elif self.state in (PROCEEDING, COMPLETED) and self.wire is not None:
+            self.layer.transport(self.wire, self.addr)  # Retransmitted request
+
+    def respond(self, response: SipMessage):
+        if self.state != PROCEEDING:
+            return
+
+        self.send(response.to_bytes())
+        if response.status >= 300:
+            self.state = COMPLETED
+            self.start_retransmissions()  # Timer G
+            self.start_timeout(64 * self.layer.t1, self.time_out)  # Timer H
+        elif response.status >= 200:
+            self.terminate()  # 2xx are retransmitted by the TU
+
+
+class ServerNonInviteTransaction(ServerTransaction):
+    """ RFC 3261, 17.2.2 """
+
+    __slots__ = ()
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.state = TRYING
+
+    def receive_request(self, request: SipMessage):
+        if self.state in (PROCEEDING, COMPLETED):
+            self.layer.transport(self.wire, self.addr)  # Retransmitted request
+
+    def respond(self, response: SipMessage):
+        if self.state not in (TRYING, PROCEEDING):
+            return
+
+        self.send(response.to_bytes())
+        if response.status < 200:
+            self.state = PROCEEDING
+        else:
+            self.state = COMPLETED
+            self.start_timeout(
+                0 if self.layer.reliable else 64 * self.layer.t1, self.terminate
+            )  # J
+
+
+class TransactionLayer:
+    """ Keeps the transactions alive, and routes the received messages to them.
+
+        transport(bytes, addr) sends messages on the wire. reliable tells whether it's a reliable
+        transport (TCP/TLS: no retransmissions, and no waiting for them). Incoming messages are
+        handed over through receive(), and new client transactions are started with send_request().
+        The timer wheel must be advanced periodically (e.g running wheel.run() on asyncio).
+    """
+
+    def __init__(
+        self,
+        transport: Transport,
+        tu: TransactionUser,
+        reliable: bool = False,
+        wheel: Optional[TimerWheel] = None,
+        t1: float = T1,
+        t2: float = T2,
+        t4: float = T4,
+    ):
+        self.transport = transport
+        self.tu = tu
+        self.reliable = reliable
+        self.wheel = wheel if wheel is not None else TimerWheel()
+        self.t1 = t1
+        self.t2 = t2
+        self.t4 = t4
+        self.client_transactions: Dict[Tuple, ClientTransaction] = {}
+        self.server_transactions: Dict[Tuple, ServerTransaction] = {}
+        self.absorbed = 0  # Retransmissions absorbed (not passed up to the TU)
+        self.invalid = 0  # Messages dropped for lacking a Via or CSeq
+
+    def __len__(self):
+        return len(self.client_transactions) + len(self.server_transactions)
+
+    def send_request(self, request: SipMessage, addr: Any) -> ClientTransaction:
+        """ Starts a client transaction sending the request (which must have a Via with a branch) """
+        cls = ClientInviteTransaction if request.method == "INVITE" else ClientNonInviteTransaction
+        transaction = cls(self, client_key(request), request, addr)
+        self.client_transactions[transaction.key] = transaction
+        transaction.start()
+        return transaction
+
+    def receive(self, message: SipMessage, addr: Any):
+        """ Hands a received message over to its transaction (or to the TU, if it starts one).
+            Messages that can't be matched to a transaction (no Via or CSeq) are dropped
+        """
+        headers = message.headers
+        if not headers.get("via") or not headers.get("cseq"):
+            self.invalid += 1
+            return
+
+        if message.type == SipMessage.TYPE_RESPONSE:
+            client_transaction = self.client_transactions.get(client_key(message))
+            if client_transaction is None:
+                self.tu.on_response(None, message)  # e.g 2xx retransmissions
+                return
+
+            state = client_transaction.state
+            client_transaction.receive_response(message)
+            if state == COMPLETED:
+                self.absorbed += 1
+
+            return
+
+        key = server_key(message)
+        server_transaction = self.server_transactions.get(key)
+        if server_transaction is not None:
+            if message.method != "ACK":
+                self.absorbed += 1
+
+            server_transaction.receive_request(message)
+        elif message.method == "ACK":
+            self.tu.on_request(None, message)  # ACK of a 2xx, which belongs to the dialog
+        else:
+            cls = ServerInviteTransaction if key[2] == "INVITE" else ServerNonInviteTransaction
+            server_transaction = self.server_transactions[key] = cls(self, key, message, addr)
+            self.tu.on_request(server_transaction, message)
+
+    def remove(self, transaction: Transaction):
+        transactions = (
+            self.client_transactions
+            if isinstance(transaction, ClientTransaction)
+            else self.server_transactions
+        )
+        if transactions.get(transaction.key) is transaction:
+            del transactions[transaction.key]
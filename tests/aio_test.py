@@ -0,0 +1,191 @@
+import asyncio
+import textwrap
+from sip_parser.aio import serve_tcp, serve_udp
+from sip_parser.sip_message import SipMessage
+from sip_parser.stream_parser import SipStreamParser
+
+
+def prepare_msg(msg: str):
+    # Message lines must be CRLF-terminated and not indented
+    return textwrap.dedent(msg).replace("\n", "\r\n").encode()
+
+
+def options_request(seq: int):
+    return prepare_msg(
+        f"""\
+        OPTIONS sip:bob@example.com SIP/2.0
+        Via: SIP/2.0/TCP 127.0.0.1;branch=z9hG4bK{seq}
+        CSeq: {seq} OPTIONS
+        Content-Length: 0
+
+        """
+    )
+
+
+async def reply_ok(message: SipMessage, peer):
+    response = SipMessage.from_dict(
+        {"status": 200, "reason": "OK", "headers": {"cseq": message.headers["cseq"]}}
+    )
+    peer.send(response)
+
+
+def test_tcp_loopback_load():
+    num_clients, num_requests = 100, 20
+
+    async def client(port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"".join(options_request(seq) for seq in range(num_requests)))
+
+        parser = SipStreamParser()
+        responses = []
+        while len(responses) < num_requests:
+            responses.extend(parser.feed(await reader.read(65536)))
+
+        writer.close()
+        return [response.headers["cseq"]["seq"] for response in responses]
+
+    async def run():
+        server = await serve_tcp(reply_ok, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            return await asyncio.gather(*(client(port) for _ in range(num_clients)))
+        finally:
+            server.close()
+
+    results = asyncio.run(run())
+
+    # Responses arrive in order, on every connection
+    assert results == [list(range(num_requests))] * num_clients
+
+
+def test_tcp_backpressure():
+    async def run():
+        release = asyncio.Event()
+        protocols = []
+
+        async def slow_handler(message, peer):
+            protocols.append(peer)
+            await release.wait()
+
+        server = await serve_tcp(slow_handler, "127.0.0.1", 0, max_queue=4)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        for seq in range(50):
+            writer.write(options_request(seq))
+            await asyncio.sleep(0)
+
+        await asyncio.sleep(0.1)
+        protocol = protocols[0]
+        paused_while_blocked = protocol.reading_paused
+
+        release.set()
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if len(protocols) == 50:
+                break
+
+        writer.close()
+        server.close()
+        return paused_while_blocked, protocol.reading_paused, len(protocols)
+
+    paused_while_blocked, paused_after, handled = asyncio.run(run())
+
+    assert paused_while_blocked
+    assert not paused_after
+    assert handled == 50
+
+
+def test_udp_loopback():
+    async def run():
+        loop = asyncio.get_event_loop()
+        transport, _ = await serve_udp(reply_ok, "127.0.0.1", 0)
+        port = transport.get_extra_info("sockname")[1]
+
+        responses: asyncio.Queue = asyncio.Queue()
+
+        class Client(asyncio.DatagramProtocol):
+            def datagram_received(self, data, addr):
+                responses.put_nowait(SipMessage.from_bytes(data))
+
+        client_transport, _ = await loop.create_datagram_endpoint(
+            Client, remote_addr=("127.0.0.1", port)
+        )
+        for seq in range(10):
+            client_transport.sendto(options_request(seq))
+
+        received = [await asyncio.wait_for(responses.get(), 5) for _ in range(10)]
+        client_transport.close()
+        transport.close()
+        return received
+
+    received = asyncio.run(run())
+
+    assert sorted(response.headers["cseq"]["seq"] for response in received) == list(range(10))
+    assert all(response.status == 200 for response in received)
+
+
+def failing_once_handler(handled):
+    async def handler(message, peer):
+        handled.append(message.headers["cseq"]["seq"])
+        if len(handled) == 1:
+            raise ValueError("Handler failure")
+
+    return handler
+
+
+async def wait_for_length(items, length):
+    for _ in range(100):
+        if len(items) >= length:
+            break
+
+        await asyncio.sleep(0.01)
+
+
+def test_tcp_handler_errors():
+    async def run():
+        handled = []
+        protocols = []
+
+        async def handler(message, peer):
+            protocols.append(peer)
+            await handle(message, peer)
+
+        handle = failing_once_handler(handled)
+        server = await serve_tcp(handler, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"".join(options_request(seq) for seq in range(5)))
+        await wait_for_length(handled, 5)
+
+        writer.close()
+        server.close()
+        return handled, protocols[0].handler_errors
+
+    handled, handler_errors = asyncio.run(run())
+
+    # The connection keeps handling messages after the handler raised
+    assert handled == list(range(5))
+    assert handler_errors == 1
+
+
+def test_udp_handler_errors():
+    async def run():
+        loop = asyncio.get_event_loop()
+        handled = []
+        transport, protocol = await serve_udp(failing_once_handler(handled), "127.0.0.1", 0)
+        port = transport.get_extra_info("sockname")[1]
+        client_transport, _ = await loop.create_datagram_endpoint(
+            asyncio.DatagramProtocol, remote_addr=("127.0.0.1", port)
+        )
+        for seq in range(5):
+            client_transport.sendto(options_request(seq))
+
+        await wait_for_length(handled, 5)
+        client_transport.close()
+        transport.close()
+        return handled, protocol.handler_errors
+
+    handled, handler_errors = asyncio.run(run())
+
+    assert sorted(handled) == list(range(5))
+    assert handler_errors == 1
@@ -0,0 +1,98 @@
+import pickle
+import textwrap
+import pytest
+from sip_parser.sip_message import SipMessage, SipParseError
+from sip_parser.sdp_message import SdpMessage
+
+
+def prepare_msg(msg: str):
+    # Message lines must be CRLF-terminated and not indented
+    return textwrap.dedent(msg).replace("\n", "\r\n")
+
+
+def build_messages(count: int):
+    messages = []
+    for seq in range(count):
+        if seq % 10 == 3:
+            messages.append("NOT A SIP MESSAGE\r\n\r\n")
+            continue
+
+        msg = prepare_msg(
+            f"""\
+            MESSAGE sip:bob@example.com SIP/2.0
+            Via: SIP/2.0/UDP 192.0.2.2;branch=z9hG4bK{seq}
+            CSeq: {seq} MESSAGE
+            Content-Length: 2
+
+            Hi"""
+        )
+        # Mix strings and bytes
+        messages.append(msg.encode() if seq % 2 else msg)
+
+    return messages
+
+
+def check_results(results, count):
+    assert len(results) == count
+    for result in results:
+        if result.index % 10 == 3:
+            assert result.message is None
+            assert isinstance(result.error, SipParseError)
+        else:
+            assert result.error is None
+            assert result.message.headers["cseq"]["seq"] == result.index
+            assert result.message.content == "Hi"
+
+
+def test_parse_many_in_process():
+    results = list(SipMessage.parse_many(build_messages(50), workers=1, chunksize=7))
+
+    assert [result.index for result in results] == list(range(50))
+    check_results(results, 50)
+
+
+def test_parse_many_ordered():
+    results = list(SipMessage.parse_many(build_messages(200), workers=2, chunksize=16))
+
+    assert [result.index for result in results] == list(range(200))
+    check_results(results, 200)
+
+
+def test_parse_many_unordered():
+    results = list(
+        SipMessage.parse_many(iter(build_messages(200)), workers=2, chunksize=16, ordered=False)
+    )
+
+    check_results(sorted(results, key=lambda result: result.index), 200)
+
+
+def test_parse_many_memoryviews():
+    messages = [
+        memoryview(msg.encode() if isinstance(msg, str) else msg) for msg in build_messages(40)
+    ]
+    results = list(SipMessage.parse_many(messages, workers=2, chunksize=8))
+
+    check_results(results, 40)
+
+
+def test_parse_many_invalid_chunksize():
+    with pytest.raises(ValueError):
+        SipMessage.parse_many(build_messages(10), workers=1, chunksize=0)
+
+
+def test_parse_many_sdp():
+    sdp = "v=0\no=jdoe 2890844526 2890842807 IN IP4 10.47.16.5\ns=\nt=2873397496 2873404696"
+    results = list(SdpMessage.parse_many([sdp, sdp.encode(), "v=1"], workers=2, chunksize=1))
+
+    assert [result.index for result in results] == [0, 1, 2]
+    assert results[0].message.session_description_fields["o"].username == "jdoe"
+    assert results[1].message.session_description_fields["o"].username == "jdoe"
+    assert results[2].error is not None
+
+
+def test_pickle_message_from_bytes():
+    sip_msg = SipMessage.from_bytes(build_messages(2)[1])
+    unpickled = pickle.loads(pickle.dumps(sip_msg))
+
+    assert bytes(unpickled.body) == b"Hi"
+    assert unpickled.headers == sip_msg.headers
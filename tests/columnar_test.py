@@ -0,0 +1,86 @@
+import array
+import textwrap
+import pytest
+from sip_parser.columnar import ColumnarBatch, extract_columns, MISSING, FIELDS
+from sip_parser.exceptions import SipParseError
+
+
+def prepare_msg(msg: str):
+    # Message lines must be CRLF-terminated and not indented
+    return textwrap.dedent(msg).replace("\n", "\r\n").encode()
+
+
+INVITE = prepare_msg(
+    """\
+    INVITE sip:bob@biloxi.com SIP/2.0
+    v: SIP/2.0/UDP pc33.atlanta.com:5060;branch=z9hG4bK776asdhds
+    Max-Forwards: 70
+    To: Bob <sip:bob@biloxi.com>
+    From: "Alice" <sips:alice:secret@atlanta.com;transport=tls>;tag=1928301774
+    Call-ID: a84b4c76e66710@pc33.atlanta.com
+    CSeq: 314159 INVITE
+    Content-Length: 0
+
+    """
+)
+
+BUSY = prepare_msg(
+    """\
+    SIP/2.0 486 Busy Here
+    Via: SIP/2.0/UDP pc33.atlanta.com;branch=z9hG4bK776asdhds
+    To: sip:biloxi.com;tag=a6c85cf
+    From: "Alice" <sips:alice:secret@atlanta.com;transport=tls>;tag=1928301774
+    Call-ID: a84b4c76e66710@pc33.atlanta.com
+    CSeq: 314159 INVITE
+    Content-Length: 0
+
+    """
+)
+
+
+def test_extract_columns():
+    batch = extract_columns([INVITE, bytearray(BUSY), memoryview(INVITE)], fields=FIELDS)
+    assert len(batch) == 3
+    columns = batch.columns
+    assert columns["type"] == array.array("q", [0, 1, 0])
+    assert columns["status"] == array.array("q", [MISSING, 486, MISSING])
+    assert columns["cseq_seq"] == array.array("q", [314159] * 3)
+
+    assert [columns["method"][row] for row in range(3)] == ["INVITE", None, "INVITE"]
+    assert columns["method"].codes == array.array("i", [0, MISSING, 0])
+    assert columns["cseq_method"].values == ["INVITE"]
+    assert columns["call_id"].values == ["a84b4c76e66710@pc33.atlanta.com"]
+    assert columns["from_user"][1] == "alice"
+    assert columns["from_host"][1] == "atlanta.com"
+    assert [columns["to_user"][row] for row in range(3)] == ["bob", None, "bob"]
+    assert columns["to_host"][1] == "biloxi.com"
+    assert columns["via_host"].counts() == {"pc33.atlanta.com": 3}
+    assert columns["method"].counts() == {"INVITE": 2, None: 1}
+
+
+def test_chosen_fields_only():
+    batch = ColumnarBatch(fields=("status", "via_host"))
+    batch.append(BUSY)
+    assert list(batch.columns) == ["status", "via_host"]
+    assert batch.columns["status"][0] == 486
+
+    with pytest.raises(ValueError):
+        ColumnarBatch(fields=("status", "color"))
+
+
+def test_invalid_messages():
+    with pytest.raises(SipParseError):
+        extract_columns([b"garbage\r\n\r\n"])
+
+    batch = extract_columns(
+        [b"garbage\r\n\r\n", INVITE, b"INVITE sip:bob SIP/2.0\r\n"], skip_invalid=True
+    )
+    assert batch.invalid == 2
+    assert len(batch) == 1
+
+
+def test_to_numpy():
+    numpy = pytest.importorskip("numpy")
+    arrays = extract_columns([INVITE, BUSY]).to_numpy()
+    assert (arrays["status"] == numpy.array([MISSING, 486])).all()
+    assert arrays["method"].dtype == numpy.int32
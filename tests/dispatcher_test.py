@@ -0,0 +1,117 @@
+import multiprocessing
+import os
+import socket
+import textwrap
+import threading
+from sip_parser.dispatcher import Dispatcher, extract_call_id, shard_for
+
+
+def prepare_msg(msg: str):
+    # Message lines must be CRLF-terminated and not indented
+    return textwrap.dedent(msg).replace("\n", "\r\n").encode()
+
+
+def message(call_id: str, seq: int, compact: bool = False):
+    call_id_header = "i" if compact else "Call-ID"
+    return prepare_msg(
+        f"""\
+        MESSAGE sip:bob@example.com SIP/2.0
+        Via: SIP/2.0/UDP 192.0.2.2;branch=z9hG4bK{seq}
+        {call_id_header}: {call_id}
+        CSeq: {seq} MESSAGE
+        Content-Length: 2
+
+        Hi"""
+    )
+
+
+class Collector:
+    """ Handler reporting which worker handled every message """
+
+    def __init__(self, queue):
+        self.queue = queue
+
+    def __call__(self, message, addr):
+        self.queue.put((os.getpid(), message.headers["call-id"], message.headers["cseq"]["seq"]))
+
+
+class FaultyCollector(Collector):
+    """ Collector raising on CSeq 1, and exiting the worker on CSeq 3 """
+
+    def __call__(self, message, addr):
+        seq = message.headers["cseq"]["seq"]
+        if seq == 1:
+            raise ValueError("Handler failure")
+
+        if seq == 3:
+            raise SystemExit(1)  # Not an Exception: the worker exits
+
+        super().__call__(message, addr)
+
+
+def test_extract_call_id():
+    assert extract_call_id(message("abc@192.0.2.2", 1)) == b"abc@192.0.2.2"
+    assert extract_call_id(message("abc@192.0.2.2", 1, compact=True)) == b"abc@192.0.2.2"
+    assert extract_call_id(b"OPTIONS sip:bob@example.com SIP/2.0\r\n\r\n") == b""
+    assert shard_for(b"abc@192.0.2.2", 4) == shard_for(b"abc@192.0.2.2", 4) < 4
+
+
+def test_dialog_affinity():
+    queue = multiprocessing.Queue()
+    call_ids = [f"call-{index}@192.0.2.2" for index in range(8)]
+    with Dispatcher(Collector(queue), workers=3, batch_size=4) as dispatcher:
+        for seq in range(10):
+            for call_id in call_ids:
+                dispatcher.dispatch(message(call_id, seq, compact=seq % 2), ("192.0.2.2", 5060))
+
+        dispatcher.dispatch(b"NOT A SIP MESSAGE\r\n\r\n")
+
+    results = [queue.get(timeout=5) for _ in range(80)]
+    for call_id in call_ids:
+        handled = [(pid, seq) for pid, result_call_id, seq in results if result_call_id == call_id]
+        assert len({pid for pid, _ in handled}) == 1  # Always the same worker
+        assert [seq for _, seq in handled] == list(range(10))  # In order
+
+    assert len({pid for pid, _, _ in results}) > 1
+
+
+def test_serve_sockets():
+    queue = multiprocessing.Queue()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    client = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    with Dispatcher(Collector(queue), workers=2) as dispatcher:
+        thread = threading.Thread(target=dispatcher.serve, args=([sock],))
+        thread.start()
+        client.sendto(b"\r\n\r\n", sock.getsockname())  # Keepalive
+        for seq in range(5):
+            client.sendto(message("abc@192.0.2.2", seq), sock.getsockname())
+
+        results = [queue.get(timeout=5) for _ in range(5)]
+        dispatcher.stop()
+        thread.join()
+
+    assert [seq for _, _, seq in results] == list(range(5))
+    assert dispatcher.dispatched == 5
+    sock.close()
+    client.close()
+
+
+def test_handler_errors_and_dead_workers():
+    queue = multiprocessing.Queue()
+    with Dispatcher(FaultyCollector(queue), workers=1, batch_size=1) as dispatcher:
+        for seq in range(3):
+            dispatcher.dispatch(message("abc@192.0.2.2", seq))
+
+        assert [queue.get(timeout=5)[2] for _ in range(2)] == [0, 2]
+        assert dispatcher.handler_errors == 1
+
+        dispatcher.dispatch(message("abc@192.0.2.2", 3))  # Kills the worker
+        process = dispatcher._processes[0]
+        process.join(5)
+        assert not process.is_alive()
+
+        dispatcher.dispatch(message("abc@192.0.2.2", 4))
+        assert queue.get(timeout=5)[2] == 4
+        assert dispatcher.worker_restarts == 1
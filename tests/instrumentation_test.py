@@ -0,0 +1,100 @@
+import textwrap
+import pytest
+from sip_parser.sip_message import SipMessage
+from sip_parser.sdp_message import SdpMessage
+from sip_parser import instrumentation
+from sip_parser.instrumentation import enable_profiling, disable_profiling
+
+
+def prepare_msg(msg: str):
+    # Message lines must be CRLF-terminated and not indented
+    return textwrap.dedent(msg).replace("\n", "\r\n")
+
+
+INVITE = prepare_msg(
+    """\
+    INVITE sip:bob@biloxi.com SIP/2.0
+    Via: SIP/2.0/UDP pc33.atlanta.com;branch=z9hG4bK776asdhds
+    Max-Forwards: 70
+    To: Bob <sip:bob@biloxi.com>
+    From: Alice <sip:alice@atlanta.com>;tag=1928301774
+    Call-ID: a84b4c76e66710@pc33.atlanta.com
+    CSeq: 314159 INVITE
+    Content-Length: 4
+
+    Hi!!"""
+)
+
+SDP = textwrap.dedent(
+    """\
+    v=0
+    o=jdoe 2890844526 2890842807 IN IP4 10.47.16.5
+    s=
+    t=0 0
+    m=audio 49170 RTP/AVP 0
+    """
+)
+
+
+@pytest.fixture
+def samples():
+    samples = []
+    yield enable_profiling(keep_slowest=2, callback=samples.append), samples
+    disable_profiling()
+
+
+def test_disabled_by_default():
+    assert instrumentation.profiler is None
+    SipMessage.from_string(INVITE)
+
+
+def test_profiling(samples):
+    profiler, samples = samples
+    SipMessage.from_string(INVITE)
+    SipMessage.from_bytes(INVITE.encode())
+    lazy_msg = SipMessage.from_string(INVITE, lazy=True)
+    lazy_msg.headers["via"]
+    SdpMessage.from_string(SDP)
+
+    snapshot = profiler.snapshot()
+    assert snapshot["messages"]["sip"]["count"] == 3
+    assert snapshot["messages"]["sip"]["bytes"] == 3 * len(INVITE)
+    assert snapshot["messages"]["sdp"]["count"] == 1
+    for phase in ("sip.split", "sip.start_line", "sip.headers"):
+        assert snapshot["phases"][phase]["count"] == 3
+
+    assert snapshot["headers"]["via"]["count"] == 3  # Parsed twice, and then once lazily
+    assert snapshot["headers"]["cseq"]["count"] == 2
+    assert snapshot["headers"]["via"]["max"] <= snapshot["headers"]["via"]["total"]
+
+    assert [sample.kind for sample in samples] == ["sip", "sip", "sip", "sdp"]
+    assert samples[0].size == len(INVITE)
+
+    slowest = profiler.slowest()
+    assert len(slowest) == 2
+    assert slowest[0].seconds >= slowest[1].seconds
+    assert all(isinstance(message.raw_message, (str, bytes)) for message in slowest)
+
+    exported = profiler.prometheus()
+    assert "# TYPE sip_parser_header_seconds_total counter\n" in exported
+    assert 'sip_parser_header_count{header="via"} 3\n' in exported
+    assert f'sip_parser_message_bytes_total{{kind="sip"}} {3 * len(INVITE)}\n' in exported
+
+    profiler.reset()
+    assert profiler.snapshot() == {"messages": {}, "phases": {}, "headers": {}}
+    assert profiler.slowest() == []
+
+
+def test_profiling_repeated_headers(samples):
+    profiler, _ = samples
+    msg = """\
+        OPTIONS sip:bob@biloxi.com SIP/2.0
+        Allow: INVITE
+        Allow: ACK
+        Allow: BYE
+
+        """
+    assert SipMessage.from_string(prepare_msg(msg)).headers["allow"] == "INVITE,ACK,BYE"
+
+    # The first line, and then the join of all of them
+    assert profiler.snapshot()["headers"]["allow"]["count"] == 2
@@ -0,0 +1,82 @@
+import textwrap
+import pytest
+from sip_parser.sip_message import SipMessage
+from sip_parser.helpers import interning
+from sip_parser.helpers.interning import (
+    enable_host_interning,
+    disable_host_interning,
+    intern_host,
+    intern_token,
+)
+
+
+def prepare_msg(msg: str):
+    # Message lines must be CRLF-terminated and not indented
+    return textwrap.dedent(msg).replace("\n", "\r\n")
+
+
+INVITE = """\
+    INVITE sip:bob@biloxi.com;transport=tcp SIP/2.0
+    v: SIP/2.0/TCP pc33.atlanta.com;branch=z9hG4bK{n}
+    Max-Forwards: 70
+    To: Bob <sip:bob@biloxi.com>
+    From: Alice <sip:alice@atlanta.com>;tag={n}
+    Call-ID: {n}@pc33.atlanta.com
+    CSeq: {n} INVITE
+    Route: <sip:p1.atlanta.com;lr>
+    Content-Length: 0
+
+    """
+
+
+@pytest.fixture
+def host_interning():
+    enable_host_interning()
+    yield
+    disable_host_interning()
+
+
+def parse(n: int) -> SipMessage:
+    return SipMessage.from_string(prepare_msg(INVITE.format(n="".join(map(str, [n, n])))))
+
+
+def test_vocabulary_is_shared():
+    msg_1, msg_2 = parse(1), parse(2)
+    for name_1, name_2 in zip(msg_1.headers, msg_2.headers):
+        assert name_1 is name_2
+
+    assert "via" in msg_1.headers  # Compact form
+    assert msg_1.method is msg_2.method
+    assert msg_1.version is msg_2.version
+    assert msg_1.headers["cseq"]["method"] is msg_2.headers["cseq"]["method"]
+
+    via_1, via_2 = msg_1.headers["via"][0], msg_2.headers["via"][0]
+    assert via_1["protocol"] is via_2["protocol"]
+    assert list(via_1["params"])[0] is list(via_2["params"])[0]
+    assert list(msg_1.headers["from"]["params"])[0] is list(msg_2.headers["from"]["params"])[0]
+
+    # Hosts are only interned on demand
+    assert intern_host("atlanta.com") == "atlanta.com"
+    assert intern_token("unknown-token") == "unknown-token"
+
+
+def test_host_interning(host_interning):
+    msg_1, msg_2 = parse(1), parse(2)
+    assert msg_1.headers["via"][0]["host"] is msg_2.headers["via"][0]["host"]
+    assert msg_1.headers["route"][0]["uri"]["host"] is msg_2.headers["route"][0]["uri"]["host"]
+
+
+def test_host_table_is_bounded():
+    enable_host_interning(maxsize=2)
+    try:
+        hosts = ["".join(["host", str(n), ".com"]) for n in range(3)]
+        for host in hosts:
+            intern_host(host)
+
+        assert len(interning.host_table) == 2
+        other = "".join(["host", "0", ".com"])
+        assert intern_host(other) is hosts[0]
+        other = "".join(["host", "2", ".com"])
+        assert intern_host(other) is other  # The table is full
+    finally:
+        disable_host_interning()
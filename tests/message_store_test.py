@@ -0,0 +1,124 @@
+import textwrap
+import pytest
+from sip_parser.message_store import SipMessageStore
+from sip_parser.exceptions import SipParseError
+
+
+def prepare_msg(msg: str):
+    # Message lines must be CRLF-terminated and not indented
+    return textwrap.dedent(msg).replace("\n", "\r\n").encode()
+
+
+INVITE = prepare_msg(
+    """\
+    INVITE sip:bob@biloxi.com SIP/2.0
+    Via: SIP/2.0/UDP pc33.atlanta.com;branch=z9hG4bK776asdhds
+    Max-Forwards: 70
+    To: Bob <sip:bob@biloxi.com>
+    From: Alice <sip:alice@atlanta.com>;tag=1928301774
+    i: a84b4c76e66710@pc33.atlanta.com
+    CSeq: 314159 INVITE
+    Content-Length: 4
+
+    Hi!!"""
+)
+
+RESPONSE = prepare_msg(
+    """\
+    SIP/2.0 180 Ringing
+    Via: SIP/2.0/UDP p1.biloxi.com;branch=z9hG4bK1,
+     SIP/2.0/UDP pc33.atlanta.com;branch=z9hG4bK776asdhds
+    To: Bob <sip:bob@biloxi.com>;tag=a6c85cf
+    From: Alice <sip:alice@atlanta.com>;tag=1928301774
+    Call-ID: a84b4c76e66710@pc33.atlanta.com
+    CSeq: 314159 INVITE
+    Content-Length: 0
+
+    """
+)
+
+
+def check_store(store: SipMessageStore):
+    assert len(store) == 2
+    assert store.raw(0) == INVITE
+    assert store.raw(-1) == RESPONSE
+    assert store.body(0) == b"Hi!!"
+
+    assert store.raw_header_values(0, "call-id") == ["a84b4c76e66710@pc33.atlanta.com"]
+    assert store.header_value(1, "cseq")["seq"] == 314159
+    assert len(store.header_value(1, "via")) == 2
+    assert store.header_value(1, "max-forwards") is None
+    assert store.header_value(0, "x-unknown") is None
+
+    invite, ringing = list(store)
+    assert invite.method == "INVITE"
+    assert invite.headers["call-id"] == "a84b4c76e66710@pc33.atlanta.com"
+    assert invite.content == "Hi!!"
+    assert ringing.status == 180
+
+    with pytest.raises(IndexError):
+        store[2]
+
+
+def test_store():
+    store = SipMessageStore()
+    assert store.append(b"\r\n" + INVITE) == 0
+    assert store.append(RESPONSE) == 1
+    check_store(store)
+
+
+def test_invalid_message():
+    store = SipMessageStore()
+    with pytest.raises(SipParseError):
+        store.append(b"INVITE sip:bob@biloxi.com SIP/2.0\r\nVia: x\r\n")
+
+    with pytest.raises(SipParseError):
+        store.append(b"INVITE sip:bob@biloxi.com SIP/2.0\r\nInvalid\r\n\r\n")
+
+    assert len(store) == 0
+    store.append(INVITE)
+    assert store.raw(0) == INVITE
+
+
+def test_file_backed_store(tmp_path):
+    path = str(tmp_path / "capture.sip")
+    with SipMessageStore(path) as store:
+        store.append(INVITE)
+        assert store.raw(0) == INVITE  # Readable before flushing
+        store.append(RESPONSE)
+        check_store(store)
+
+    with SipMessageStore(path) as store:
+        check_store(store)
+        store.append(INVITE)
+        assert store.raw(2) == INVITE
+
+    with SipMessageStore(path) as store:
+        assert len(store) == 3
+
+
+def test_header_names_with_line_breaks(tmp_path):
+    path = str(tmp_path / "capture.sip")
+    message = INVITE.replace(b"Max-Forwards: 70", b"X%0AEvil: 1")
+    with SipMessageStore(path) as store:
+        store.append(message)
+
+    with SipMessageStore(path) as store:
+        assert store.header_value(0, "call-id") == "a84b4c76e66710@pc33.atlanta.com"
+        assert store.header_value(0, "content-length") == 4
+        assert store.raw_header_values(0, "x\nevil") == ["1"]
+
+
+def test_mismatching_index(tmp_path):
+    path = str(tmp_path / "capture.sip")
+    with SipMessageStore(path) as store:
+        store.append(INVITE)
+
+    with open(path, "ab") as data_file:
+        data_file.write(b"garbage")
+
+    store = SipMessageStore.__new__(SipMessageStore)
+    with pytest.raises(SipParseError):
+        store.__init__(path)
+
+    assert store._file is None
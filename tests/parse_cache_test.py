@@ -0,0 +1,84 @@
+import textwrap
+import pytest
+from sip_parser.sip_message import SipMessage
+from sip_parser.helpers import parse_cache
+from sip_parser.helpers.parse_cache import (
+    enable_parse_cache,
+    disable_parse_cache,
+    parse_cache_stats,
+)
+from sip_parser.helpers.sip_parsers import parse_uri
+
+
+def prepare_msg(msg: str):
+    # Message lines must be CRLF-terminated and not indented
+    return textwrap.dedent(msg).replace("\n", "\r\n")
+
+
+@pytest.fixture
+def cache():
+    enable_parse_cache()
+    yield
+    disable_parse_cache()
+
+
+def test_disabled_by_default():
+    assert parse_cache.uri_cache is None
+    assert parse_cache_stats() is None
+    assert parse_uri("sip:alice@atlanta.com")["host"] == "atlanta.com"
+
+
+def test_cached_uri_parsing(cache):
+    enable_parse_cache(maxsize=2)
+    first = parse_uri("sip:proxy.atlanta.com;lr")
+    second = parse_uri("sip:proxy.atlanta.com;lr")
+    assert first == second
+    assert parse_cache_stats()["uri"] == {
+        "size": 1,
+        "maxsize": 2,
+        "hits": 1,
+        "misses": 1,
+        "evictions": 0,
+    }
+
+    # Callers get copies, the cached value can't be corrupted
+    first.params["lr"] = "corrupted"
+    second.host = "corrupted"
+    assert parse_uri("sip:proxy.atlanta.com;lr") == {
+        "schema": "sip",
+        "user": None,
+        "password": None,
+        "host": "proxy.atlanta.com",
+        "port": None,
+        "params": {"lr": None},
+        "headers": {},
+    }
+
+    # Least recently used values get evicted
+    parse_uri("sip:a.atlanta.com")
+    parse_uri("sip:b.atlanta.com")
+    assert parse_cache_stats()["uri"]["evictions"] == 1
+    assert "sip:proxy.atlanta.com;lr" not in parse_cache.uri_cache.entries
+
+
+def test_cached_route_headers(cache):
+    msg = """\
+        INVITE sip:bob@biloxi.com SIP/2.0
+        Record-Route: <sip:proxy.atlanta.com;lr>, <sip:edge.atlanta.com;lr>
+        Route: <sip:proxy.atlanta.com;lr>
+        Contact: *
+
+        """
+
+    disable_parse_cache()
+    uncached = SipMessage.from_string(prepare_msg(msg)).headers
+    enable_parse_cache()
+
+    first = SipMessage.from_string(prepare_msg(msg))
+    first.headers["record-route"][0]["uri"]["params"]["lr"] = "corrupted"
+    second = SipMessage.from_string(prepare_msg(msg))
+
+    assert second.headers == uncached
+    assert second.headers["contact"] == ["*"]
+    assert parse_cache_stats()["header"]["misses"] == 3
+    assert parse_cache_stats()["header"]["hits"] == 3
@@ -0,0 +1,127 @@
+import textwrap
+import time
+import pytest
+from sip_parser.sip_message import SipMessage
+from sip_parser.sdp_message import SdpMessage
+from sip_parser.exceptions import SipParseError, ParseLimitError
+from sip_parser.parse_limits import ParseLimits, enable_hardened_parsing, disable_hardened_parsing
+
+
+def prepare_msg(msg: str):
+    # Message lines must be CRLF-terminated and not indented
+    return textwrap.dedent(msg).replace("\n", "\r\n")
+
+
+START = "INVITE sip:bob@biloxi.com SIP/2.0\r\n"
+INVITE = prepare_msg(
+    """\
+    INVITE sip:bob@biloxi.com SIP/2.0
+    Via: SIP/2.0/UDP pc33.atlanta.com;branch=z9hG4bK776asdhds
+    To: Bob <sip:bob@biloxi.com>
+    From: Alice <sip:alice@atlanta.com>;tag=1928301774
+    Call-ID: a84b4c76e66710@pc33.atlanta.com
+    CSeq: 314159 INVITE
+    Content-Length: 0
+
+    """
+)
+
+
+@pytest.fixture
+def hardened():
+    limits = ParseLimits(max_message_size=2048, max_headers=16, max_line_length=256, max_params=8)
+    enable_hardened_parsing(limits)
+    yield limits
+    disable_hardened_parsing()
+
+
+def test_disabled_by_default():
+    raw = START + "".join(f"X-H{i}: {i}\r\n" for i in range(200)) + "\r\n"
+    assert len(SipMessage.from_string(raw).headers) == 200
+
+
+def test_valid_message(hardened):
+    msg = SipMessage.from_string(INVITE)
+    assert msg.headers["call-id"] == "a84b4c76e66710@pc33.atlanta.com"
+    assert SipMessage.from_bytes(INVITE.encode()).headers["cseq"].seq == 314159
+
+
+def test_message_too_big(hardened):
+    raw = INVITE + "a" * 2048
+    with pytest.raises(ParseLimitError):
+        SipMessage.from_string(raw)
+    with pytest.raises(ParseLimitError):
+        SipMessage.from_bytes(raw.encode())
+    with pytest.raises(ParseLimitError):
+        SdpMessage.from_string("v=0\r\n" + "a=x\r\n" * 1000)
+
+
+def test_too_many_headers(hardened):
+    raw = START + "X-A: a\r\n" * 16 + "\r\n"
+    with pytest.raises(ParseLimitError):
+        SipMessage.from_string(raw)
+    with pytest.raises(ParseLimitError):
+        SipMessage.from_string(raw, lazy=True)
+
+
+def test_line_too_long(hardened):
+    with pytest.raises(ParseLimitError):
+        SipMessage.from_string(START + "Subject: " + "a" * 256 + "\r\n\r\n")
+
+
+def test_too_many_params(hardened):
+    params = "".join(f";p{i}=1" for i in range(9))
+    uri_headers = "&".join(f"h{i}=1" for i in range(9))
+    for header in (
+        f"To: <sip:bob@biloxi.com>{params}",
+        f"Route: <sip:p1.example.com{params}>",
+        f"Route: <sip:p1.example.com?{uri_headers}>",
+        "Authorization: Digest " + ",".join(f"p{i}=1" for i in range(9)),
+    ):
+        with pytest.raises(ParseLimitError):
+            SipMessage.from_string(START + header + "\r\n\r\n")
+
+
+def test_limit_error_is_parse_error(hardened):
+    with pytest.raises(SipParseError):
+        SipMessage.from_string(START + "X-A: a\r\n" * 16 + "\r\n")
+
+
+def test_aor_whitespace():
+    msg = SipMessage.from_string(START + "To: Bob < sip:bob@biloxi.com >\r\n\r\n")
+    assert msg.headers["to"].uri == "sip:bob@biloxi.com"
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        START + "To: <" + " " * 20000 + "\r\n\r\n",
+        " " * 100000 + "INVITE",
+        START + "Route: <sip:p1.example.com" + " " * 20000 + "\r\n\r\n",
+    ],
+    ids=["unclosed_name_addr", "leading_whitespace", "unclosed_uri"],
+)
+def test_adversarial_messages_fail_fast(raw):
+    # These used to backtrack for ages (or take quadratic time)
+    start = time.perf_counter()
+    try:
+        SipMessage.from_string(raw)
+    except (SipParseError, RuntimeError):
+        pass
+    assert time.perf_counter() - start < 1
+
+
+def test_repeated_headers_are_joined():
+    raw = (
+        START + "X-A: a\r\nSubject: s\r\nX-A: b\r\nTo: <sip:a@b>\r\nX-A: c\r\nTo: <sip:c@d>\r\n\r\n"
+    )
+    for lazy in (False, True):
+        headers = SipMessage.from_string(raw, lazy=lazy).headers
+        assert headers["x-a"] == "a,b,c"
+        assert headers["subject"] == "s"
+        assert headers["to"]["uri"] == "sip:c@d"  # Parsed single headers replace the previous one
+
+    raw = START + "X-A: a\r\n" * 20000 + "\r\n"
+    start = time.perf_counter()
+    assert SipMessage.from_string(raw).headers["x-a"] == ",".join(["a"] * 20000)
+    assert time.perf_counter() - start < 1
@@ -0,0 +1,100 @@
+import textwrap
+import pytest
+from sip_parser.sip_message import SipMessage, parse_header_value
+from sip_parser.parse_profile import ParseProfile, STRUCTURED, RAW, DROP
+
+
+def prepare_msg(msg: str):
+    # Message lines must be CRLF-terminated and not indented
+    return textwrap.dedent(msg).replace("\n", "\r\n")
+
+
+REGISTER = prepare_msg(
+    """\
+    REGISTER sip:registrar.biloxi.com SIP/2.0
+    Via: SIP/2.0/UDP bobspc.biloxi.com:5060;branch=z9hG4bKnashds7
+    v: SIP/2.0/UDP proxy.biloxi.com;branch=z9hG4bK4b43c2ff8.1
+    To: Bob <sip:bob@biloxi.com>
+    From: Bob <sip:bob@biloxi.com>;tag=456248
+    Call-ID: 843817637684230@998sdasdh09
+    CSeq: 1826 REGISTER
+    Contact: <sip:bob@192.0.2.4>
+    Authorization: Digest username="bob", realm="atlanta.example.com", nonce="ea9c8e88df84f1cec4341ae6cbe5a359", response="dfe56131d1958046689d83306477ecc"
+    X-Custom: a
+    X-Custom: b
+    Content-Length: 0
+
+    """
+)
+
+
+def test_structured_raw_and_dropped_headers():
+    profile = ParseProfile(raw=["Via", "To"], drop=["authorization"])
+    msg = SipMessage.from_string(REGISTER, profile=profile)
+    assert msg.headers["via"] == [
+        "SIP/2.0/UDP bobspc.biloxi.com:5060;branch=z9hG4bKnashds7",
+        "SIP/2.0/UDP proxy.biloxi.com;branch=z9hG4bK4b43c2ff8.1",
+    ]
+    assert msg.headers["to"] == "Bob <sip:bob@biloxi.com>"
+    assert "authorization" not in msg.headers
+    assert msg.headers["from"]["params"] == {"tag": "456248"}
+    assert msg.headers["cseq"].seq == 1826
+    assert msg.headers["x-custom"] == "a,b"
+
+
+def test_default_action():
+    profile = ParseProfile(structured=["cseq", "contact"], default=DROP)
+    msg = SipMessage.from_bytes(REGISTER.encode(), profile=profile)
+    assert list(msg.headers) == ["cseq", "contact", "content-length"]
+    assert msg.headers["contact"][0]["uri"] == "sip:bob@192.0.2.4"
+
+    profile = ParseProfile(default=RAW)
+    assert SipMessage.from_string(REGISTER, profile=profile).headers["cseq"] == "1826 REGISTER"
+
+
+def test_default_profile_parses_as_usual():
+    assert SipMessage.from_string(REGISTER, profile=ParseProfile()).headers == (
+        SipMessage.from_string(REGISTER).headers
+    )
+
+
+def test_raw_headers_stringify():
+    profile = ParseProfile(raw=["via", "contact", "authorization", "to"])
+    msg = SipMessage.from_string(REGISTER, profile=profile)
+    assert msg.stringify() == REGISTER.replace("\r\nv: ", "\r\nVia: ").replace(
+        "X-Custom: a\r\nX-Custom: b", "X-Custom: a,b"
+    )
+
+
+def test_lazy_mode():
+    profile = ParseProfile(raw=["via"], drop=["authorization"])
+    msg = SipMessage.from_string(REGISTER, lazy=True, profile=profile)
+    assert "authorization" not in msg.headers
+    assert len(msg.headers["via"]) == 2
+    assert isinstance(msg.headers["via"][0], str)
+    assert msg.headers["cseq"].method == "REGISTER"
+    assert "Authorization" not in msg.stringify()
+
+
+def test_compiled_table():
+    profile = ParseProfile(structured=["Via"], raw=["m"])
+    assert profile.parser("via") is parse_header_value
+    assert profile.parser("contact") is not parse_header_value
+    assert profile.parser("x-unknown") is parse_header_value
+    assert profile.action("M") == RAW
+    assert profile.action("x-unknown") == STRUCTURED
+
+    profile.default = DROP
+    profile.compile()
+    assert profile.parser("x-unknown") is None
+    assert profile.parser("content-length") is parse_header_value
+    assert profile.action("content-length") == STRUCTURED
+
+
+def test_invalid_profiles():
+    with pytest.raises(ValueError):
+        ParseProfile(raw=["via"], drop=["v"])
+    with pytest.raises(ValueError):
+        ParseProfile(drop=["content-length"])
+    with pytest.raises(ValueError):
+        ParseProfile(default="lazy")
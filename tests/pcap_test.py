@@ -0,0 +1,173 @@
+import socket
+import struct
+from sip_parser.pcap import read_pcap, PcapReader
+
+INVITE = (
+    b"INVITE sip:bob@example.com SIP/2.0\r\n"
+    b"Via: SIP/2.0/UDP 192.0.2.1;branch=z9hG4bK776asdhds\r\n"
+    b"Call-ID: a84b4c76e66710@pc33.atlanta.com\r\n"
+    b"CSeq: 314159 INVITE\r\n"
+    b"Content-Length: 4\r\n\r\n"
+    b"v=0\n"
+)
+
+RESPONSE = (
+    b"SIP/2.0 180 Ringing\r\n"
+    b"Call-ID: a84b4c76e66710@pc33.atlanta.com\r\n"
+    b"CSeq: 314159 INVITE\r\n"
+    b"Content-Length: 0\r\n\r\n"
+)
+
+
+def ipv4_packet(protocol, payload, identification=1, flags_offset=0, src="192.0.2.1"):
+    header = struct.pack(
+        "!BBHHHBBH4s4s",
+        0x45,
+        0,
+        20 + len(payload),
+        identification,
+        flags_offset,
+        64,
+        protocol,
+        0,
+        socket.inet_aton(src),
+        socket.inet_aton("192.0.2.2"),
+    )
+    return header + payload
+
+
+def ipv6_packet(next_header, payload):
+    src = socket.inet_pton(socket.AF_INET6, "2001:db8::1")
+    dst = socket.inet_pton(socket.AF_INET6, "2001:db8::2")
+    return struct.pack("!IHBB", 0x60000000, len(payload), next_header, 64) + src + dst + payload
+
+
+def udp_datagram(payload, src_port=5060, dst_port=5060):
+    return struct.pack("!HHHH", src_port, dst_port, 8 + len(payload), 0) + payload
+
+
+def tcp_segment(seq, payload, flags=0x18, src_port=40000, dst_port=5060):
+    return (
+        struct.pack("!HHIIHHHH", src_port, dst_port, seq, 0, (5 << 12) | flags, 65535, 0, 0)
+        + payload
+    )
+
+
+def ethernet_frame(ip_packet, ethertype=0x0800):
+    return b"\x00" * 12 + struct.pack("!H", ethertype) + ip_packet
+
+
+def write_pcap(path, frames, linktype=1):
+    with open(path, "wb") as pcap_file:
+        pcap_file.write(struct.pack("<IHHiIII", 0xA1B2C3D4, 2, 4, 0, 0, 65535, linktype))
+        for i, frame in enumerate(frames):
+            pcap_file.write(struct.pack("<IIII", 1000 + i, 500000, len(frame), len(frame)))
+            pcap_file.write(frame)
+
+
+def pcapng_block(block_type, body):
+    body += b"\x00" * (-len(body) % 4)
+    length = 12 + len(body)
+    return struct.pack("<II", block_type, length) + body + struct.pack("<I", length)
+
+
+def write_pcapng(path, frames, linktype=1):
+    with open(path, "wb") as pcap_file:
+        pcap_file.write(pcapng_block(0x0A0D0D0A, struct.pack("<IHHq", 0x1A2B3C4D, 1, 0, -1)))
+        # Interface with nanosecond timestamps (if_tsresol = 9)
+        options = struct.pack("<HHB3x", 9, 1, 9) + struct.pack("<HH", 0, 0)
+        pcap_file.write(pcapng_block(1, struct.pack("<HHI", linktype, 0, 65535) + options))
+        for i, frame in enumerate(frames):
+            timestamp = (2000 + i) * 1000000000
+            header = struct.pack(
+                "<IIIII", 0, timestamp >> 32, timestamp & 0xFFFFFFFF, len(frame), len(frame)
+            )
+            pcap_file.write(pcapng_block(6, header + frame))
+
+
+def test_pcap_udp(tmp_path):
+    path = str(tmp_path / "udp.pcap")
+    dns_query = udp_datagram(b"\x12\x34\x01\x00", 53, 53)
+    write_pcap(
+        path,
+        [
+            ethernet_frame(ipv4_packet(17, udp_datagram(INVITE))),
+            ethernet_frame(ipv4_packet(17, dns_query)),
+            ethernet_frame(ipv4_packet(17, udp_datagram(RESPONSE, 5060, 5062))),
+        ],
+    )
+
+    captured = list(read_pcap(path))
+
+    assert len(captured) == 2
+    assert captured[0].timestamp == 1000.5
+    assert captured[0].transport == "UDP"
+    assert captured[0].src_addr == "192.0.2.1"
+    assert captured[0].dst_addr == "192.0.2.2"
+    assert captured[0].message.method == "INVITE"
+    assert captured[0].message.content == "v=0\n"
+    assert captured[1].message.status == 180
+    assert captured[1].dst_port == 5062
+
+
+def test_pcap_ipv4_fragments(tmp_path):
+    path = str(tmp_path / "fragments.pcap")
+    datagram = udp_datagram(INVITE)
+    first, second = datagram[:64], datagram[64:]
+    write_pcap(
+        path,
+        [
+            # Out of order
+            ethernet_frame(ipv4_packet(17, second, identification=7, flags_offset=64 // 8)),
+            ethernet_frame(ipv4_packet(17, first, identification=7, flags_offset=0x2000)),
+        ],
+    )
+
+    captured = list(read_pcap(path))
+
+    assert len(captured) == 1
+    assert captured[0].message.headers["cseq"]["seq"] == 314159
+
+
+def test_pcap_tcp_reassembly(tmp_path):
+    path = str(tmp_path / "tcp.pcap")
+    stream = INVITE + RESPONSE
+    isn = 0xFFFFFFF0  # The sequence numbers wrap around
+    segments = [(0, stream[:30]), (70, stream[70:]), (30, stream[30:70]), (30, stream[30:70])]
+    frames = [ethernet_frame(ipv4_packet(6, tcp_segment(isn, b"", flags=0x02)))]
+    for offset, data in segments:
+        seq = (isn + 1 + offset) & 0xFFFFFFFF
+        frames.append(ethernet_frame(ipv4_packet(6, tcp_segment(seq, data))))
+
+    write_pcap(path, frames)
+
+    reader = PcapReader(path)
+    captured = list(reader)
+
+    assert [message.transport for message in captured] == ["TCP", "TCP"]
+    assert captured[0].message.method == "INVITE"
+    assert captured[0].message.content == "v=0\n"
+    assert captured[1].message.status == 180
+    assert captured[1].src_port == 40000
+    assert reader.packets == 5
+    assert reader.parse_errors == 0
+
+
+def test_pcapng_ipv6(tmp_path):
+    path = str(tmp_path / "udp.pcapng")
+    write_pcapng(path, [ethernet_frame(ipv6_packet(17, udp_datagram(INVITE)), 0x86DD)])
+
+    captured = list(read_pcap(path))
+
+    assert len(captured) == 1
+    assert captured[0].timestamp == 2000
+    assert captured[0].src_addr == "2001:db8::1"
+    assert captured[0].message.method == "INVITE"
+
+
+def test_pcap_ports_filter(tmp_path):
+    path = str(tmp_path / "udp.pcap")
+    write_pcap(path, [ethernet_frame(ipv4_packet(17, udp_datagram(INVITE, 5080, 5080)))])
+
+    assert list(read_pcap(path, ports=(5060,))) == []
+    assert len(list(read_pcap(path, ports=(5080,)))) == 1
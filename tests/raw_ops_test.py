@@ -0,0 +1,113 @@
+import textwrap
+import pytest
+from sip_parser.sip_message import SipMessage
+from sip_parser.raw_ops import RawSipMessage
+from sip_parser.exceptions import SipParseError
+
+
+def prepare_msg(msg: str):
+    # Message lines must be CRLF-terminated and not indented
+    return textwrap.dedent(msg).replace("\n", "\r\n")
+
+
+INVITE = """\
+    INVITE sip:bob@biloxi.com SIP/2.0
+    v: SIP/2.0/UDP p1.atlanta.com;branch=z9hG4bK1, SIP/2.0/UDP pc33.atlanta.com;branch=z9hG4bK2
+    Via: SIP/2.0/UDP 192.0.2.4;branch=z9hG4bK3
+    Max-Forwards: 70
+    Route: <sip:p2.biloxi.com;lr>,
+     "Proxy, inc" <sip:p3.biloxi.com;lr>
+    To: Bob <sip:bob@biloxi.com>
+    From: Alice <sip:alice@atlanta.com>;tag=1928301774
+    Call-ID: a84b4c76e66710@pc33.atlanta.com
+    CSeq: 314159 INVITE
+    Content-Length: 4
+
+    Hi
+    """
+
+
+def test_proxy_operations():
+    raw = RawSipMessage(prepare_msg(INVITE).encode())
+    assert raw.is_request
+    assert raw.method == "INVITE"
+
+    raw.insert_via("SIP/2.0/UDP p2.biloxi.com;branch=z9hG4bK4")
+    assert raw.decrement_max_forwards() == 69
+    assert raw.remove_top_route() == "<sip:p2.biloxi.com;lr>"
+    raw.add_record_route("<sip:p2.biloxi.com;lr>")
+    raw.rewrite_request_uri("sip:bob@192.0.2.10:5060")
+    assert raw.request_uri == "sip:bob@192.0.2.10:5060"
+
+    sip_msg = SipMessage.from_bytes(raw.to_bytes())
+    assert sip_msg.uri == "sip:bob@192.0.2.10:5060"
+    assert [via["host"] for via in sip_msg.headers["via"]] == [
+        "p2.biloxi.com",
+        "p1.atlanta.com",
+        "pc33.atlanta.com",
+        "192.0.2.4",
+    ]
+    assert sip_msg.headers["max-forwards"] == 69
+    assert len(sip_msg.headers["route"]) == 1
+    assert sip_msg.headers["route"][0]["name"] == '"Proxy, inc"'
+    assert sip_msg.headers["record-route"][0]["uri"]["host"] == "p2.biloxi.com"
+    assert sip_msg.content == "Hi\r\n"
+
+
+def test_remove_top_values():
+    raw = RawSipMessage(prepare_msg(INVITE).encode())
+
+    # Comma-separated values are removed one by one, then the following lines
+    assert raw.remove_top_via() == "SIP/2.0/UDP p1.atlanta.com;branch=z9hG4bK1"
+    assert raw.header_value("via") == "SIP/2.0/UDP pc33.atlanta.com;branch=z9hG4bK2"
+    assert raw.remove_top_via() == "SIP/2.0/UDP pc33.atlanta.com;branch=z9hG4bK2"
+    assert raw.remove_top_via() == "SIP/2.0/UDP 192.0.2.4;branch=z9hG4bK3"
+    assert raw.remove_top_via() is None
+
+    assert raw.remove_top_route() == "<sip:p2.biloxi.com;lr>"
+    assert raw.remove_top_route() == '"Proxy, inc" <sip:p3.biloxi.com;lr>'
+    assert raw.remove_top_route() is None
+
+    sip_msg = SipMessage.from_bytes(raw.to_bytes())
+    assert "via" not in sip_msg.headers
+    assert "route" not in sip_msg.headers
+    assert sip_msg.headers["call-id"] == "a84b4c76e66710@pc33.atlanta.com"
+    assert sip_msg.content == "Hi\r\n"
+
+
+def test_max_forwards_exhausted():
+    raw = RawSipMessage(prepare_msg(INVITE.replace("Max-Forwards: 70", "Max-Forwards: 0")).encode())
+    assert raw.decrement_max_forwards() == -1
+    assert raw.header_value("max-forwards") == "0"
+
+    raw = RawSipMessage(prepare_msg(INVITE.replace("Max-Forwards: 70\n", "")).encode())
+    assert raw.decrement_max_forwards() == 69
+    assert raw.header_value("max-forwards") == "69"
+
+
+def test_responses():
+    raw = RawSipMessage(b"SIP/2.0 200 OK\r\nVia: SIP/2.0/UDP p1;branch=z9hG4bK1\r\n\r\n")
+    assert not raw.is_request
+    assert raw.remove_top_via() == "SIP/2.0/UDP p1;branch=z9hG4bK1"
+    assert raw.to_bytes() == b"SIP/2.0 200 OK\r\n\r\n"
+
+    with pytest.raises(SipParseError):
+        raw.rewrite_request_uri("sip:bob@biloxi.com")
+
+    with pytest.raises(SipParseError):
+        RawSipMessage(b"SIP/2.0 200 OK\r\nVia: SIP/2.0/UDP p1;branch=z9hG4bK1\r\n")
+
+
+def test_invalid_header_encoding():
+    raw = RawSipMessage(b"MESSAGE sip:b\xff@biloxi.com SIP/2.0\r\nSubject: caf\xe9, hi\r\n\r\n")
+
+    for operation in (
+        lambda: raw.header_value("subject"),
+        lambda: raw.remove_top_value("subject"),
+        lambda: raw.method,
+    ):
+        with pytest.raises(SipParseError, match="^Invalid SIP message header encoding"):
+            operation()
+
+    # Nothing was edited
+    assert raw.to_bytes() == b"MESSAGE sip:b\xff@biloxi.com SIP/2.0\r\nSubject: caf\xe9, hi\r\n\r\n"
@@ -0,0 +1,73 @@
+import pickle
+import textwrap
+import pytest
+from sip_parser.sdp_message import SdpMessage
+from sip_parser.sdp_attributes import AttributeIndex, RtpMapField
+from sip_parser.exceptions import SdpParseError
+
+
+def prepare_msg(msg: str):
+    return textwrap.dedent(msg.strip())
+
+
+WEBRTC_SDP = """\
+    v=0
+    o=- 4611731400430051336 2 IN IP4 127.0.0.1
+    s=-
+    t=0 0
+    m=audio 9 UDP/TLS/RTP/SAVPF 111 63 0
+    c=IN IP4 0.0.0.0
+    a=fingerprint:sha-256 19:E2:1C:3B:4B:9F:81:E6
+    a=mid:0
+    a=sendrecv
+    a=rtpmap:111 opus/48000/2
+    a=rtcp-fb:111 transport-cc
+    a=fmtp:111 minptime=10;useinbandfec=1
+    a=rtpmap:63 red/48000/2
+    a=fmtp:63 111/111
+    a=rtpmap:0 PCMU/8000
+    a=rtcp-fb:* nack
+    a=rtcp-fb:111 nack pli
+    a=candidate:1 1 udp 2122260223 192.168.1.10 54321 typ host generation 0
+    a=candidate:2 1 udp 1686052607 203.0.113.10 54321 typ srflx raddr 192.168.1.10 rport 54321
+    m=video 9 UDP/TLS/RTP/SAVPF 96
+    c=IN IP4 0.0.0.0
+"""
+
+
+def test_attribute_index():
+    sdp_msg = SdpMessage.from_string(prepare_msg(WEBRTC_SDP))
+    audio, video = sdp_msg.media_descriptions
+    index = audio.attributes
+    assert index is audio.attributes  # Built once
+
+    assert index.get("fingerprint") == "sha-256 19:E2:1C:3B:4B:9F:81:E6"
+    assert index.get("sendrecv") is True
+    assert "mid" in index and "recvonly" not in index
+    assert index.get("recvonly", False) is False
+    assert index.get_all("rtpmap") == ["111 opus/48000/2", "63 red/48000/2", "0 PCMU/8000"]
+
+    assert index.rtpmap[111] == RtpMapField(111, "opus", 48000, "2")
+    assert index.rtpmap[0] == RtpMapField(0, "PCMU", 8000, None)
+    assert index.fmtp == {111: "minptime=10;useinbandfec=1", 63: "111/111"}
+    assert index.rtcp_fb == {111: ["transport-cc", "nack pli"], "*": ["nack"]}
+    assert len(index.candidates) == 2
+    assert index.candidates[1].endswith("rport 54321")
+
+    assert video.media_attributes is None
+    assert video.attributes.rtpmap == {} and video.attributes.candidates == []
+
+    # The index isn't part of the tuple
+    assert pickle.loads(pickle.dumps(audio)) == audio
+    assert audio._replace(media_title="Audio").attributes is not index
+
+
+def test_attribute_index_errors():
+    with pytest.raises(SdpParseError):
+        AttributeIndex([("rtpmap", "opus/48000")]).rtpmap
+
+    with pytest.raises(SdpParseError):
+        AttributeIndex([("rtpmap", "111 opus")]).rtpmap
+
+    with pytest.raises(SdpParseError):
+        AttributeIndex([("fmtp", True)]).fmtp
@@ -111,7 +111,7 @@ def test_example_full_sdp():
     assert sdp_msg.media_descriptions[1].media.port == 51372
     assert sdp_msg.media_descriptions[1].media.number_of_ports == 1
     assert sdp_msg.media_descriptions[1].media.proto == "RTP/AVP"
-    assert sdp_msg.media_descriptions[1].media_attributes == ("rtpmap", "99 h263-1998/90000")
+    assert sdp_msg.media_descriptions[1].media_attributes == [("rtpmap", "99 h263-1998/90000")]
 
 
 def test_multiple_attr_fields_sdp():
@@ -130,3 +130,66 @@ def test_multiple_attr_fields_sdp():
         ("prop2", True),
         ("prop3", "value"),
     ]
+
+
+def test_media_descriptions_sdp():
+    msg = """\
+        v=0
+        o=jdoe 2890844526 2890842807 IN IP4 10.47.16.5
+        s=
+        t=2873397496 2873404696
+        r=604800 3600 0 90000
+        t=0 0
+        m=audio 49170 RTP/AVP 0 8
+        c=IN IP4 10.47.16.5
+        b=AS:64
+        a=rtpmap:0 PCMU/8000
+        a=rtpmap:8 PCMA/8000
+        a=sendrecv
+        m=video 51372 RTP/AVP 99
+        i=Camera
+        a=rtpmap:99 h263-1998/90000
+
+    """
+    sdp_msg = SdpMessage.from_string(prepare_msg(msg) + "\n\n")
+    assert len(sdp_msg.time_descriptions) == 2
+    assert sdp_msg.time_descriptions[0].repeat_times[0].repeat_interval == "604800"
+    assert sdp_msg.time_descriptions[1].repeat_times == []
+    assert "a" not in sdp_msg.session_description_fields
+
+    audio, video = sdp_msg.media_descriptions
+    assert audio.media.port == 49170
+    assert audio.connection_information.connection_address == "10.47.16.5"
+    assert audio.bandwidth_information == ["AS:64"]
+    assert audio.media_attributes == [
+        ("rtpmap", "0 PCMU/8000"),
+        ("rtpmap", "8 PCMA/8000"),
+        ("sendrecv", True),
+    ]
+    assert video.media_title == "Camera"
+    assert video.connection_information is None
+    assert video.media_attributes == [("rtpmap", "99 h263-1998/90000")]
+
+
+def test_wrong_attribute_order_2():
+    # Session fields aren't allowed after the media descriptions
+    msg = """\
+        v=0
+        o=jdoe 2890844526 2890842807 IN IP4 10.47.16.5
+        s=
+        t=0 0
+        m=audio 49170 RTP/AVP 0
+        u=http://www.example.com/seminars/sdp.pdf
+    """
+    with pytest.raises(SdpParseError, match="Incorrect SDP header order detected"):
+        SdpMessage.from_string(prepare_msg(msg))
+
+
+def test_missing_time_description():
+    msg = """\
+        v=0
+        o=jdoe 2890844526 2890842807 IN IP4 10.47.16.5
+        s=
+    """
+    with pytest.raises(SdpParseError, match="Incorrect SDP header order detected"):
+        SdpMessage.from_string(prepare_msg(msg))
@@ -0,0 +1,90 @@
+import textwrap
+import pytest
+from sip_parser.sip_message import SipMessage
+from sip_parser.raw_ops import RawSipMessage
+from sip_parser.sdp_rewrite import rewrite_sdp, rewrite_message_sdp
+from sip_parser.exceptions import SdpParseError
+
+
+def prepare_msg(msg: str):
+    # Message lines must be CRLF-terminated and not indented
+    return textwrap.dedent(msg).replace("\n", "\r\n")
+
+
+SDP = prepare_msg(
+    """\
+    v=0
+    o=alice 2890844526 2890844526 IN IP4 host.atlanta.example.com
+    s=-
+    c=IN IP4 host.atlanta.example.com
+    t=0 0
+    m=audio 49170 RTP/AVP 0 8 97
+    a=rtpmap:0 PCMU/8000
+    m=video 51372/2 RTP/AVP 31 32
+    c=IN IP4 224.2.1.1/127
+    a=rtpmap:31 H261/90000
+    """
+)
+
+INVITE = (
+    prepare_msg(
+        f"""\
+    INVITE sip:bob@biloxi.com SIP/2.0
+    Via: SIP/2.0/UDP pc33.atlanta.com;branch=z9hG4bK776asdhds
+    Max-Forwards: 70
+    To: Bob <sip:bob@biloxi.com>
+    From: Alice <sip:alice@atlanta.com>;tag=1928301774
+    Call-ID: a84b4c76e66710@pc33.atlanta.com
+    CSeq: 314159 INVITE
+    Content-Type: application/sdp
+    Content-Length: {len(SDP)}
+
+    """
+    )
+    + SDP
+)
+
+
+def test_rewrite_sdp():
+    rewritten = rewrite_sdp(
+        SDP, connection_address="198.51.100.7", media_ports=[40000, 40002], origin_version=3
+    )
+    assert rewritten == SDP.replace(
+        "o=alice 2890844526 2890844526 IN", "o=alice 2890844526 3 IN"
+    ).replace("c=IN IP4 host.atlanta.example.com", "c=IN IP4 198.51.100.7").replace(
+        "m=audio 49170 ", "m=audio 40000 "
+    ).replace(
+        "m=video 51372/2 ", "m=video 40002/2 "
+    ).replace(
+        "c=IN IP4 224.2.1.1/127", "c=IN IP4 198.51.100.7/127"
+    )
+
+
+def test_rewrite_sdp_partially():
+    assert rewrite_sdp(SDP) == SDP
+    rewritten = rewrite_sdp(SDP.encode(), connection_address="2001:db8::7", media_ports=[None, 0])
+    assert isinstance(rewritten, bytes)
+    assert b"c=IN IP6 2001:db8::7\r\n" in rewritten
+    assert b"m=audio 49170 RTP/AVP 0 8 97\r\n" in rewritten
+    assert b"m=video 0/2 RTP/AVP 31 32\r\n" in rewritten
+
+    with pytest.raises(SdpParseError):
+        rewrite_sdp(SDP, media_ports=[1, 2, 3])
+
+
+def test_rewrite_message_sdp():
+    sip_msg = SipMessage.from_bytes(INVITE.encode(), lazy=True)
+    rewrite_message_sdp(sip_msg, connection_address="198.51.100.7", media_ports=[40000, 40002])
+    data = sip_msg.to_bytes()
+    assert data.startswith(INVITE[: INVITE.index("Content-Length")].encode())
+    assert SipMessage.from_bytes(data).content == rewrite_sdp(
+        SDP, connection_address="198.51.100.7", media_ports=[40000, 40002]
+    )
+
+    raw_msg = RawSipMessage(INVITE.encode())
+    rewrite_message_sdp(raw_msg, connection_address="198.51.100.100", origin_version=2)
+    assert raw_msg.body == rewrite_sdp(
+        SDP.encode(), connection_address="198.51.100.100", origin_version=2
+    )
+    assert raw_msg.header_value("content-length") == str(len(raw_msg.body))
+    assert SipMessage.from_bytes(raw_msg.to_bytes()).content == raw_msg.body.decode()
@@ -1,5 +1,8 @@
 import textwrap
-from sip_parser.sip_message import SipMessage
+import pickle
+import pytest
+from sip_parser.sip_message import SipMessage, SipParseError
+from sip_parser.sip_headers import SipUri, NameAddr, Via, CSeq, AuthCredentials
 
 
 def prepare_msg(msg: str):
@@ -245,3 +248,162 @@ def test_tortuous_invite_parsing():
     assert sip_msg.headers["via"][1]["protocol"] == "TCP"
     assert sip_msg.headers["via"][2]["protocol"] == "UDP"
     assert sip_msg.headers["from"]["params"]["tag"] == "98asjd8"
+
+
+def test_from_bytes_parsing():
+    msg = """\
+        INVITE sip:bob@example.com SIP/2.0
+        Via: SIP/2.0/UDP 192.0.2.2;branch=z9hG4bK30239
+        l: 4
+        CSeq: 1 INVITE
+
+        v=0
+        """
+
+    raw = prepare_msg(msg).encode()
+    for buffer in (raw, bytearray(raw), memoryview(raw)):
+        sip_msg = SipMessage.from_bytes(buffer)
+
+        assert sip_msg.method == "INVITE"
+        assert sip_msg.headers["via"][0]["params"]["branch"] == "z9hG4bK30239"
+        assert sip_msg.headers["cseq"]["seq"] == 1
+        # The body is a non-copied slice, sized by Content-Length
+        assert isinstance(sip_msg.body, memoryview)
+        assert bytes(sip_msg.body) == b"v=0\r"
+        assert sip_msg.content == "v=0\r"
+
+
+def test_from_bytes_content_length_too_big():
+    msg = """\
+        MESSAGE sip:bob@example.com SIP/2.0
+        Content-Length: 40
+
+        Hello
+        """
+
+    with pytest.raises(SipParseError, match="^Content-Length"):
+        SipMessage.from_bytes(prepare_msg(msg).encode())
+
+
+def test_from_bytes_negative_content_length():
+    msg = """\
+        MESSAGE sip:bob@example.com SIP/2.0
+        Content-Length: -3
+
+        Hello
+        """
+
+    with pytest.raises(SipParseError, match="^Invalid Content-Length"):
+        SipMessage.from_bytes(prepare_msg(msg).encode())
+
+
+def test_lazy_header_parsing():
+    msg = """\
+        INVITE sip:bob@example.com SIP/2.0
+        Via: SIP/2.0/UDP 192.0.2.2;branch=z9hG4bK30239
+        v: SIP/2.0/TCP spindle.example.com;branch=z9hG4bK9ikj8
+        Call-ID: wsinv.ndaksdj@192.0.2.1
+        CSeq: 9 INVITE
+        Contact: <sip:jdrosen@example.com>;q=0.33
+        Content-Length: 0
+
+        """
+
+    sip_msg = SipMessage.from_string(prepare_msg(msg), lazy=True)
+
+    assert len(sip_msg.headers) == 5
+    assert "contact" in sip_msg.headers
+    assert not sip_msg.headers.is_parsed("via")
+    assert not sip_msg.headers.is_parsed("contact")
+
+    # Accessing a header parses all of its ocurrences (and only that header)
+    assert sip_msg.headers["cseq"]["seq"] == 9
+    assert len(sip_msg.headers["via"]) == 2
+    assert sip_msg.headers["via"][1]["protocol"] == "TCP"
+    assert sip_msg.headers.is_parsed("via")
+    assert not sip_msg.headers.is_parsed("contact")
+
+    # The parsed value is memoized
+    assert sip_msg.headers["via"] is sip_msg.headers["via"]
+
+    # Once everything's parsed, it's the same as an eagerly parsed message
+    assert dict(sip_msg.headers) == SipMessage.from_string(prepare_msg(msg)).headers
+
+
+def test_contact_with_many_feature_tags():
+    feature_tags = ";".join(f'+g.feature{i}="urn%3Aurn-7%3Aservice{i}";tag{i}' for i in range(40))
+    msg = f"""\
+        REGISTER sip:ims.mnc123.mcc123.3gppnetwork.org SIP/2.0
+        Contact: <sip:1@127.0.0.1:51372;transport=tcp>;{feature_tags}, <sip:2@127.0.0.1>;q=0.5
+        Authorization: Digest username="alice", realm="ims", nonce="", uri="sip:ims", response=""
+
+        """
+
+    sip_msg = SipMessage.from_string(prepare_msg(msg))
+
+    contacts = sip_msg.headers["contact"]
+    assert len(contacts) == 2
+    assert len(contacts[0]["params"]) == 80
+    assert contacts[0]["params"]["+g.feature39"] == '"urn%3Aurn-7%3Aservice39"'
+    assert contacts[0]["params"]["tag39"] is None
+    assert contacts[1]["params"] == {"q": "0.5"}
+    auth = sip_msg.headers["authorization"][0]
+    assert auth["scheme"] == "Digest"
+    assert auth["username"] == '"alice"'
+    assert auth["response"] == '""'
+
+
+def test_typed_header_values():
+    msg = """\
+        INVITE sip:bob@biloxi.com SIP/2.0
+        Via: SIP/2.0/UDP pc33.atlanta.com:5061;branch=z9hG4bK776asdhds
+        Route: <sip:proxy.atlanta.com;lr;transport=tcp>
+        To: Bob <sip:bob@biloxi.com>
+        From: Alice <sip:alice@atlanta.com>;tag=1928301774
+        CSeq: 314159 INVITE
+        Authorization: Digest username="alice", realm="atlanta.com"
+
+        """
+
+    sip_msg = SipMessage.from_string(prepare_msg(msg))
+    headers = sip_msg.headers
+
+    via = headers["via"][0]
+    assert isinstance(via, Via)
+    assert via.host == via["host"] == "pc33.atlanta.com"
+    assert via.port == 5061
+    assert via == {
+        "version": "2.0",
+        "protocol": "UDP",
+        "host": "pc33.atlanta.com",
+        "port": 5061,
+        "params": {"branch": "z9hG4bK776asdhds"},
+    }
+
+    route = headers["route"][0]
+    assert isinstance(route, NameAddr) and isinstance(route.uri, SipUri)
+    assert route.uri.params == {"lr": None, "transport": "tcp"}
+    assert headers["from"].params["tag"] == "1928301774"
+    assert isinstance(headers["cseq"], CSeq)
+    assert dict(headers["cseq"]) == {"seq": 314159, "method": "INVITE"}
+
+    auth = headers["authorization"][0]
+    assert isinstance(auth, AuthCredentials)
+    assert auth.scheme == "Digest"
+    assert dict(auth) == {"username": '"alice"', "realm": '"atlanta.com"', "scheme": "Digest"}
+
+    # No per-instance dict
+    for value in (via, route, route.uri, headers["cseq"], auth):
+        assert not hasattr(value, "__dict__")
+
+    with pytest.raises(KeyError):
+        via["nope"] = 1
+
+    # Copies don't share their params
+    via_copy = via.copy()
+    via_copy.params["branch"] = "z9hG4bKother"
+    assert via.params["branch"] == "z9hG4bK776asdhds"
+
+    # Messages holding them can still be pickled (e.g sent to other processes)
+    assert pickle.loads(pickle.dumps(sip_msg)).headers == headers
+    assert sip_msg.stringify() == SipMessage.from_string(sip_msg.stringify()).stringify()
@@ -1,5 +1,6 @@
 import textwrap
 from sip_parser.sip_message import SipMessage
+from sip_parser.helpers import sip_stringifiers
 
 
 def prepare_msg(msg: str):
@@ -88,3 +89,161 @@ def test_stringify_multiple_route_headers():
     sip_msg2 = SipMessage.from_string(sip_msg.stringify())
 
     assert sip_msg.stringify() == sip_msg2.stringify()
+
+
+def test_to_bytes():
+    msg = """\
+        MESSAGE sip:bob@biloxi.com SIP/2.0
+        To: <sip:bob@biloxi.com>
+        Content-Type: text/plain
+        Content-Length: 6
+
+        héllo"""
+
+    original_message = prepare_msg(msg).encode()
+    sip_msg = SipMessage.from_bytes(original_message)
+    assert sip_msg.to_bytes() == original_message
+    assert sip_msg.stringify() == original_message.decode()
+
+    # Content-Length counts bytes, not characters
+    sip_msg = SipMessage.from_string(prepare_msg(msg))
+    sip_msg.content = "¡hola!"
+    assert sip_msg.to_bytes().endswith(b"Content-Length: 7\r\n\r\n\xc2\xa1hola!")
+    assert sip_msg.stringify().endswith("Content-Length: 7\r\n\r\n¡hola!")
+
+
+def test_stringify_auth_headers():
+    msg = """\
+        SIP/2.0 401 Unauthorized
+        WWW-Authenticate: Digest realm="atlanta.com",nonce="84a4cc6f",algorithm=MD5
+        WWW-Authenticate: Digest realm="atlanta.com",nonce="6b8f52e3",algorithm=SHA-256
+        Authentication-Info: nextnonce="47364c23432d2e131a5fb210812c"
+        Content-Length: 0
+
+        """
+
+    original_message = prepare_msg(msg)
+    sip_msg = SipMessage.from_string(original_message)
+
+    assert sip_msg.stringify() == original_message
+    assert sip_msg.to_bytes() == original_message.encode()
+
+
+def test_lazy_stringify_copies_unmodified_headers():
+    msg = """\
+        INVITE sip:bob@biloxi.com SIP/2.0
+        v: SIP/2.0/UDP pc33.atlanta.com;branch=z9hG4bK776asdhds
+        Max-Forwards: 70
+        To: Bob <sip:bob@biloxi.com>
+        From: "Alice"   <sip:alice@atlanta.com>;tag=1928301774;x="quoted"
+        Call-ID: a84b4c76e66710@pc33.atlanta.com
+        CSeq: 314159 INVITE
+        Contact: <sip:alice@pc33.atlanta.com>,
+         <sip:alice@192.0.2.4>
+        Content-Length: 4
+
+        Hi
+        """
+
+    original_message = prepare_msg(msg)
+
+    # Nothing modified, the message is copied as is (no matter how it was formatted)
+    sip_msg = SipMessage.from_string(original_message, lazy=True)
+    assert sip_msg.headers["call-id"] == "a84b4c76e66710@pc33.atlanta.com"
+    assert sip_msg.stringify() == original_message
+    assert not sip_msg.headers.is_parsed("from")
+
+    # Only the modified headers are rendered again
+    sip_msg.headers["via"].insert(
+        0,
+        {
+            "version": "2.0",
+            "protocol": "UDP",
+            "host": "proxy.biloxi.com",
+            "port": None,
+            "params": {"branch": "z9hG4bK4b43c2ff8.1"},
+        },
+    )
+    sip_msg.headers["max-forwards"] -= 1
+    sip_msg.headers["record-route"] = [{"uri": "sip:proxy.biloxi.com;lr", "params": {}}]
+
+    assert sip_msg.stringify() == original_message.replace(
+        "v: SIP/2.0/UDP pc33.atlanta.com;branch=z9hG4bK776asdhds",
+        "Via: SIP/2.0/UDP proxy.biloxi.com;branch=z9hG4bK4b43c2ff8.1\r\n"
+        "Via: SIP/2.0/UDP pc33.atlanta.com;branch=z9hG4bK776asdhds",
+    ).replace("Max-Forwards: 70", "Max-Forwards: 69").replace(
+        "Content-Length: 4\r\n", "Content-Length: 4\r\nRecord-Route: <sip:proxy.biloxi.com;lr>\r\n"
+    )
+
+    # Deleted headers are gone
+    del sip_msg.headers["contact"]
+    assert "alice@192.0.2.4" not in sip_msg.stringify()
+
+
+def test_single_header_stringifiers():
+    msg = """\
+        INVITE sip:bob@biloxi.com SIP/2.0
+        Via: SIP/2.0/UDP pc33.atlanta.com;branch=z9hG4bK776asdhds
+        Via: SIP/2.0/UDP 10.0.0.1:5060;branch=z9hG4bK4b43c2ff8.1
+        To: Bob <sip:bob@biloxi.com>
+        From: Alice <sip:alice@atlanta.com>;tag=1928301774
+        Contact: <sip:alice@pc33.atlanta.com>
+        Route: <sip:p1.example.com;lr>
+        Record-Route: <sip:p2.example.com;lr>
+        Path: <sip:p3.example.com;lr>
+        CSeq: 314159 INVITE
+        Refer-To: <sip:carol@atlanta.com>
+        Authorization: Digest username="alice",realm="atlanta.com"
+        Authorization: Digest username="bob",realm="biloxi.com"
+        Content-Length: 0
+
+        """
+
+    lines = prepare_msg(msg).split("\r\n")
+    headers = SipMessage.from_string(prepare_msg(msg)).headers
+
+    assert sip_stringifiers.stringify_via(headers["via"]) == "\r\n".join(lines[1:3])
+    assert sip_stringifiers.stringify_to(headers["to"]) == lines[3]
+    assert sip_stringifiers.stringify_from(headers["from"]) == lines[4]
+    assert sip_stringifiers.stringify_contact(headers["contact"]) == lines[5]
+    assert sip_stringifiers.stringify_route(headers["route"]) == lines[6]
+    assert sip_stringifiers.stringify_record_route(headers["record-route"]) == lines[7]
+    assert sip_stringifiers.stringify_path(headers["path"]) == lines[8]
+    assert sip_stringifiers.stringify_cseq(headers["cseq"]) == lines[9]
+    assert sip_stringifiers.stringify_refer_to(headers["refer-to"]) == lines[10]
+    assert sip_stringifiers.stringify_auth_header_many(
+        "Authorization", headers["authorization"]
+    ) == "\r\n".join(lines[11:13])
+    assert (
+        sip_stringifiers.stringify_auth_header_one("Authorization", headers["authorization"][0])
+        == lines[11]
+    )
+
+
+def test_stringify_int_values():
+    sip_message = SipMessage.from_dict(
+        {
+            "method": "OPTIONS",
+            "uri": "sip:bob@biloxi.com",
+            "version": "2.0",
+            "headers": {
+                "via": [
+                    {
+                        "version": "2.0",
+                        "protocol": "UDP",
+                        "host": "pc33.atlanta.com",
+                        "port": 5060,
+                        "params": {"branch": "z9hG4bK776asdhds", "rport": 5060},
+                    }
+                ],
+                "from": {"uri": {"host": "atlanta.com", "user": 1000}, "params": {"tag": 1}},
+                "cseq": {"seq": 1, "method": "OPTIONS"},
+            },
+        }
+    )
+
+    stringified = sip_message.stringify()
+    assert (
+        "Via: SIP/2.0/UDP pc33.atlanta.com:5060;branch=z9hG4bK776asdhds;rport=5060" in stringified
+    )
+    assert "From: <sip:1000@atlanta.com>;tag=1" in stringified
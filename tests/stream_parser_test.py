@@ -0,0 +1,100 @@
+import textwrap
+from sip_parser.stream_parser import SipStreamParser
+from sip_parser.exceptions import SipParseError
+import pytest
+
+
+def prepare_msg(msg: str):
+    # Message lines must be CRLF-terminated and not indented
+    return textwrap.dedent(msg).replace("\n", "\r\n").encode()
+
+
+MESSAGE_WITH_BODY = prepare_msg(
+    """\
+    MESSAGE sip:bob@example.com SIP/2.0
+    Via: SIP/2.0/TCP 192.0.2.2;branch=z9hG4bK30239
+    CSeq: 1 MESSAGE
+    Content-Length: 5
+
+    Hello"""
+)
+
+MESSAGE_COMPACT_LENGTH = prepare_msg(
+    """\
+    SIP/2.0 200 OK
+    CSeq: 1 MESSAGE
+    l: 2
+
+    Hi"""
+)
+
+MESSAGE_NO_BODY = prepare_msg(
+    """\
+    OPTIONS sip:bob@example.com SIP/2.0
+    CSeq: 2 OPTIONS
+    Content-Length: 0
+
+    """
+)
+
+
+def test_coalesced_messages():
+    parser = SipStreamParser()
+    messages = parser.feed(MESSAGE_WITH_BODY + MESSAGE_COMPACT_LENGTH + MESSAGE_NO_BODY)
+
+    assert len(messages) == 3
+    assert messages[0].method == "MESSAGE"
+    assert messages[0].content == "Hello"
+    assert messages[1].status == 200
+    assert messages[1].content == "Hi"
+    assert messages[2].method == "OPTIONS"
+    assert messages[2].content == ""
+    assert not parser.buffer
+
+
+def test_bad_message_between_good_ones():
+    parser = SipStreamParser()
+    bad_message = b"NOT A SIP MESSAGE\r\nContent-Length: 0\r\n\r\n"
+    messages = parser.feed(MESSAGE_WITH_BODY + bad_message + MESSAGE_NO_BODY)
+
+    assert [message.method for message in messages] == ["MESSAGE", "OPTIONS"]
+    assert parser.parse_errors == 1
+    assert not parser.buffer
+
+
+def test_split_messages():
+    parser = SipStreamParser()
+    stream = MESSAGE_WITH_BODY + MESSAGE_NO_BODY
+
+    # Feed it one byte at a time
+    messages = []
+    for i in range(len(stream)):
+        messages.extend(parser.feed(stream[i : i + 1]))
+
+    assert [message.method for message in messages] == ["MESSAGE", "OPTIONS"]
+    assert messages[0].content == "Hello"
+
+
+def test_keepalives():
+    pings = []
+    parser = SipStreamParser(on_keepalive=lambda: pings.append(True))
+
+    assert parser.feed(b"\r\n") == []
+    assert parser.feed(b"\r\n") == []  # Completes a ping
+    messages = parser.feed(b"\r\n\r\n\r\n" + MESSAGE_NO_BODY + b"\r\n")  # Ping, pong, message
+
+    assert len(messages) == 1
+    assert parser.keepalives == 2
+    assert len(pings) == 2
+
+
+def test_max_header_size():
+    parser = SipStreamParser(max_header_size=20)
+    with pytest.raises(SipParseError, match="^Header section exceeds"):
+        parser.feed(MESSAGE_NO_BODY)
+
+
+def test_max_body_size():
+    parser = SipStreamParser(max_body_size=4)
+    with pytest.raises(SipParseError, match="^Body exceeds"):
+        parser.feed(MESSAGE_WITH_BODY)
@@ -0,0 +1,56 @@
+from sip_parser.timer_wheel import TimerWheel
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_timers_fire_on_time():
+    clock = FakeClock()
+    wheel = TimerWheel(tick=0.01, size=16, clock=clock)
+    fired = []
+    wheel.schedule(0.05, fired.append, "short")
+    wheel.schedule(1.0, fired.append, "long")  # Several turns of the wheel away
+    cancelled = wheel.schedule(0.05, fired.append, "cancelled")
+    cancelled.cancel()
+    assert len(wheel) == 2
+
+    clock.now += 0.04
+    assert wheel.advance() == 0
+
+    clock.now += 0.011
+    assert wheel.advance() == 1
+    assert fired == ["short"]
+
+    clock.now += 0.9
+    wheel.advance()
+    assert fired == ["short"]
+
+    clock.now += 0.1
+    wheel.advance()
+    assert fired == ["short", "long"]
+    assert len(wheel) == 0
+    assert not cancelled.active
+
+
+def test_callbacks_can_reschedule():
+    clock = FakeClock()
+    wheel = TimerWheel(tick=0.01, size=8, clock=clock)
+    fired = []
+
+    def periodic():
+        fired.append(clock.now)
+        if len(fired) < 5:
+            wheel.schedule(0.1, periodic)
+
+    wheel.schedule(0.1, periodic)
+    for _ in range(100):
+        clock.now += 0.01
+        wheel.advance()
+
+    assert len(fired) == 5
+    assert len(wheel) == 0
@@ -0,0 +1,79 @@
+import textwrap
+import pytest
+from sip_parser.sip_message import SipMessage
+from sip_parser.transaction_keys import extract_keys, extract_call_id, TransactionKeys
+from sip_parser.exceptions import SipParseError
+
+
+def prepare_msg(msg: str):
+    # Message lines must be CRLF-terminated and not indented
+    return textwrap.dedent(msg).replace("\n", "\r\n")
+
+
+def test_extract_keys():
+    msg = """\
+        INVITE sip:bob@biloxi.com SIP/2.0
+        Via: SIP/2.0/UDP pc33.atlanta.com:5061;received=192.0.2.1;branch=z9hG4bK776asdhds, SIP/2.0/UDP p1;branch=z9hG4bK2
+        Via: SIP/2.0/UDP 192.0.2.4;branch=z9hG4bK3
+        To: Bob <sip:bob@biloxi.com>
+        From: Alice <sip:alice@atlanta.com;tag=uri-param>;tag=1928301774
+        Call-ID: a84b4c76e66710@pc33.atlanta.com
+        CSeq: 314159 INVITE
+        Content-Length: 4
+
+        Hi
+        """
+
+    raw = prepare_msg(msg).encode()
+    keys = extract_keys(raw)
+    assert keys == TransactionKeys(
+        call_id="a84b4c76e66710@pc33.atlanta.com",
+        cseq_seq=314159,
+        cseq_method="INVITE",
+        via_branch="z9hG4bK776asdhds",
+        via_sent_by="pc33.atlanta.com:5061",
+        from_tag="1928301774",
+        to_tag=None,
+    )
+
+    # Same keys as a full parse, for any bytes-like object or str
+    sip_msg = SipMessage.from_bytes(raw)
+    assert keys.call_id == sip_msg.headers["call-id"]
+    assert keys.via_branch == sip_msg.headers["via"][0]["params"]["branch"]
+    assert extract_keys(memoryview(raw)) == keys
+    assert extract_keys(raw.decode()) == keys
+
+    # Leading CRLF keepalives are skipped
+    assert extract_keys(b"\r\n\r\n" + raw) == keys
+    assert extract_call_id(b"\r\n\r\n" + raw) == b"a84b4c76e66710@pc33.atlanta.com"
+
+
+def test_extract_keys_compact_forms():
+    msg = """\
+        SIP/2.0 200 OK
+        v: SIP/2.0/TCP client.biloxi.example.com ; branch = z9hG4bKnashds7
+        f: <sip:bob@biloxi.example.com>;TAG=456248
+        t: sip:bob@biloxi.example.com;tag=2493k59kd
+        i: 843817637684230@998sdasdh09
+        CSeq: 1826 REGISTER
+        l: 0
+
+        """
+
+    assert extract_keys(prepare_msg(msg).encode()) == (
+        "843817637684230@998sdasdh09",
+        1826,
+        "REGISTER",
+        "z9hG4bKnashds7",
+        "client.biloxi.example.com",
+        "456248",
+        "2493k59kd",
+    )
+
+
+def test_extract_keys_missing_headers():
+    keys = extract_keys(b"OPTIONS sip:bob@biloxi.com SIP/2.0\r\nCall-ID: abc\r\n\r\n")
+    assert keys == ("abc", None, None, None, None, None, None)
+
+    with pytest.raises(SipParseError):
+        extract_keys(b"OPTIONS sip:bob@biloxi.com SIP/2.0\r\nCall-ID: abc\r\n")
@@ -0,0 +1,255 @@
+import textwrap
+from typing import Optional
+from sip_parser.sip_message import SipMessage
+from sip_parser.timer_wheel import TimerWheel
+from sip_parser.transactions import (
+    TransactionLayer,
+    TransactionUser,
+    CALLING,
+    PROCEEDING,
+    COMPLETED,
+    CONFIRMED,
+    TERMINATED,
+)
+
+
+def prepare_msg(msg: str):
+    # Message lines must be CRLF-terminated and not indented
+    return textwrap.dedent(msg).replace("\n", "\r\n")
+
+
+def request(
+    method: str,
+    branch: Optional[str] = "z9hG4bK776asdhds",
+    call_id: str = "a84b4c76e66710@pc33.atlanta.com",
+    cseq: int = 314159,
+):
+    via_params = f";branch={branch}" if branch else ""
+    return SipMessage.from_string(
+        prepare_msg(
+            f"""\
+            {method} sip:bob@biloxi.com SIP/2.0
+            Via: SIP/2.0/UDP pc33.atlanta.com{via_params}
+            Max-Forwards: 70
+            To: Bob <sip:bob@biloxi.com>
+            From: Alice <sip:alice@atlanta.com>;tag=1928301774
+            Call-ID: {call_id}
+            CSeq: {cseq} {method}
+            Content-Length: 0
+
+            """
+        )
+    )
+
+
+def response(status: int, reason: str, method: str, branch: str = "z9hG4bK776asdhds"):
+    return SipMessage.from_string(
+        prepare_msg(
+            f"""\
+            SIP/2.0 {status} {reason}
+            Via: SIP/2.0/UDP pc33.atlanta.com;branch={branch}
+            To: Bob <sip:bob@biloxi.com>;tag=a6c85cf
+            From: Alice <sip:alice@atlanta.com>;tag=1928301774
+            Call-ID: a84b4c76e66710@pc33.atlanta.com
+            CSeq: 314159 {method}
+            Content-Length: 0
+
+            """
+        )
+    )
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Recorder(TransactionUser):
+    def __init__(self):
+        self.requests = []
+        self.responses = []
+        self.timeouts = []
+
+    def on_request(self, transaction, request):
+        self.requests.append((transaction, request.method))
+
+    def on_response(self, transaction, response):
+        self.responses.append((transaction, response.status))
+
+    def on_timeout(self, transaction):
+        self.timeouts.append(transaction)
+
+
+def setup(reliable: bool = False):
+    clock = FakeClock()
+    sent = []
+    tu = Recorder()
+    layer = TransactionLayer(
+        lambda data, addr: sent.append(data), tu, reliable, TimerWheel(clock=clock)
+    )
+
+    def wait(seconds: float):
+        for _ in range(int(seconds * 100)):
+            clock.now += 0.01
+            layer.wheel.advance()
+
+    return layer, tu, sent, wait
+
+
+def test_client_invite_retransmissions_and_timeout():
+    layer, tu, sent, wait = setup()
+    transaction = layer.send_request(request("INVITE"), ("192.0.2.4", 5060))
+    assert transaction.state == CALLING
+
+    # Timer A: 0.5, 1, 2, 4, 8, 16s... until timer B (32s)
+    wait(31.9)
+    assert len(sent) == 1 + 6
+    assert not tu.timeouts
+
+    wait(0.2)
+    assert tu.timeouts == [transaction]
+    assert transaction.state == TERMINATED
+    assert len(layer) == 0
+    assert len(layer.wheel) == 0
+
+
+def test_client_invite_error_response():
+    layer, tu, sent, wait = setup()
+    transaction = layer.send_request(request("INVITE"), ("192.0.2.4", 5060))
+
+    layer.receive(response(180, "Ringing", "INVITE"), None)
+    assert transaction.state == PROCEEDING
+    wait(10)
+    assert len(sent) == 1  # No retransmissions once proceeding
+
+    layer.receive(response(486, "Busy Here", "INVITE"), None)
+    assert transaction.state == COMPLETED
+    ack = SipMessage.from_bytes(sent[-1])
+    assert ack.method == "ACK"
+    assert ack.headers["cseq"] == {"seq": 314159, "method": "ACK"}
+    assert ack.headers["to"]["params"]["tag"] == "a6c85cf"
+
+    # Retransmissions of the response are absorbed (and ACKed again)
+    layer.receive(response(486, "Busy Here", "INVITE"), None)
+    assert sent[-1] == sent[-2]
+    assert tu.responses == [(transaction, 180), (transaction, 486)]
+    assert layer.absorbed == 1
+
+    wait(32.1)  # Timer D
+    assert transaction.state == TERMINATED
+    assert not tu.timeouts
+
+
+def test_client_non_invite():
+    layer, tu, sent, wait = setup()
+    transaction = layer.send_request(request("OPTIONS"), ("192.0.2.4", 5060))
+
+    # Timer E: 0.5, 1, 2, 4 (capped by T2), 4...
+    wait(7.6)
+    assert len(sent) == 1 + 4
+    layer.receive(response(100, "Trying", "OPTIONS"), None)
+    wait(4)
+    assert len(sent) == 1 + 5
+
+    layer.receive(response(200, "OK", "OPTIONS"), None)
+    layer.receive(response(200, "OK", "OPTIONS"), None)
+    assert tu.responses == [(transaction, 100), (transaction, 200)]
+    assert transaction.state == COMPLETED
+    wait(5.1)  # Timer K
+    assert transaction.state == TERMINATED
+
+
+def test_server_invite():
+    layer, tu, sent, wait = setup()
+    layer.receive(request("INVITE"), ("192.0.2.4", 5060))
+    [(transaction, method)] = tu.requests
+    assert method == "INVITE"
+
+    # Retransmitted requests are absorbed, answered with the last provisional response
+    layer.receive(request("INVITE"), ("192.0.2.4", 5060))
+    assert sent == []
+    transaction.respond(response(180, "Ringing", "INVITE"))
+    layer.receive(request("INVITE"), ("192.0.2.4", 5060))
+    assert len(sent) == 2 and sent[0] == sent[1]
+
+    # Timer G retransmits the final response until it's ACKed
+    transaction.respond(response(486, "Busy Here", "INVITE"))
+    wait(1.6)
+    assert len(sent) == 3 + 2
+    layer.receive(request("ACK"), ("192.0.2.4", 5060))
+    assert transaction.state == CONFIRMED
+    wait(10)
+    assert len(sent) == 3 + 2
+    assert transaction.state == TERMINATED
+    assert len(tu.requests) == 1
+
+
+def test_server_invite_ack_timeout():
+    layer, tu, sent, wait = setup()
+    layer.receive(request("INVITE"), ("192.0.2.4", 5060))
+    [(transaction, _)] = tu.requests
+    transaction.respond(response(500, "Server Error", "INVITE"))
+    wait(32.1)  # Timer H
+    assert tu.timeouts == [transaction]
+
+
+def test_server_non_invite_reliable():
+    layer, tu, sent, wait = setup(reliable=True)
+    layer.receive(request("OPTIONS"), ("192.0.2.4", 5060))
+    [(transaction, _)] = tu.requests
+    transaction.respond(response(200, "OK", "OPTIONS"))
+
+    # No timer J over reliable transports
+    assert transaction.state == TERMINATED
+    assert len(layer) == 0
+
+    # A different branch is a different transaction
+    layer.receive(request("OPTIONS", branch="z9hG4bKother"), ("192.0.2.4", 5060))
+    assert len(tu.requests) == 2
+
+
+def test_server_without_magic_cookie():
+    layer, tu, sent, wait = setup()
+    layer.receive(request("OPTIONS", branch=None, call_id="x", cseq=1), ("192.0.2.4", 5060))
+    layer.receive(request("OPTIONS", branch=None, call_id="y", cseq=7), ("192.0.2.4", 5060))
+    assert len(tu.requests) == 2
+    assert layer.absorbed == 0
+
+    # Retransmissions are still absorbed, matched by Call-ID, CSeq, tags...
+    layer.receive(request("OPTIONS", branch=None, call_id="y", cseq=7), ("192.0.2.4", 5060))
+    assert len(tu.requests) == 2
+    assert layer.absorbed == 1
+
+    # As are those of requests with RFC 2543 branches (without the magic cookie)
+    layer.receive(request("OPTIONS", branch="1", call_id="x", cseq=2), ("192.0.2.4", 5060))
+    layer.receive(request("OPTIONS", branch="1", call_id="y", cseq=8), ("192.0.2.4", 5060))
+    layer.receive(request("OPTIONS", branch="1", call_id="y", cseq=8), ("192.0.2.4", 5060))
+    assert len(tu.requests) == 4
+    assert layer.absorbed == 2
+
+
+def test_server_invite_without_magic_cookie_ack():
+    layer, tu, sent, wait = setup()
+    layer.receive(request("INVITE", branch=None), ("192.0.2.4", 5060))
+    [(transaction, _)] = tu.requests
+    transaction.respond(response(486, "Busy Here", "INVITE"))
+    layer.receive(request("ACK", branch=None), ("192.0.2.4", 5060))
+    assert transaction.state == CONFIRMED
+    assert len(tu.requests) == 1
+
+
+def test_receive_without_via_or_cseq():
+    layer, tu, sent, wait = setup()
+    for headers in ("CSeq: 1 OPTIONS", "Via: SIP/2.0/UDP pc33.atlanta.com;branch=z9hG4bK1"):
+        layer.receive(
+            SipMessage.from_string(f"OPTIONS sip:bob@biloxi.com SIP/2.0\r\n{headers}\r\n\r\n"),
+            ("192.0.2.4", 5060),
+        )
+        layer.receive(SipMessage.from_string(f"SIP/2.0 200 OK\r\n{headers}\r\n\r\n"), None)
+
+    assert layer.invalid == 4
+    assert tu.requests == [] and tu.responses == []
+    assert len(layer) == 0